@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+投稿HTMLのサイズと生成時間の比較（インラインCSS / CSSクラス＋スタイルシート）
+
+1年分（既定）の投稿をフォールバック本文で生成し、1件あたりのHTMLサイズと生成時間を出す。
+インラインCSS版は従来の出力（各要素に style 属性）と同じ。
+
+    python benchmarks/bench_post_render.py --days 365
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from calendar_post import CalendarPostGenerator
+
+
+def render_all(dates, astronomy_list, inline_css):
+    """全日分の投稿HTMLを生成し、(合計バイト数, 所要秒数) を返す"""
+    total = 0
+    start = time.perf_counter()
+    # 生成中のログは計測の邪魔になるので捨てる
+    with contextlib.redirect_stdout(io.StringIO()):
+        for date, astronomy in zip(dates, astronomy_list):
+            generator = CalendarPostGenerator(date, astronomy, inline_css=inline_css)
+            total += len(generator.generate_post(gemini_content="")['content'].encode('utf-8'))
+    return total, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="投稿HTMLのサイズ・生成時間の比較")
+    parser.add_argument('--days', type=int, default=365, help="生成する日数（既定: 365）")
+    parser.add_argument('--start', default='2026-01-01', help="開始日（既定: 2026-01-01）")
+    args = parser.parse_args()
+
+    jst = ZoneInfo("Asia/Tokyo")
+    first = datetime.strptime(args.start, '%Y-%m-%d').replace(hour=CalendarPostGenerator.POST_HOUR, tzinfo=jst)
+    dates = [first + timedelta(days=i) for i in range(args.days)]
+    astronomy_list = CalendarPostGenerator.calculate_astronomy_range(dates)
+
+    inline_bytes, inline_time = render_all(dates, astronomy_list, inline_css=True)
+    class_bytes, class_time = render_all(dates, astronomy_list, inline_css=False)
+
+    print(f"{args.days}日分（フォールバック本文）")
+    print(f"インラインCSS（従来）: {inline_bytes / args.days:8,.0f} バイト/件  {inline_time / args.days * 1000:6.3f} ms/件")
+    print(f"CSSクラス:            {class_bytes / args.days:8,.0f} バイト/件  {class_time / args.days * 1000:6.3f} ms/件")
+    print(f"サイズ削減: {(1 - class_bytes / inline_bytes) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gemini出力のHTML整形（_format_gemini_content_to_html）のマイクロベンチマーク
+
+数MBのアーカイブ（フォールバック本文を繰り返したもの）を、
+1回走査のSectionStreamParserと従来の行ごとの整形処理で整形し、時間を比較する。
+
+    python benchmarks/bench_section_parser.py --mb 4 --repeat 5
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from calendar_post import CalendarPostGenerator
+
+
+def legacy_format(generator, content):
+    """従来の整形処理（行ごとに全セクションの絵文字を startswith で照合し、太字は毎回 re.sub）"""
+    section_config = generator.SECTION_CONFIG
+
+    def process_bold(text):
+        return re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
+
+    def convert(lines):
+        html = []
+        in_list = False
+        current_paragraph = []
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith('* ') or stripped.startswith('- '):
+                if current_paragraph:
+                    html.append(generator.templates['paragraph'].format(''.join(current_paragraph)))
+                    current_paragraph = []
+                if not in_list:
+                    html.append(generator.templates['list_open'])
+                    in_list = True
+                html.append(generator.templates['list_item'].format(process_bold(stripped[2:].strip())))
+            else:
+                if in_list:
+                    html.append(generator.templates['list_close'])
+                    in_list = False
+                if current_paragraph:
+                    current_paragraph.append(' ')
+                current_paragraph.append(process_bold(stripped))
+        if in_list:
+            html.append(generator.templates['list_close'])
+        if current_paragraph:
+            html.append(generator.templates['paragraph'].format(''.join(current_paragraph)))
+        return ''.join(html)
+
+    html_parts = []
+    current_section = None
+    current_content = []
+
+    def save():
+        if current_section and current_content:
+            color, name = section_config[current_section]
+            html_parts.append(generator._create_section_html(
+                line_with_emoji=f"{current_section} {name}",
+                content=convert(current_content),
+                color=color
+            ))
+
+    for line in content.split('\n'):
+        line_stripped = line.strip()
+        is_section_start = False
+        for emoji in section_config:
+            if line_stripped.startswith(emoji):
+                save()
+                current_section = emoji
+                current_content = []
+                is_section_start = True
+                break
+        if not is_section_start and line_stripped:
+            current_content.append(line)
+    save()
+
+    return ''.join(html_parts)
+
+
+def build_archive(generator, megabytes):
+    """フォールバック本文を繰り返して指定サイズのアーカイブを作る"""
+    lunar = {'month': 1, 'day': 1, 'month_name': '睦月', 'rokuyou': '先勝', 'age': 0.5, 'phase': '新月'}
+    post = generator._generate_rich_fallback_content(lunar, ('立春', 'りっしゅん', ''), ('東風解凍', '', ''))
+    post += '\n'
+    count = max(1, int(megabytes * 1024 * 1024 / len(post.encode('utf-8'))))
+    return post * count
+
+
+def best_of(func, repeat):
+    """repeat回実行した最短時間（秒）と結果"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML整形のマイクロベンチマーク")
+    parser.add_argument('--mb', type=float, default=4, help="アーカイブのサイズ（MB、既定: 4）")
+    parser.add_argument('--repeat', type=int, default=5, help="計測回数（最短時間を採用、既定: 5）")
+    args = parser.parse_args()
+
+    generator = CalendarPostGenerator(datetime(2026, 1, 1))
+    archive = build_archive(generator, args.mb)
+    size_mb = len(archive.encode('utf-8')) / 1024 / 1024
+
+    legacy_time, legacy_html = best_of(lambda: legacy_format(generator, archive), args.repeat)
+    new_time, new_html = best_of(lambda: generator._format_gemini_content_to_html(archive), args.repeat)
+
+    if new_html != legacy_html:
+        print("❌ 整形結果が従来の処理と一致しません")
+        sys.exit(1)
+
+    print(f"アーカイブ: {size_mb:.1f}MB / {archive.count(chr(10))}行")
+    print(f"従来の処理:        {legacy_time * 1000:8.1f} ms（{size_mb / legacy_time:6.1f} MB/s）")
+    print(f"SectionStreamParser: {new_time * 1000:6.1f} ms（{size_mb / new_time:6.1f} MB/s）")
+    print(f"高速化: {legacy_time / new_time:.2f}倍（出力は同一）")
+
+
+if __name__ == '__main__':
+    main()
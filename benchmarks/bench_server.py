@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+暦APIサーバー（--serve）の負荷ベンチマーク
+
+サーバーを別プロセスで起動し、keep-alive の接続を並列に張って /almanac を叩き続ける。
+1秒あたりの処理件数と、サーバーが報告するキャッシュのヒット率を出す。
+
+    python benchmarks/bench_server.py --connections 32 --requests 20000 --days 1096
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def get(reader, writer, path):
+    """keep-alive の接続で GET し、(ステータス, 本文) を返す"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('latin-1'))
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = next(
+        int(line.split(b':', 1)[1])
+        for line in head.split(b'\r\n') if line.lower().startswith(b'content-length:')
+    )
+    return status, await reader.readexactly(length)
+
+
+async def client(port, paths):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    errors = 0
+    for path in paths:
+        status, _ = await get(reader, writer, path)
+        errors += status != 200
+    writer.close()
+    return errors
+
+
+async def load(port, connections, total, days):
+    first = date(2025, 1, 1)
+    paths = [
+        f"/almanac?date={first + timedelta(days=random.randrange(days)):%Y-%m-%d}"
+        for _ in range(total)
+    ]
+    per_client = [paths[i::connections] for i in range(connections)]
+
+    start = time.perf_counter()
+    errors = sum(await asyncio.gather(*(client(port, p) for p in per_client)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    _, body = await get(reader, writer, '/stats')
+    writer.close()
+    return elapsed, errors, json.loads(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="暦APIサーバーの負荷ベンチマーク")
+    parser.add_argument('--connections', type=int, default=32, help="同時接続数（既定: 32）")
+    parser.add_argument('--requests', type=int, default=20000, help="リクエスト総数（既定: 20000）")
+    parser.add_argument('--days', type=int, default=1096, help="問い合わせる日付の種類（2025年から、既定: 1096）")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, 'calendar_post.py', '--serve', '--port', str(port)],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        # 起動（暦データの準備）を待つ
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        elapsed, errors, stats = asyncio.run(load(port, args.connections, args.requests, args.days))
+    finally:
+        server.terminate()
+        server.wait()
+
+    cache = stats['cache']
+    print(f"{args.requests}件 / 同時{args.connections}接続 / 日付{args.days}種類")
+    print(f"処理件数: {args.requests / elapsed:,.0f} 件/秒（{elapsed:.2f}秒、エラー {errors}件）")
+    print(f"キャッシュ: ヒット {cache['hits']}件 / ミス {cache['misses']}件（ヒット率 {cache['hit_ratio']}）")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
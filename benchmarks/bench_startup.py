@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+起動時間のベンチマーク（python -X importtime）
+
+calendar_post の import にかかる時間と、読み込みの重いモジュールの内訳を出す。
+投稿時だけに使うモジュール（requests・Google APIクライアント）が import 時に読み込まれていたり、
+import 時間が予算を超えたりした場合は終了コード1で終わる。
+
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# import 時に読み込んではいけないモジュール
+LAZY_MODULES = (
+    'requests',
+    'googleapiclient.discovery',
+    'google_auth_oauthlib.flow',
+    'google.oauth2.credentials',
+    'concurrent.futures',
+)
+
+# 暦だけを引く処理（起動から結果の表示まで）
+ASTRONOMY_QUERY = (
+    "from datetime import datetime\n"
+    "from calendar_post import YearlyAlmanac\n"
+    "print(YearlyAlmanac.lookup(datetime.now())['kou'][0])\n"
+)
+
+
+def run_importtime():
+    """import calendar_post を -X importtime で実行し、calendar_post 配下の {モジュール名: (累積μs, 深さ)} を返す"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import calendar_post'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    # 子モジュールは親より先に出力されるので、calendar_post の行から遡って集める
+    # （インタプリタ起動時の site などは含めない）
+    lines = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        lines.append((name.strip(), int(cumulative), depth))
+
+    end = next(i for i, (name, _, depth) in enumerate(lines) if name == 'calendar_post' and depth == 0)
+    start = end
+    while start > 0 and lines[start - 1][2] > 0:
+        start -= 1
+    return {name: (cumulative, depth) for name, cumulative, depth in lines[start:end + 1]}
+
+
+def run_query():
+    """暦を1日分引く処理の起動から終了までの時間（秒）"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', ASTRONOMY_QUERY], cwd=REPO_ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動時間のベンチマーク")
+    parser.add_argument('--runs', type=int, default=5, help="計測回数（最短を採用、既定: 5）")
+    parser.add_argument('--budget-ms', type=float, default=200, help="import calendar_post の予算（ms、既定: 200）")
+    parser.add_argument('--top', type=int, default=10, help="表示する重いモジュールの数（既定: 10）")
+    args = parser.parse_args()
+
+    runs = [run_importtime() for _ in range(args.runs)]
+    best = min(runs, key=lambda modules: modules['calendar_post'][0])
+    total_ms = best['calendar_post'][0] / 1000
+
+    print(f"import calendar_post: {total_ms:.1f} ms（{args.runs}回中の最短）")
+    print("重いモジュール（calendar_post から直接読み込むもの）:")
+    direct = sorted(
+        ((name, us) for name, (us, depth) in best.items() if depth == 1),
+        key=lambda item: item[1], reverse=True
+    )
+    for name, us in direct[:args.top]:
+        print(f"  {us / 1000:7.1f} ms  {name}")
+
+    # 暦データを用意してから計測する（初回は作成のため遅い）
+    run_query()
+    query_ms = min(run_query() for _ in range(args.runs)) * 1000
+    print(f"暦の照会（起動〜表示）: {query_ms:.1f} ms")
+
+    failures = []
+    loaded = [name for name in LAZY_MODULES if name in best]
+    if loaded:
+        failures.append(f"import 時に読み込まれています: {', '.join(loaded)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import 時間が予算を超えています: {total_ms:.1f} ms > {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ 起動時間は予算内です")
+
+
+if __name__ == '__main__':
+    main()
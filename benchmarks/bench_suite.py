@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+天文計算・HTML生成の主要処理のベンチマーク（基準値との比較付き）
+
+各処理を1日分（small）と10年分（large）で計測し、benchmarks/baseline.json と比べる。
+許容幅を超えて遅くなった処理があれば終了コード1で終わる。
+基準値はマシンによらないよう、純Pythonの較正処理の時間に対する比で保存する。
+較正処理とnumpyの処理の速さの比はマシンでも多少変わるので、許容幅は広め（既定で2倍まで）にしている。
+Gemini API の代わりに同じプロセス内のスタブHTTPサーバーへ GeminiContentGenerator からリクエストし、
+リクエストの送信から応答の解析・HTML整形までを計測する。
+
+    python benchmarks/bench_suite.py                  # 基準値と比較
+    python benchmarks/bench_suite.py --save-baseline  # 基準値を保存
+    python benchmarks/bench_suite.py --filter lunar   # 名前に lunar を含む処理だけ
+"""
+
+import io
+import os
+import sys
+import json
+import timeit
+import argparse
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# 利用者のキャッシュに左右されないよう、空の一時ディレクトリを使う
+os.environ['CALENDAR_CACHE_DIR'] = tempfile.mkdtemp(prefix='calendar_bench_')
+os.environ.pop('GEMINI_API_KEY', None)
+os.environ['GEMINI_CACHE'] = '0'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from calendar_post import (
+    AccurateSolarTermCalculator,
+    AccurateLunarCalendar,
+    AccurateSunCalculator,
+    CalendarPostGenerator,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+JST = ZoneInfo("Asia/Tokyo")
+DATE = datetime(2026, 10, 17, 7, tzinfo=JST)
+RANGE_DAYS = 3653
+DATES = [datetime(2020, 1, 1, 7, tzinfo=JST) + timedelta(days=i) for i in range(RANGE_DAYS)]
+# Geminiへのリクエストを含む処理の large は1年分
+POST_DAYS = 366
+
+
+def calibration():
+    """マシンの速さの目安になる純Pythonの処理"""
+    total = 0
+    for i in range(200000):
+        total += i * i % 7
+    return total
+
+
+def start_gemini_stub(text):
+    """常に text を生成結果として返すGemini APIのスタブ（別スレッド）を起動してURLを返す"""
+    payload = json.dumps({
+        'candidates': [{'content': {'parts': [{'text': text}]}, 'finishReason': 'STOP'}]
+    }, ensure_ascii=False).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1beta/models/stub:generateContent"
+
+
+def quiet(func):
+    """処理中のログ出力を捨てる"""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+
+def build_cases():
+    """(名前, 処理) の一覧"""
+    solar = AccurateSolarTermCalculator
+    lunar = AccurateLunarCalendar
+    sun = AccurateSunCalculator
+
+    generator = CalendarPostGenerator(DATE)
+    small_content = generator._generate_rich_fallback_content(
+        lunar.calculate_lunar_date(DATE), solar.get_current_sekki(DATE), solar.get_current_kou(DATE)
+    )
+    # 約1MBのGemini出力の代わり
+    large_content = small_content * max(1, (1024 * 1024) // len(small_content.encode('utf-8')))
+
+    # 投稿の生成はスタブのGemini APIを通す（応答キャッシュは無効）
+    os.environ['GEMINI_ENDPOINT'] = start_gemini_stub(small_content)
+    os.environ['GEMINI_API_KEY'] = 'bench'
+
+    def generate_posts(dates):
+        for date in dates:
+            CalendarPostGenerator(date).generate_post()
+
+    return [
+        ('solar_longitude.small', lambda: solar.calculate_solar_longitude(DATE)),
+        ('solar_longitude.large', lambda: solar.calculate_solar_longitudes(DATES)),
+        ('current_kou.small', lambda: solar.get_current_kou(DATE)),
+        ('current_kou.large', lambda: [solar.get_current_kou(d) for d in DATES]),
+        ('kou_array.large', lambda: solar.get_kou_array(DATES)),
+        ('lunar_date.small', lambda: lunar.calculate_lunar_date(DATE)),
+        ('lunar_date.large', lambda: [lunar.calculate_lunar_date(d) for d in DATES]),
+        ('sunrise_sunset.small', lambda: sun.calculate_sunrise_sunset(DATE)),
+        ('sunrise_sunset.large', lambda: [sun.calculate_sunrise_sunset(d) for d in DATES]),
+        ('sunrise_sunset_batch.large', lambda: sun.calculate_sunrise_sunset_batch(DATES, [sun.OKAYAMA])),
+        ('format_html.small', lambda: generator._format_gemini_content_to_html(small_content)),
+        ('format_html.large', lambda: generator._format_gemini_content_to_html(large_content)),
+        ('generate_post.small', quiet(lambda: generate_posts(DATES[:1]))),
+        ('generate_post.large', quiet(lambda: generate_posts(DATES[:POST_DAYS]))),
+    ]
+
+
+def measure(func, repeat):
+    """1回あたりの最短時間（秒）"""
+    func()  # キャッシュ・時刻表の準備
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.3f} μs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="天文計算・HTML生成のベンチマーク")
+    parser.add_argument('--repeat', type=int, default=5, help="計測回数（最短を採用、既定: 5）")
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help="基準値からの遅れの許容幅（1.0 なら2倍まで、既定: 1.0）")
+    parser.add_argument('--filter', default='', help="名前にこの文字列を含む処理だけを計測")
+    parser.add_argument('--save-baseline', action='store_true', help="計測結果を基準値として保存")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="基準値のファイル")
+    args = parser.parse_args()
+
+    cases = [(name, func) for name, func in build_cases() if args.filter in name]
+    calibration_time = measure(calibration, args.repeat)
+    results = {name: measure(func, args.repeat) for name, func in cases}
+
+    if args.save_baseline:
+        # 較正処理の時間に対する比で保存
+        baseline = {'reference': 'calibration', 'cases': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline['cases'] = json.load(f).get('cases', {})
+        baseline['cases'].update({name: seconds / calibration_time for name, seconds in results.items()})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        for name, seconds in results.items():
+            print(f"{name:28s} {format_seconds(seconds)}")
+        print(f"基準値を保存しました: {args.baseline}")
+        return
+
+    baseline = {'cases': {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    regressions = []
+    print(f"{'処理':28s} {'今回':>11s} {'基準値':>11s}  比")
+    for name, seconds in results.items():
+        relative = baseline['cases'].get(name)
+        if relative is None:
+            print(f"{name:28s} {format_seconds(seconds)} {'-':>11s}")
+            continue
+        # このマシンの較正処理の時間から基準値を求める
+        base = relative * calibration_time
+        ratio = seconds / base
+        mark = ''
+        if ratio > 1 + args.tolerance:
+            mark = ' ❌'
+            regressions.append(name)
+        print(f"{name:28s} {format_seconds(seconds)} {format_seconds(base)}  {ratio:5.2f}{mark}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)}件の処理が基準値より{args.tolerance:.0%}以上遅くなりました: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ 基準値からの遅れは許容範囲内です")
+
+
+if __name__ == '__main__':
+    main()
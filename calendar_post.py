@@ -8,27 +8,147 @@
 import os
 import json
 import sys
-from datetime import datetime
+import hashlib
+import argparse
+import threading
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 import math
-import requests
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import re
+import numpy as np
+
+# requests・Google APIクライアント・スレッドプールは重いので、使う処理の中で読み込む
+# （暦の計算やプレビューだけの実行では読み込まない）
 
 SCOPES = ['https://www.googleapis.com/auth/blogger']
 
+# 計算結果キャッシュの保存先
+CACHE_DIR = os.environ.get('CALENDAR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'calendar_post'))
+
 
 class AccurateSolarTermCalculator:
     """正確な太陽黄経計算による二十四節気・七十二候算出"""
     
+    # 二十四節気（太陽黄経, 名称, 読み, 説明）
+    SEKKI_DATA = (
+        (315, "立春", "りっしゅん", "春の始まり。暦の上では春ですが、まだ寒さが厳しい時期です"),
+        (330, "雨水", "うすい", "雪が雨に変わり、氷が解け始める頃。三寒四温で春に向かいます"),
+        (345, "啓蟄", "けいちつ", "冬眠していた虫が目覚める頃。春の訪れを実感できます"),
+        (0, "春分", "しゅんぶん", "昼夜の長さがほぼ等しくなる日。これから昼が長くなります"),
+        (15, "清明", "せいめい", "万物が清らかで生き生きとする頃。花が咲き誇る季節です"),
+        (30, "穀雨", "こくう", "穀物を潤す春の雨が降る頃。田植えの準備が始まります"),
+        (45, "立夏", "りっか", "夏の始まり。新緑が目に鮮やかな季節です"),
+        (60, "小満", "しょうまん", "草木が茂り、天地に気が満ち始める頃です"),
+        (75, "芒種", "ぼうしゅ", "麦を刈り、稲を植える農繁期。梅雨入りの時期です"),
+        (90, "夏至", "げし", "一年で最も昼が長い日。これから暑さが本格化します"),
+        (105, "小暑", "しょうしょ", "梅雨明け頃。本格的な暑さの始まりです"),
+        (120, "大暑", "たいしょ", "一年で最も暑い時期。夏真っ盛りです"),
+        (135, "立秋", "りっしゅう", "秋の始まり。暦の上では秋ですが、残暑が厳しい時期"),
+        (150, "処暑", "しょしょ", "暑さが峠を越える頃。朝夕が涼しくなり始めます"),
+        (165, "白露", "はくろ", "草木に白い露が宿り始める頃。秋の気配が濃くなります"),
+        (180, "秋分", "しゅうぶん", "昼夜の長さがほぼ等しい。秋彼岸の中日です"),
+        (195, "寒露", "かんろ", "露が冷たく感じられる頃。紅葉が始まります"),
+        (210, "霜降", "そうこう", "朝霜が降り始める頃。秋が深まります"),
+        (225, "立冬", "りっとう", "冬の始まり。暦の上では冬入りです"),
+        (240, "小雪", "しょうせつ", "わずかに雪が降り始める頃。冬の気配が強まります"),
+        (255, "大雪", "たいせつ", "雪が本格的に降り始める頃。山は雪化粧です"),
+        (270, "冬至", "とうじ", "一年で最も昼が短い日。これから日が長くなります"),
+        (285, "小寒", "しょうかん", "寒さが厳しくなり始める頃。寒の入りです"),
+        (300, "大寒", "だいかん", "一年で最も寒い時期。寒さの極みです"),
+    )
+
+    # 七十二候（二十四節気をさらに3等分、約5度ずつ）
+    KOU_DATA = (
+        (315, "東風解凍", "はるかぜこおりをとく", "春風が氷を解かし始める頃"),
+        (320, "黄鶯睍睆", "うぐいすなく", "鶯が山里で鳴き始める頃"),
+        (325, "魚上氷", "うおこおりをいずる", "割れた氷の間から魚が跳ねる頃"),
+        (330, "土脉潤起", "つちのしょううるおいおこる", "雨が降って土が湿り気を含む頃"),
+        (335, "霞始靆", "かすみはじめてたなびく", "霞がたなびき春景色が広がる頃"),
+        (340, "草木萌動", "そうもくめばえいずる", "草木が芽吹き始める頃"),
+        (345, "蟄虫啓戸", "すごもりむしとをひらく", "冬眠していた虫が出てくる頃"),
+        (350, "桃始笑", "ももはじめてさく", "桃の花が咲き始める頃"),
+        (355, "菜虫化蝶", "なむしちょうとなる", "青虫が蝶に羽化する頃"),
+        (0, "雀始巣", "すずめはじめてすくう", "雀が巣を作り始める頃"),
+        (5, "櫻始開", "さくらはじめてひらく", "桜が咲き始める頃"),
+        (10, "雷乃発声", "かみなりすなわちこえをはっす", "遠くで雷の音が聞こえ始める頃"),
+        (15, "玄鳥至", "つばめきたる", "燕が南から渡ってくる頃"),
+        (20, "鴻雁北", "こうがんかえる", "雁が北へ帰っていく頃"),
+        (25, "虹始見", "にじはじめてあらわる", "雨上がりに虹が出始める頃"),
+        (30, "葭始生", "あしはじめてしょうず", "葦が芽を吹き始める頃"),
+        (35, "霜止出苗", "しもやんでなえいず", "霜が降りなくなり苗が育つ頃"),
+        (40, "牡丹華", "ぼたんはなさく", "牡丹の花が咲く頃"),
+        (45, "蛙始鳴", "かわずはじめてなく", "蛙が鳴き始める頃"),
+        (50, "蚯蚓出", "みみずいずる", "蚯蚓が地上に這い出る頃"),
+        (55, "竹笋生", "たけのこしょうず", "筍が生えてくる頃"),
+        (60, "蚕起食桑", "かいこおきてくわをはむ", "蚕が桑の葉を食べ始める頃"),
+        (65, "紅花栄", "べにばなさかう", "紅花が盛んに咲く頃"),
+        (70, "麦秋至", "むぎのときいたる", "麦が熟し収穫期を迎える頃"),
+        (75, "蟷螂生", "かまきりしょうず", "蟷螂が生まれ出る頃"),
+        (80, "腐草為螢", "くされたるくさほたるとなる", "蛍が光を放ち始める頃"),
+        (85, "梅子黄", "うめのみきばむ", "梅の実が黄ばんで熟す頃"),
+        (90, "乃東枯", "なつかれくさかるる", "夏枯草が枯れる頃"),
+        (95, "菖蒲華", "あやめはなさく", "菖蒲の花が咲く頃"),
+        (100, "半夏生", "はんげしょうず", "烏柄杓が生える頃"),
+        (105, "温風至", "あつかぜいたる", "暑い風が吹いてくる頃"),
+        (110, "蓮始開", "はすはじめてひらく", "蓮の花が開き始める頃"),
+        (115, "鷹乃学習", "たかすなわちわざをならう", "鷹の幼鳥が飛び方を覚える頃"),
+        (120, "桐始結花", "きりはじめてはなをむすぶ", "桐の花が実を結ぶ頃"),
+        (125, "土潤溽暑", "つちうるおうてむしあつし", "土が湿って蒸し暑くなる頃"),
+        (130, "大雨時行", "たいうときどきふる", "時として大雨が降る頃"),
+        (135, "涼風至", "すずかぜいたる", "涼しい風が吹き始める頃"),
+        (140, "寒蝉鳴", "ひぐらしなく", "蜩が鳴き始める頃"),
+        (145, "蒙霧升降", "ふかききりまとう", "深い霧がまとわりつく頃"),
+        (150, "綿柎開", "わたのはなしべひらく", "綿の花のがくが開く頃"),
+        (155, "天地始粛", "てんちはじめてさむし", "天地の暑さが収まり始める頃"),
+        (160, "禾乃登", "こくものすなわちみのる", "稲が実る頃"),
+        (165, "草露白", "くさのつゆしろし", "草に降りた露が白く見える頃"),
+        (170, "鶺鴒鳴", "せきれいなく", "鶺鴒が鳴き始める頃"),
+        (175, "玄鳥去", "つばめさる", "燕が南へ帰っていく頃"),
+        (180, "雷乃収声", "かみなりすなわちこえをおさむ", "雷が鳴らなくなる頃"),
+        (185, "蟄虫坏戸", "むしかくれてとをふさぐ", "虫が土の中に隠れる頃"),
+        (190, "水始涸", "みずはじめてかるる", "田んぼの水を抜き始める頃"),
+        (195, "鴻雁来", "こうがんきたる", "雁が飛来する頃"),
+        (200, "菊花開", "きくのはなひらく", "菊の花が咲く頃"),
+        (205, "蟋蟀在戸", "きりぎりすとにあり", "蟋蟀が戸口で鳴く頃"),
+        (210, "霜始降", "しもはじめてふる", "霜が降り始める頃"),
+        (215, "霎時施", "こさめときどきふる", "小雨がしとしと降る頃"),
+        (220, "楓蔦黄", "もみじつたきばむ", "紅葉や蔦が黄葉する頃"),
+        (225, "山茶始開", "つばきはじめてひらく", "山茶花が咲き始める頃"),
+        (230, "地始凍", "ちはじめてこおる", "大地が凍り始める頃"),
+        (235, "金盞香", "きんせんかさく", "水仙の花が咲く頃"),
+        (240, "虹蔵不見", "にじかくれてみえず", "虹を見かけなくなる頃"),
+        (245, "朔風払葉", "きたかぜこのはをはらう", "北風が木の葉を払い落とす頃"),
+        (250, "橘始黄", "たちばなはじめてきばむ", "橘の実が黄色く色づく頃"),
+        (255, "閉塞成冬", "そらさむくふゆとなる", "天地の気が塞がり本格的な冬となる頃"),
+        (260, "熊蟄穴", "くまあなにこもる", "熊が冬眠のために穴に入る頃"),
+        (265, "鱖魚群", "さけのうおむらがる", "鮭が群がって川を上る頃"),
+        (270, "乃東生", "なつかれくさしょうず", "夏枯草が芽を出す頃"),
+        (275, "麋角解", "さわしかつのおつる", "大鹿が角を落とす頃"),
+        (280, "雪下出麦", "ゆきわたりてむぎのびる", "雪の下で麦が芽を出す頃"),
+        (285, "芹乃栄", "せりすなわちさかう", "芹が盛んに生え始める頃"),
+        (290, "水泉動", "しみずあたたかをふくむ", "地中で凍った泉が動き始める頃"),
+        (295, "雉始雊", "きじはじめてなく", "雉が鳴き始める頃"),
+        (300, "款冬華", "ふきのはなさく", "蕗の花が咲く頃"),
+        (305, "水沢腹堅", "さわみずこおりつめる", "沢の水が厚く凍る頃"),
+        (310, "鶏始乳", "にわとりはじめてとやにつく", "鶏が卵を産み始める頃"),
+    )
+    
+    # 節気・候の切り替わり時刻表の既定の対象期間（西暦年）
+    TRANSITION_START_YEAR = 2000
+    TRANSITION_END_YEAR = 2100
+    _transition_table = None
+    
     @staticmethod
     def calculate_solar_longitude(dt):
         """指定日時の太陽黄経を計算"""
         jst = ZoneInfo("Asia/Tokyo")
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=jst)
+        # ユリウス日は世界時で計算する
+        dt = dt.astimezone(ZoneInfo("UTC"))
         
         y = dt.year
         m = dt.month
@@ -61,243 +181,501 @@ class AccurateSolarTermCalculator:
             
         return lambda_sun
     
+    @staticmethod
+    def julian_day(dt):
+        """日時をユリウス日（世界時）に変換（タイムゾーンなしは日本時間とみなす）"""
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=ZoneInfo("Asia/Tokyo"))
+        return (dt - datetime(1970, 1, 1, tzinfo=ZoneInfo("UTC"))).total_seconds() / 86400 + 2440587.5
+    
+    @staticmethod
+    def datetime_from_julian_day(jd):
+        """ユリウス日を日本時間の日時に変換（julian_dayの逆変換）"""
+        utc = datetime(1970, 1, 1, tzinfo=ZoneInfo("UTC")) + timedelta(days=float(jd) - 2440587.5)
+        return utc.astimezone(ZoneInfo("Asia/Tokyo"))
+    
+    # 日本で夏時間（UTC+10）が実施された期間を含む範囲（表示時刻）。この範囲だけはタイムゾーンで時差を求める
+    DST_WALL_RANGE = (np.datetime64('1948-01-01', 'us'), np.datetime64('1952-01-01', 'us'))
+    
     @classmethod
-    def get_current_sekki(cls, date):
-        """現在の二十四節気を取得"""
-        sekki_data = [
-            (315, "立春", "りっしゅん", "春の始まり。暦の上では春ですが、まだ寒さが厳しい時期です"),
-            (330, "雨水", "うすい", "雪が雨に変わり、氷が解け始める頃。三寒四温で春に向かいます"),
-            (345, "啓蟄", "けいちつ", "冬眠していた虫が目覚める頃。春の訪れを実感できます"),
-            (0, "春分", "しゅんぶん", "昼夜の長さがほぼ等しくなる日。これから昼が長くなります"),
-            (15, "清明", "せいめい", "万物が清らかで生き生きとする頃。花が咲き誇る季節です"),
-            (30, "穀雨", "こくう", "穀物を潤す春の雨が降る頃。田植えの準備が始まります"),
-            (45, "立夏", "りっか", "夏の始まり。新緑が目に鮮やかな季節です"),
-            (60, "小満", "しょうまん", "草木が茂り、天地に気が満ち始める頃です"),
-            (75, "芒種", "ぼうしゅ", "麦を刈り、稲を植える農繁期。梅雨入りの時期です"),
-            (90, "夏至", "げし", "一年で最も昼が長い日。これから暑さが本格化します"),
-            (105, "小暑", "しょうしょ", "梅雨明け頃。本格的な暑さの始まりです"),
-            (120, "大暑", "たいしょ", "一年で最も暑い時期。夏真っ盛りです"),
-            (135, "立秋", "りっしゅう", "秋の始まり。暦の上では秋ですが、残暑が厳しい時期"),
-            (150, "処暑", "しょしょ", "暑さが峠を越える頃。朝夕が涼しくなり始めます"),
-            (165, "白露", "はくろ", "草木に白い露が宿り始める頃。秋の気配が濃くなります"),
-            (180, "秋分", "しゅうぶん", "昼夜の長さがほぼ等しい。秋彼岸の中日です"),
-            (195, "寒露", "かんろ", "露が冷たく感じられる頃。紅葉が始まります"),
-            (210, "霜降", "そうこう", "朝霜が降り始める頃。秋が深まります"),
-            (225, "立冬", "りっとう", "冬の始まり。暦の上では冬入りです"),
-            (240, "小雪", "しょうせつ", "わずかに雪が降り始める頃。冬の気配が強まります"),
-            (255, "大雪", "たいせつ", "雪が本格的に降り始める頃。山は雪化粧です"),
-            (270, "冬至", "とうじ", "一年で最も昼が短い日。これから日が長くなります"),
-            (285, "小寒", "しょうかん", "寒さが厳しくなり始める頃。寒の入りです"),
-            (300, "大寒", "だいかん", "一年で最も寒い時期。寒さの極みです")
-        ]
+    def to_julian_days(cls, dates):
+        """日時の配列をユリウス日の配列に変換（datetime64配列は日本時間の表示時刻とみなす）
+
+        時差は julian_day と同じく Asia/Tokyo のタイムゾーンに従う（1948〜1951年の夏時間を含む）。
+        """
+        jst = ZoneInfo("Asia/Tokyo")
+        if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+            wall = dates.astype('datetime64[us]')
+        else:
+            wall = np.array(
+                [dt.astimezone(jst).replace(tzinfo=None) if dt.tzinfo else dt for dt in dates],
+                dtype='datetime64[us]'
+            )
         
-        longitude = cls.calculate_solar_longitude(date)
-        current_sekki = sekki_data[0]
+        # 日本時間（通常はUTC+9）から世界時のユリウス日へ
+        offset = np.full(wall.shape, 9 * 3600, dtype=np.float64)
+        in_dst_range = (wall >= cls.DST_WALL_RANGE[0]) & (wall < cls.DST_WALL_RANGE[1])
+        if in_dst_range.any():
+            for index in zip(*np.nonzero(in_dst_range)):
+                offset[index] = wall[index].item().replace(tzinfo=jst).utcoffset().total_seconds()
+        seconds = (wall - np.datetime64('1970-01-01T00:00:00', 'us')) / np.timedelta64(1, 's')
+        return (seconds - offset) / 86400 + 2440587.5
+    
+    @staticmethod
+    def solar_longitude_from_julian_days(jd):
+        """ユリウス日の配列から太陽黄経を一括計算（calculate_solar_longitudeのベクトル版）"""
+        T = (np.asarray(jd, dtype=np.float64) - 2451545.0) / 36525.0
         
-        for i in range(len(sekki_data)):
-            deg, name, reading, desc = sekki_data[i]
-            next_deg = sekki_data[(i + 1) % len(sekki_data)][0]
-            
-            if deg <= next_deg:
-                if deg <= longitude < next_deg:
-                    current_sekki = (name, reading, desc)
-                    break
-            else:
-                if longitude >= deg or longitude < next_deg:
-                    current_sekki = (name, reading, desc)
-                    break
+        L0 = 280.46646 + 36000.76983 * T + 0.0003032 * T * T
+        M = 357.52911 + 35999.05029 * T - 0.0001537 * T * T
+        M_rad = np.radians(M)
+        
+        C = (1.914602 - 0.004817 * T - 0.000014 * T * T) * np.sin(M_rad)
+        C += (0.019993 - 0.000101 * T) * np.sin(2 * M_rad)
+        C += 0.000289 * np.sin(3 * M_rad)
+        
+        true_longitude = L0 + C
+        omega = 125.04 - 1934.136 * T
+        lambda_sun = true_longitude - 0.00569 - 0.00478 * np.sin(np.radians(omega))
+        
+        return np.mod(lambda_sun, 360)
+    
+    @classmethod
+    def calculate_solar_longitudes(cls, dates):
+        """複数日時の太陽黄経を一括計算（datetimeのリストまたはdatetime64配列）"""
+        return cls.solar_longitude_from_julian_days(cls.to_julian_days(dates))
+    
+    @classmethod
+    def calculate_solar_longitude_range(cls, start, end, step_days=1):
+        """start以上end未満の期間をstep_days刻みで一括計算し、(datetime64配列（日本時間）, 太陽黄経配列)を返す"""
+        jst = ZoneInfo("Asia/Tokyo")
+        step = np.timedelta64(int(round(step_days * 86400 * 1_000_000)), 'us')
+        dates = np.arange(
+            np.datetime64((start.astimezone(jst) if start.tzinfo else start).replace(tzinfo=None), 'us'),
+            np.datetime64((end.astimezone(jst) if end.tzinfo else end).replace(tzinfo=None), 'us'),
+            step
+        )
+        return dates, cls.calculate_solar_longitudes(dates)
+    
+    @classmethod
+    def solve_longitude_crossings(cls, target_degrees, jd_guess, tolerance=1e-8, max_iterations=20):
+        """太陽黄経が目標角度に達するユリウス日をニュートン法で一括求解"""
+        target = np.asarray(target_degrees, dtype=np.float64)
+        jd = np.array(jd_guess, dtype=np.float64)
+        h = 1e-4
+        
+        for _ in range(max_iterations):
+            longitude = cls.solar_longitude_from_julian_days(jd)
+            diff = np.mod(longitude - target + 180, 360) - 180
+            rate = np.mod(cls.solar_longitude_from_julian_days(jd + h) - longitude + 180, 360) - 180
+            step = diff * h / rate
+            jd = jd - step
+            if np.max(np.abs(step), initial=0.0) < tolerance:
+                break
+        
+        return jd
+    
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def find_solar_term(cls, year, degree):
+        """指定年（日本時間）に太陽黄経がdegree度に達する時刻を分単位で求める
+
+        例: find_solar_term(2027, 315) -> 2027年の立春の開始時刻
+        年末年始をまたぐ280度付近では、その年に該当時刻がなければNoneを返す
+        """
+        degree = degree % 360
+        year_start = cls.julian_day(datetime(year, 1, 1))
+        year_end = cls.julian_day(datetime(year + 1, 1, 1))
+        
+        # 春分（3月20日頃）を起点に平均運動で初期値を見積もる
+        tropical_year = 365.2422
+        guess = cls.julian_day(datetime(year, 3, 20)) + degree / 360 * tropical_year
+        if guess >= year_end:
+            guess -= tropical_year
+        
+        jd = float(cls.solve_longitude_crossings(degree, guess))
+        if jd >= year_end:
+            jd = float(cls.solve_longitude_crossings(degree, jd - tropical_year))
+        elif jd < year_start:
+            jd = float(cls.solve_longitude_crossings(degree, jd + tropical_year))
+        if not year_start <= jd < year_end:
+            return None
         
-        return current_sekki
+        instant = cls.datetime_from_julian_day(jd) + timedelta(seconds=30)
+        return instant.replace(second=0, microsecond=0)
+    
+    @classmethod
+    def get_sekki_dates(cls, year):
+        """指定年の二十四節気の開始時刻一覧（時刻順）"""
+        terms = [
+            {'name': name, 'reading': reading, 'start': cls.find_solar_term(year, deg)}
+            for deg, name, reading, _ in cls.SEKKI_DATA
+        ]
+        return sorted(terms, key=lambda term: term['start'])
+    
+    @classmethod
+    def sekki_indices(cls, longitudes):
+        """太陽黄経の配列をSEKKI_DATAのインデックス配列に変換"""
+        offset = np.mod(np.asarray(longitudes) - cls.SEKKI_DATA[0][0], 360)
+        return (offset // 15).astype(np.intp) % len(cls.SEKKI_DATA)
+    
+    @classmethod
+    def kou_indices(cls, longitudes):
+        """太陽黄経の配列をKOU_DATAのインデックス配列に変換"""
+        offset = np.mod(np.asarray(longitudes) - cls.KOU_DATA[0][0], 360)
+        return (offset // 5).astype(np.intp) % len(cls.KOU_DATA)
+    
+    @classmethod
+    def configure_transition_table(cls, start_year, end_year, cache_dir=CACHE_DIR):
+        """切り替わり時刻表の対象期間を設定して読み込む（キャッシュがなければ計算して保存）"""
+        cls._transition_table = SolarTermTransitionTable.load_or_build(start_year, end_year, cache_dir)
+        return cls._transition_table
+    
+    @classmethod
+    def get_transition_table(cls):
+        """切り替わり時刻表を取得（未読み込みなら既定の期間で準備）"""
+        if cls._transition_table is None:
+            cls.configure_transition_table(cls.TRANSITION_START_YEAR, cls.TRANSITION_END_YEAR)
+        return cls._transition_table
+    
+    @classmethod
+    def _kou_index(cls, date):
+        """指定日時の候のKOU_DATAインデックスを取得（時刻表の期間外は直接計算）"""
+        index = cls.get_transition_table().kou_index_at(cls.julian_day(date))
+        if index is None:
+            index = int(cls.kou_indices(cls.calculate_solar_longitude(date)))
+        return index
+    
+    @classmethod
+    def get_current_sekki(cls, date):
+        """現在の二十四節気を取得"""
+        return cls.SEKKI_DATA[cls._kou_index(date) // 3][1:]
     
     @classmethod
     def get_current_kou(cls, date):
         """現在の七十二候を取得（太陽黄経ベース）"""
-        # 七十二候は二十四節気をさらに3等分（約5度ずつ）
-        kou_data = [
-            # 太陽黄経, 名称, 読み, 説明
-            (315, "東風解凍", "はるかぜこおりをとく", "春風が氷を解かし始める頃"),
-            (320, "黄鶯睍睆", "うぐいすなく", "鶯が山里で鳴き始める頃"),
-            (325, "魚上氷", "うおこおりをいずる", "割れた氷の間から魚が跳ねる頃"),
-            (330, "土脉潤起", "つちのしょううるおいおこる", "雨が降って土が湿り気を含む頃"),
-            (335, "霞始靆", "かすみはじめてたなびく", "霞がたなびき春景色が広がる頃"),
-            (340, "草木萌動", "そうもくめばえいずる", "草木が芽吹き始める頃"),
-            (345, "蟄虫啓戸", "すごもりむしとをひらく", "冬眠していた虫が出てくる頃"),
-            (350, "桃始笑", "ももはじめてさく", "桃の花が咲き始める頃"),
-            (355, "菜虫化蝶", "なむしちょうとなる", "青虫が蝶に羽化する頃"),
-            (0, "雀始巣", "すずめはじめてすくう", "雀が巣を作り始める頃"),
-            (5, "櫻始開", "さくらはじめてひらく", "桜が咲き始める頃"),
-            (10, "雷乃発声", "かみなりすなわちこえをはっす", "遠くで雷の音が聞こえ始める頃"),
-            (15, "玄鳥至", "つばめきたる", "燕が南から渡ってくる頃"),
-            (20, "鴻雁北", "こうがんかえる", "雁が北へ帰っていく頃"),
-            (25, "虹始見", "にじはじめてあらわる", "雨上がりに虹が出始める頃"),
-            (30, "葭始生", "あしはじめてしょうず", "葦が芽を吹き始める頃"),
-            (35, "霜止出苗", "しもやんでなえいず", "霜が降りなくなり苗が育つ頃"),
-            (40, "牡丹華", "ぼたんはなさく", "牡丹の花が咲く頃"),
-            (45, "蛙始鳴", "かわずはじめてなく", "蛙が鳴き始める頃"),
-            (50, "蚯蚓出", "みみずいずる", "蚯蚓が地上に這い出る頃"),
-            (55, "竹笋生", "たけのこしょうず", "筍が生えてくる頃"),
-            (60, "蚕起食桑", "かいこおきてくわをはむ", "蚕が桑の葉を食べ始める頃"),
-            (65, "紅花栄", "べにばなさかう", "紅花が盛んに咲く頃"),
-            (70, "麦秋至", "むぎのときいたる", "麦が熟し収穫期を迎える頃"),
-            (75, "蟷螂生", "かまきりしょうず", "蟷螂が生まれ出る頃"),
-            (80, "腐草為螢", "くされたるくさほたるとなる", "蛍が光を放ち始める頃"),
-            (85, "梅子黄", "うめのみきばむ", "梅の実が黄ばんで熟す頃"),
-            (90, "乃東枯", "なつかれくさかるる", "夏枯草が枯れる頃"),
-            (95, "菖蒲華", "あやめはなさく", "菖蒲の花が咲く頃"),
-            (100, "半夏生", "はんげしょうず", "烏柄杓が生える頃"),
-            (105, "温風至", "あつかぜいたる", "暑い風が吹いてくる頃"),
-            (110, "蓮始開", "はすはじめてひらく", "蓮の花が開き始める頃"),
-            (115, "鷹乃学習", "たかすなわちわざをならう", "鷹の幼鳥が飛び方を覚える頃"),
-            (120, "桐始結花", "きりはじめてはなをむすぶ", "桐の花が実を結ぶ頃"),
-            (125, "土潤溽暑", "つちうるおうてむしあつし", "土が湿って蒸し暑くなる頃"),
-            (130, "大雨時行", "たいうときどきふる", "時として大雨が降る頃"),
-            (135, "涼風至", "すずかぜいたる", "涼しい風が吹き始める頃"),
-            (140, "寒蝉鳴", "ひぐらしなく", "蜩が鳴き始める頃"),
-            (145, "蒙霧升降", "ふかききりまとう", "深い霧がまとわりつく頃"),
-            (150, "綿柎開", "わたのはなしべひらく", "綿の花のがくが開く頃"),
-            (155, "天地始粛", "てんちはじめてさむし", "天地の暑さが収まり始める頃"),
-            (160, "禾乃登", "こくものすなわちみのる", "稲が実る頃"),
-            (165, "草露白", "くさのつゆしろし", "草に降りた露が白く見える頃"),
-            (170, "鶺鴒鳴", "せきれいなく", "鶺鴒が鳴き始める頃"),
-            (175, "玄鳥去", "つばめさる", "燕が南へ帰っていく頃"),
-            (180, "雷乃収声", "かみなりすなわちこえをおさむ", "雷が鳴らなくなる頃"),
-            (185, "蟄虫坏戸", "むしかくれてとをふさぐ", "虫が土の中に隠れる頃"),
-            (190, "水始涸", "みずはじめてかるる", "田んぼの水を抜き始める頃"),
-            (195, "鴻雁来", "こうがんきたる", "雁が飛来する頃"),
-            (200, "菊花開", "きくのはなひらく", "菊の花が咲く頃"),
-            (205, "蟋蟀在戸", "きりぎりすとにあり", "蟋蟀が戸口で鳴く頃"),
-            (210, "霜始降", "しもはじめてふる", "霜が降り始める頃"),
-            (215, "霎時施", "こさめときどきふる", "小雨がしとしと降る頃"),
-            (220, "楓蔦黄", "もみじつたきばむ", "紅葉や蔦が黄葉する頃"),
-            (225, "山茶始開", "つばきはじめてひらく", "山茶花が咲き始める頃"),
-            (230, "地始凍", "ちはじめてこおる", "大地が凍り始める頃"),
-            (235, "金盞香", "きんせんかさく", "水仙の花が咲く頃"),
-            (240, "虹蔵不見", "にじかくれてみえず", "虹を見かけなくなる頃"),
-            (245, "朔風払葉", "きたかぜこのはをはらう", "北風が木の葉を払い落とす頃"),
-            (250, "橘始黄", "たちばなはじめてきばむ", "橘の実が黄色く色づく頃"),
-            (255, "閉塞成冬", "そらさむくふゆとなる", "天地の気が塞がり本格的な冬となる頃"),
-            (260, "熊蟄穴", "くまあなにこもる", "熊が冬眠のために穴に入る頃"),
-            (265, "鱖魚群", "さけのうおむらがる", "鮭が群がって川を上る頃"),
-            (270, "乃東生", "なつかれくさしょうず", "夏枯草が芽を出す頃"),
-            (275, "麋角解", "さわしかつのおつる", "大鹿が角を落とす頃"),
-            (280, "雪下出麦", "ゆきわたりてむぎのびる", "雪の下で麦が芽を出す頃"),
-            (285, "芹乃栄", "せりすなわちさかう", "芹が盛んに生え始める頃"),
-            (290, "水泉動", "しみずあたたかをふくむ", "地中で凍った泉が動き始める頃"),
-            (295, "雉始雊", "きじはじめてなく", "雉が鳴き始める頃"),
-            (300, "款冬華", "ふきのはなさく", "蕗の花が咲く頃"),
-            (305, "水沢腹堅", "さわみずこおりつめる", "沢の水が厚く凍る頃"),
-            (310, "鶏始乳", "にわとりはじめてとやにつく", "鶏が卵を産み始める頃"),
-        ]
+        return cls.KOU_DATA[cls._kou_index(date)][1:]
+    
+    @classmethod
+    def get_sekki_period(cls, date):
+        """現在の二十四節気と、その開始・終了時刻を取得"""
+        index, start, end = cls.get_transition_table().period_at(cls.julian_day(date), step=3)
+        if index is None:
+            index = int(cls.sekki_indices(cls.calculate_solar_longitude(date)))
+        name, reading, desc = cls.SEKKI_DATA[index][1:]
+        return {'name': name, 'reading': reading, 'description': desc, 'start': start, 'end': end}
+    
+    @classmethod
+    def get_kou_period(cls, date):
+        """現在の七十二候と、その開始・終了時刻を取得"""
+        index, start, end = cls.get_transition_table().period_at(cls.julian_day(date))
+        if index is None:
+            index = int(cls.kou_indices(cls.calculate_solar_longitude(date)))
+        name, reading, desc = cls.KOU_DATA[index][1:]
+        return {'name': name, 'reading': reading, 'description': desc, 'start': start, 'end': end}
+    
+    @classmethod
+    def get_sekki_array(cls, dates):
+        """複数日時の二十四節気を一括取得（get_current_sekkiの配列版）"""
+        indices = cls.sekki_indices(cls.calculate_solar_longitudes(dates))
+        return [cls.SEKKI_DATA[i][1:] for i in indices.tolist()]
+    
+    @classmethod
+    def get_kou_array(cls, dates):
+        """複数日時の七十二候を一括取得（get_current_kouの配列版）"""
+        indices = cls.kou_indices(cls.calculate_solar_longitudes(dates))
+        return [cls.KOU_DATA[i][1:] for i in indices.tolist()]
+
+
+class SolarTermTransitionTable:
+    """七十二候（および二十四節気）の切り替わり時刻表（二分探索で検索）"""
+    
+    VERSION = 2
+    
+    def __init__(self, start_year, end_year, julian_days, kou_indices):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.julian_days = julian_days
+        self.kou_indices = kou_indices
+    
+    @classmethod
+    def build(cls, start_year, end_year):
+        """日単位の一括計算で切り替わりを検出し、ニュートン法で正確な時刻を求める"""
+        calc = AccurateSolarTermCalculator
+        # 期間の最初の候の開始時刻も含めるため前後に余裕を持たせる
+        dates, longitudes = calc.calculate_solar_longitude_range(
+            datetime(start_year, 1, 1) - timedelta(days=10),
+            datetime(end_year + 1, 1, 1) + timedelta(days=10)
+        )
+        jd = calc.to_julian_days(dates)
+        indices = calc.kou_indices(longitudes)
         
-        longitude = cls.calculate_solar_longitude(date)
+        changed = np.nonzero(indices[1:] != indices[:-1])[0]
+        new_indices = indices[changed + 1]
+        targets = np.array([calc.KOU_DATA[i][0] for i in new_indices.tolist()], dtype=np.float64)
+        crossings = calc.solve_longitude_crossings(targets, jd[changed] + 0.5)
         
-        # 現在の候を特定
-        current_kou = kou_data[0]
-        for i in range(len(kou_data)):
-            deg, name, reading, desc = kou_data[i]
-            next_deg = kou_data[(i + 1) % len(kou_data)][0]
-            
-            if deg <= next_deg:
-                if deg <= longitude < next_deg:
-                    current_kou = (name, reading, desc)
-                    break
-            else:
-                if longitude >= deg or longitude < next_deg:
-                    current_kou = (name, reading, desc)
-                    break
+        return cls(start_year, end_year, crossings.tolist(), new_indices.tolist())
+    
+    @staticmethod
+    def cache_path(start_year, end_year, cache_dir):
+        """キャッシュファイルのパス"""
+        return os.path.join(cache_dir, f"solar_term_transitions_{start_year}_{end_year}.json")
+    
+    @classmethod
+    def load_or_build(cls, start_year, end_year, cache_dir=CACHE_DIR):
+        """ディスクキャッシュから読み込み、なければ計算して保存"""
+        path = cls.cache_path(start_year, end_year, cache_dir) if cache_dir else None
+        
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == cls.VERSION:
+                    return cls(start_year, end_year, data['julian_days'], data['kou_indices'])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"切り替わり時刻表キャッシュの読み込みに失敗: {str(e)}")
+        
+        table = cls.build(start_year, end_year)
+        
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'version': cls.VERSION,
+                        'julian_days': table.julian_days,
+                        'kou_indices': table.kou_indices
+                    }, f)
+            except OSError as e:
+                print(f"切り替わり時刻表キャッシュの保存に失敗: {str(e)}")
         
-        return current_kou
+        return table
+    
+    def kou_index_at(self, jd):
+        """指定ユリウス日の候のインデックス（期間外はNone）"""
+        pos = bisect_right(self.julian_days, jd) - 1
+        if pos < 0 or pos >= len(self.julian_days) - 1:
+            return None
+        return self.kou_indices[pos]
+    
+    def period_at(self, jd, step=1):
+        """指定ユリウス日を含む期間の(インデックス, 開始時刻, 終了時刻)を返す
+
+        step=1なら七十二候、step=3なら二十四節気の期間（期間外は(None, None, None)）
+        """
+        pos = bisect_right(self.julian_days, jd) - 1
+        if pos < 0 or pos >= len(self.julian_days) - 1:
+            return None, None, None
+        
+        start = pos
+        while start >= 0 and self.kou_indices[start] % step:
+            start -= 1
+        end = pos + 1
+        while end < len(self.julian_days) and self.kou_indices[end] % step:
+            end += 1
+        if start < 0 or end >= len(self.julian_days):
+            return None, None, None
+        
+        to_datetime = AccurateSolarTermCalculator.datetime_from_julian_day
+        return (
+            self.kou_indices[start] // step,
+            to_datetime(self.julian_days[start]),
+            to_datetime(self.julian_days[end])
+        )
 
 
 class AccurateLunarCalendar:
-    """正確な旧暦計算"""
+    """正確な旧暦計算（朔の瞬間と中気から月の始まり・閏月を決定）"""
+    
+    SYNODIC_MONTH = 29.530588861
+    
+    PHASE_DATA = (
+        (1.5, "新月", "夜空に月は見えません"),
+        (3.7, "二日月", "夕方の西空に細い月が輝きます"),
+        (7.4, "上弦へ向かう月", "夕方の空に弓なりの月"),
+        (11, "上弦の月", "宵の空に半月が見えます"),
+        (14.8, "満月へ向かう月", "宵から夜半にかけて膨らむ月"),
+        (16.3, "満月", "夜通し輝く丸い月"),
+        (22.1, "下弦へ向かう月", "夜半から明け方に欠けていく月"),
+        (25.9, "下弦の月", "明け方に半月が見えます"),
+        (30, "晦日月", "明け方の東空に細い月")
+    )
+    
+    LUNAR_MONTH_NAMES = {
+        1: "睦月", 2: "如月", 3: "弥生", 4: "卯月", 5: "皐月", 6: "水無月",
+        7: "文月", 8: "葉月", 9: "長月", 10: "神無月", 11: "霜月", 12: "師走"
+    }
+    
+    ROKUYOU_LIST = ("大安", "赤口", "先勝", "友引", "先負", "仏滅")
+    
+    @staticmethod
+    def new_moons(k):
+        """朔の瞬間のユリウス日を一括計算（Meeusの式、kは2000年1月6日の朔を0とする通し番号）"""
+        k = np.asarray(k, dtype=np.float64)
+        T = k / 1236.85
+        
+        jde = (2451550.09766 + 29.530588861 * k + 0.00015437 * T**2
+               - 0.000000150 * T**3 + 0.00000000073 * T**4)
+        E = 1 - 0.002516 * T - 0.0000074 * T**2
+        M = np.radians(2.5534 + 29.10535670 * k - 0.0000014 * T**2 - 0.00000011 * T**3)
+        Mp = np.radians(201.5643 + 385.81693528 * k + 0.0107582 * T**2
+                        + 0.00001238 * T**3 - 0.000000058 * T**4)
+        F = np.radians(160.7108 + 390.67050284 * k - 0.0016118 * T**2
+                       - 0.00000227 * T**3 + 0.000000011 * T**4)
+        omega = np.radians(124.7746 - 1.56375588 * k + 0.0020672 * T**2 + 0.00000215 * T**3)
+        
+        # 周期項
+        jde += (-0.40720 * np.sin(Mp)
+                + 0.17241 * E * np.sin(M)
+                + 0.01608 * np.sin(2 * Mp)
+                + 0.01039 * np.sin(2 * F)
+                + 0.00739 * E * np.sin(Mp - M)
+                - 0.00514 * E * np.sin(Mp + M)
+                + 0.00208 * E * E * np.sin(2 * M)
+                - 0.00111 * np.sin(Mp - 2 * F)
+                - 0.00057 * np.sin(Mp + 2 * F)
+                + 0.00056 * E * np.sin(2 * Mp + M)
+                - 0.00042 * np.sin(3 * Mp)
+                + 0.00042 * E * np.sin(M + 2 * F)
+                + 0.00038 * E * np.sin(M - 2 * F)
+                - 0.00024 * E * np.sin(2 * Mp - M)
+                - 0.00017 * np.sin(omega)
+                - 0.00007 * np.sin(Mp + 2 * M)
+                + 0.00004 * np.sin(2 * Mp - 2 * F)
+                + 0.00004 * np.sin(3 * M)
+                + 0.00003 * np.sin(Mp + M - 2 * F)
+                + 0.00003 * np.sin(2 * Mp + 2 * F)
+                - 0.00003 * np.sin(Mp + M + 2 * F)
+                + 0.00003 * np.sin(Mp - M + 2 * F)
+                - 0.00002 * np.sin(Mp - M - 2 * F)
+                - 0.00002 * np.sin(3 * Mp + M)
+                + 0.00002 * np.sin(4 * Mp))
+        
+        # 惑星による補正項
+        planetary = (
+            (0.000325, 299.77, 0.107408), (0.000165, 251.88, 0.016321),
+            (0.000164, 251.83, 26.651886), (0.000126, 349.42, 36.412478),
+            (0.000110, 84.66, 18.206239), (0.000062, 141.74, 53.303771),
+            (0.000060, 207.14, 2.453732), (0.000056, 154.84, 7.306860),
+            (0.000047, 34.52, 27.261239), (0.000042, 207.19, 0.121824),
+            (0.000040, 291.34, 1.844379), (0.000037, 161.72, 24.198154),
+            (0.000035, 239.56, 25.513099), (0.000023, 331.55, 3.592518)
+        )
+        for i, (coefficient, base, rate) in enumerate(planetary):
+            angle = base + rate * k
+            if i == 0:
+                angle = angle - 0.009173 * T**2
+            jde += coefficient * np.sin(np.radians(angle))
+        
+        return jde
     
     @staticmethod
-    def calculate_lunar_date(date):
+    def _jst_day_number(jd):
+        """ユリウス日（世界時）を日本時間の暦日の通し番号に変換"""
+        return np.floor(np.asarray(jd) + 0.5 + 9 / 24).astype(np.int64)
+    
+    @classmethod
+    @lru_cache(maxsize=64)
+    def get_year_table(cls, year):
+        """year年の冬至を含む月の前までの月表を取得（前年冬至の月から計算し、直近64年分をキャッシュ）
+
+        Returns:
+            {'starts': 各月1日の暦日番号（末尾に次の11月の開始を含む）,
+             'new_moons': 各月の朔のユリウス日, 'months': 月番号, 'leaps': 閏月フラグ,
+             'years': 旧暦の年}
+        """
+        solar = AccurateSolarTermCalculator
+        
+        # 前年の冬至から今年の冬至までの中気（太陽黄経30度ごと）
+        steps = np.arange(13)
+        guesses = solar.julian_day(datetime(year - 1, 12, 21, 12)) + steps * 365.2422 / 12
+        chuki = solar.solve_longitude_crossings(np.mod(270 + 30 * steps, 360), guesses)
+        chuki_days = cls._jst_day_number(chuki)
+        
+        # 冬至の前後を含む朔の一覧
+        k0 = np.floor((chuki[0] - 2451550.09766) / cls.SYNODIC_MONTH) - 1
+        moons = cls.new_moons(k0 + np.arange(17))
+        moon_days = cls._jst_day_number(moons)
+        
+        # 冬至を含む月（11月）の始まりの朔
+        first = int(np.nonzero(moon_days <= chuki_days[0])[0][-1])
+        last = int(np.nonzero(moon_days <= chuki_days[-1])[0][-1])
+        starts = moon_days[first:last + 1].tolist()
+        moons = moons[first:last].tolist()
+        
+        # 13か月ある年は、最初の中気を含まない月を閏月とする
+        leap_index = None
+        if len(moons) == 13:
+            for i in range(1, 13):
+                if not np.any((chuki_days >= starts[i]) & (chuki_days < starts[i + 1])):
+                    leap_index = i
+                    break
+        
+        months, leaps, years = [], [], []
+        month = 10
+        for i in range(len(moons)):
+            leap = i == leap_index
+            if not leap:
+                month = month % 12 + 1
+            months.append(month)
+            leaps.append(leap)
+            years.append(year - 1 if month >= 11 and i < 3 else year)
+        
+        return {'starts': starts, 'new_moons': moons, 'months': months, 'leaps': leaps, 'years': years}
+    
+    @classmethod
+    def calculate_lunar_date(cls, date):
         """旧暦を計算"""
-        reference = datetime(2025, 12, 10, 12, 0, tzinfo=ZoneInfo("Asia/Tokyo"))
-        reference_lunar_year, reference_lunar_month, reference_lunar_day = 2025, 10, 21
-        reference_moon_age, synodic = 19.8, 29.530588861
+        jd = AccurateSolarTermCalculator.julian_day(date)
+        day_number = int(cls._jst_day_number(jd))
         
-        elapsed_days = (date - reference).total_seconds() / 86400
-        moon_age = (reference_moon_age + elapsed_days) % synodic
-        if moon_age < 0:
-            moon_age += synodic
+        # 年末の冬至の月以降は翌年の月表に含まれる
+        year = AccurateSolarTermCalculator.datetime_from_julian_day(jd).year
+        table = cls.get_year_table(year)
+        if day_number >= table['starts'][-1]:
+            table = cls.get_year_table(year + 1)
         
-        elapsed_months = int((reference_moon_age + elapsed_days) / synodic)
-        lunar_year, lunar_month, lunar_day = reference_lunar_year, reference_lunar_month, reference_lunar_day
+        index = bisect_right(table['starts'], day_number) - 1
+        lunar_year = table['years'][index]
+        lunar_month = table['months'][index]
+        lunar_day = day_number - table['starts'][index] + 1
         
-        for _ in range(abs(elapsed_months)):
-            if elapsed_months > 0:
-                lunar_month += 1
-                if lunar_month > 12:
-                    lunar_month, lunar_year = 1, lunar_year + 1
-            else:
-                lunar_month -= 1
-                if lunar_month < 1:
-                    lunar_month, lunar_year = 12, lunar_year - 1
-        
-        days_in_current_month = elapsed_days - (elapsed_months * synodic)
-        lunar_day = reference_lunar_day + int(days_in_current_month)
-        
-        while lunar_day > 30:
-            lunar_day -= 30
-            lunar_month += 1
-            if lunar_month > 12:
-                lunar_month, lunar_year = 1, lunar_year + 1
-        
-        while lunar_day < 1:
-            lunar_day += 30
-            lunar_month -= 1
-            if lunar_month < 1:
-                lunar_month, lunar_year = 12, lunar_year - 1
-        
-        phase_data = [
-            (1.5, "新月", "夜空に月は見えません"),
-            (3.7, "二日月", "夕方の西空に細い月が輝きます"),
-            (7.4, "上弦へ向かう月", "夕方の空に弓なりの月"),
-            (11, "上弦の月", "宵の空に半月が見えます"),
-            (14.8, "満月へ向かう月", "宵から夜半にかけて膨らむ月"),
-            (16.3, "満月", "夜通し輝く丸い月"),
-            (22.1, "下弦へ向かう月", "夜半から明け方に欠けていく月"),
-            (25.9, "下弦の月", "明け方に半月が見えます"),
-            (30, "晦日月", "明け方の東空に細い月")
-        ]
+        moon_age = jd - table['new_moons'][index]
+        if moon_age < 0:
+            # 朔の日の朔より前の時刻
+            moon_age += cls.SYNODIC_MONTH
         
         phase, appearance = "晦日月", "明け方の東空に細い月"
-        for threshold, p, a in phase_data:
+        for threshold, p, a in cls.PHASE_DATA:
             if moon_age < threshold:
                 phase, appearance = p, a
                 break
         
-        lunar_month_names = {
-            1: "睦月", 2: "如月", 3: "弥生", 4: "卯月", 5: "皐月", 6: "水無月",
-            7: "文月", 8: "葉月", 9: "長月", 10: "神無月", 11: "霜月", 12: "師走"
-        }
-        
         # 六曜を計算
-        rokuyou_list = ["大安", "赤口", "先勝", "友引", "先負", "仏滅"]
-        rokuyou_index = (lunar_month + lunar_day) % 6
-        rokuyou = rokuyou_list[rokuyou_index]
+        rokuyou = cls.ROKUYOU_LIST[(lunar_month + lunar_day) % 6]
         
         return {
             'year': lunar_year, 'month': lunar_month, 'day': lunar_day,
+            'leap': table['leaps'][index],
             'age': round(moon_age, 1), 'phase': phase, 'appearance': appearance,
-            'month_name': lunar_month_names.get(lunar_month, ""),
+            'month_name': cls.LUNAR_MONTH_NAMES.get(lunar_month, ""),
             'rokuyou': rokuyou
         }
 
 
 class AccurateSunCalculator:
-    """国立天文台準拠の日の出・日の入り計算（岡山）"""
+    """国立天文台準拠の日の出・日の入り計算（既定は岡山）"""
     
-    @staticmethod
-    def calculate_sunrise_sunset(date):
-        """岡山の日の出・日の入り時刻を国立天文台の方式で計算"""
-        # 岡山市の座標
-        latitude = 34.6617
-        longitude = 133.9350
-        
+    # 岡山市の座標（緯度, 経度）
+    OKAYAMA = (34.6617, 133.9350)
+    
+    # 日の出・日の入りの高度 = -0.8333度（視半径16' + 大気差34'）
+    SUN_ALTITUDE = -0.8333
+    
+    @classmethod
+    def calculate_sunrise_sunset(cls, date, latitude=OKAYAMA[0], longitude=OKAYAMA[1]):
+        """日の出・日の入り時刻を国立天文台の方式で計算（既定は岡山）"""
         # ユリウス日の計算
         y, m, d = date.year, date.month, date.day
         
@@ -350,8 +728,7 @@ class AccurateSunCalculator:
             equation_of_time += 24
         
         # 時角（度）
-        # 日の出・日の入りの高度 = -0.8333度（視半径16' + 大気差34'）
-        sun_altitude = -0.8333
+        sun_altitude = cls.SUN_ALTITUDE
         lat_rad = math.radians(latitude)
         
         cos_h = (math.sin(math.radians(sun_altitude)) - math.sin(lat_rad) * math.sin(delta_rad)) / (math.cos(lat_rad) * math.cos(delta_rad))
@@ -372,68 +749,720 @@ class AccurateSunCalculator:
         sunrise_time = noon - h / 15.0
         sunset_time = noon + h / 15.0
         
-        def to_time_string(decimal_hour):
-            hour = int(decimal_hour)
-            minute = int((decimal_hour - hour) * 60)
-            if minute >= 60:
-                minute = 59
-            if hour < 0:
-                hour += 24
-            if hour >= 24:
-                hour -= 24
-            return f"{hour:02d}:{minute:02d}"
+        return {
+            'sunrise': cls.to_time_string(sunrise_time),
+            'sunset': cls.to_time_string(sunset_time)
+        }
+    
+    @staticmethod
+    def to_time_string(decimal_hour):
+        """小数の時刻を HH:MM 形式に変換"""
+        hour = int(decimal_hour)
+        minute = int((decimal_hour - hour) * 60)
+        if minute >= 60:
+            minute = 59
+        if hour < 0:
+            hour += 24
+        if hour >= 24:
+            hour -= 24
+        return f"{hour:02d}:{minute:02d}"
+    
+    @staticmethod
+    def calculate_daily_terms(dates):
+        """日付ごとの太陽の赤緯（ラジアン）と均時差（時間）を一括計算（全地点で共有）"""
+        days = np.array(
+            [d.date() if isinstance(d, datetime) else d for d in dates],
+            dtype='datetime64[D]'
+        )
+        jd = (days - np.datetime64('1970-01-01', 'D')) / np.timedelta64(1, 'D') + 2440587.5
+        
+        # calculate_sunrise_sunsetと同一の式
+        T = (jd - 0.5 - 2451545.0) / 36525.0
+        L = np.mod(280.460 + 36000.771 * T, 360)
+        g_rad = np.radians(np.mod(357.528 + 35999.050 * T, 360))
+        epsilon_rad = np.radians(23.439 - 0.013 * T)
+        
+        lambda_rad = np.radians(L + 1.915 * np.sin(g_rad) + 0.020 * np.sin(2 * g_rad))
+        delta_rad = np.arcsin(np.sin(epsilon_rad) * np.sin(lambda_rad))
+        
+        cos_alpha = np.cos(lambda_rad) / np.cos(delta_rad)
+        sin_alpha = np.cos(epsilon_rad) * np.sin(lambda_rad) / np.cos(delta_rad)
+        alpha = np.mod(np.degrees(np.arctan2(sin_alpha, cos_alpha)), 360)
+        
+        equation_of_time = (L - alpha) / 15.0
+        equation_of_time = np.where(equation_of_time > 12, equation_of_time - 24, equation_of_time)
+        equation_of_time = np.where(equation_of_time < -12, equation_of_time + 24, equation_of_time)
+        
+        return delta_rad, equation_of_time
+    
+    @classmethod
+    def calculate_sunrise_sunset_batch(cls, dates, locations):
+        """複数地点×複数日付の日の出・日の入り・南中時刻を一括計算
+
+        Args:
+            dates: 日付の列（datetime / date）
+            locations: (緯度, 経度) の列
+        Returns:
+            'sunrise', 'sunset', 'solar_noon' をキーとする (地点数, 日数) の配列（日本時間、小数の時）
+        """
+        delta_rad, equation_of_time = cls.calculate_daily_terms(dates)
+        
+        coords = np.asarray(locations, dtype=np.float64).reshape(-1, 2)
+        lat_rad = np.radians(coords[:, 0])[:, np.newaxis]
+        longitude = coords[:, 1][:, np.newaxis]
+        
+        cos_h = (math.sin(math.radians(cls.SUN_ALTITUDE)) - np.sin(lat_rad) * np.sin(delta_rad)) / (np.cos(lat_rad) * np.cos(delta_rad))
+        # 極夜は0度、白夜は180度
+        h = np.degrees(np.arccos(np.clip(cos_h, -1, 1)))
+        
+        noon = 12.0 - equation_of_time - (longitude - 135.0) / 15.0
         
         return {
-            'sunrise': to_time_string(sunrise_time),
-            'sunset': to_time_string(sunset_time)
+            'sunrise': noon - h / 15.0,
+            'sunset': noon + h / 15.0,
+            'solar_noon': np.broadcast_to(noon, h.shape)
         }
 
 
-class GeminiContentGenerator:
-    """Gemini APIを使用したコンテンツ生成"""
+class YearlyAlmanac:
+    """1年分の暦（節気・候・旧暦・六曜・月齢・日の出入り）を地点ごとに事前計算したデータ
+
+    1日1レコードの構造化配列を .npy で保存し、メモリマップで読み込んで日付から直接引く。
+    各日の値は基準時刻（既定は投稿時刻の 7:00）時点のもの。
+    """
     
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.endpoint = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+    VERSION = 1
+    
+    DTYPE = np.dtype([
+        ('kou', 'u1'),            # KOU_DATAのインデックス（節気は //3）
+        ('lunar_year', '<i2'),
+        ('lunar_month', 'u1'),
+        ('lunar_day', 'u1'),
+        ('leap', '?'),
+        ('phase', 'u1'),          # PHASE_DATAのインデックス
+        ('age', '<i2'),           # 月齢（0.1日単位）
+        ('sunrise', '<i2'),       # 日の出（0時からの分）
+        ('sunset', '<i2'),        # 日の入り（0時からの分）
+    ])
     
-    def generate_content(self, date, lunar, sekki, kou):
-        """Geminiで文章生成"""
+    _loaded = {}
+    
+    def __init__(self, year, records):
+        self.year = year
+        self.records = records
+        self.first_day = datetime(year, 1, 1).date()
+    
+    @classmethod
+    def build(cls, year, location=AccurateSunCalculator.OKAYAMA, hour=7):
+        """year年の全日分を計算"""
+        jst = ZoneInfo("Asia/Tokyo")
+        first = datetime(year, 1, 1, hour, tzinfo=jst)
+        dates = [first + timedelta(days=i) for i in range((datetime(year + 1, 1, 1) - datetime(year, 1, 1)).days)]
         
-        prompt = f"""あなたは日本の暦・季節・伝統文化に精通した親しみやすい案内人です。
+        solar = AccurateSolarTermCalculator
+        lunar_calendar = AccurateLunarCalendar
+        records = np.zeros(len(dates), dtype=cls.DTYPE)
+        records['kou'] = solar.kou_indices(solar.calculate_solar_longitudes(dates))
+        
+        phases = [p for _, p, _ in lunar_calendar.PHASE_DATA]
+        lunar_dates = [lunar_calendar.calculate_lunar_date(date) for date in dates]
+        for field, key in (('lunar_year', 'year'), ('lunar_month', 'month'), ('lunar_day', 'day'), ('leap', 'leap')):
+            records[field] = [lunar[key] for lunar in lunar_dates]
+        records['phase'] = [phases.index(lunar['phase']) for lunar in lunar_dates]
+        records['age'] = [round(lunar['age'] * 10) for lunar in lunar_dates]
+        
+        sun = AccurateSunCalculator.calculate_sunrise_sunset_batch(dates, [location])
+        for key in ('sunrise', 'sunset'):
+            records[key] = [
+                int(t[:2]) * 60 + int(t[3:])
+                for t in map(AccurateSunCalculator.to_time_string, sun[key][0].tolist())
+            ]
+        
+        return cls(year, records)
+    
+    @classmethod
+    def cache_path(cls, year, location, hour, cache_dir):
+        """データファイルのパス"""
+        return os.path.join(
+            cache_dir,
+            f"almanac_v{cls.VERSION}_{year}_{location[0]:.4f}_{location[1]:.4f}_{hour:02d}.npy"
+        )
+    
+    @classmethod
+    def load_or_build(cls, year, location=AccurateSunCalculator.OKAYAMA, hour=7, cache_dir=CACHE_DIR, rebuild=False):
+        """データファイルをメモリマップで読み込み、なければ計算して保存"""
+        path = cls.cache_path(year, location, hour, cache_dir) if cache_dir else None
+        
+        if path and not rebuild and os.path.exists(path):
+            try:
+                records = np.load(path, mmap_mode='r')
+                if records.dtype == cls.DTYPE and len(records) in (365, 366):
+                    return cls(year, records)
+            except (OSError, ValueError) as e:
+                print(f"暦データの読み込みに失敗: {str(e)}")
+        
+        almanac = cls.build(year, location, hour)
+        
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                # 読み込み中のプロセスがあっても壊れないよう一時ファイルから置き換える
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, almanac.records)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"暦データの保存に失敗: {str(e)}")
+        
+        return almanac
+    
+    @classmethod
+    def for_year(cls, year, location=AccurateSunCalculator.OKAYAMA, hour=7):
+        """year年の暦データ（プロセス内で使い回す）"""
+        key = (year, tuple(location), hour)
+        almanac = cls._loaded.get(key)
+        if almanac is None:
+            almanac = cls._loaded[key] = cls.load_or_build(year, location, hour)
+        return almanac
+    
+    @staticmethod
+    def enabled():
+        """事前計算データを使うか（CALENDAR_ALMANAC=0 で毎回計算）"""
+        return os.environ.get('CALENDAR_ALMANAC', '1') != '0'
+    
+    @classmethod
+    def lookup(cls, date, location=AccurateSunCalculator.OKAYAMA, hour=7):
+        """指定日（日本時間）の暦情報を CalendarPostGenerator.calculate_astronomy と同じ形で取得"""
+        if date.tzinfo is not None:
+            date = date.astimezone(ZoneInfo("Asia/Tokyo"))
+        return cls.for_year(date.year, location, hour).astronomy(date)
+    
+    def astronomy(self, date):
+        """指定日の暦情報"""
+        record = self.records[(date.date() - self.first_day).days]
+        
+        lunar_calendar = AccurateLunarCalendar
+        month = int(record['lunar_month'])
+        day = int(record['lunar_day'])
+        _, phase, appearance = lunar_calendar.PHASE_DATA[int(record['phase'])]
+        
+        kou = int(record['kou'])
+        sunrise, sunset = int(record['sunrise']), int(record['sunset'])
+        
+        return {
+            'lunar': {
+                'year': int(record['lunar_year']), 'month': month, 'day': day,
+                'leap': bool(record['leap']),
+                'age': int(record['age']) / 10, 'phase': phase, 'appearance': appearance,
+                'month_name': lunar_calendar.LUNAR_MONTH_NAMES.get(month, ""),
+                'rokuyou': lunar_calendar.ROKUYOU_LIST[(month + day) % 6]
+            },
+            'sekki': AccurateSolarTermCalculator.SEKKI_DATA[kou // 3][1:],
+            'kou': AccurateSolarTermCalculator.KOU_DATA[kou][1:],
+            'sun_times': {
+                'sunrise': f"{sunrise // 60:02d}:{sunrise % 60:02d}",
+                'sunset': f"{sunset // 60:02d}:{sunset % 60:02d}"
+            }
+        }
 
-【本日の暦情報】
-西暦: {date.year}年{date.month}月{date.day}日
-旧暦: {lunar['month']}月{lunar['day']}日（{lunar['month_name']}）
-六曜: {lunar['rokuyou']}
-月齢: {lunar['age']}（{lunar['phase']}）
-二十四節気: {sekki[0]}（{sekki[1]}）
-七十二候: {kou[0]}（{kou[1]}）
 
-【最重要：書式の絶対ルール】
-1. 各段落は2〜3文で終わらせ、その後に**必ず空白行を1行**入れてください
-2. 箇条書きは**必ず使用**してください（* または - で開始）
-3. 箇条書きの前後にも**必ず空白行**を入れてください
+class RateLimiter:
+    """1分あたりのリクエスト数を制限（スレッドセーフ、等間隔に送信）"""
+    
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+    
+    def acquire(self):
+        """送信可能になるまで待機"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class GeminiResponseCache:
+    """Gemini応答のディスクキャッシュ（プロンプトと生成設定のハッシュをキーとする）
+
+    合計サイズが max_bytes を超えると最終利用が古いものから削除する。
+    ttl（秒）を指定すると、それより古い応答は使わない。
+    """
+    
+    def __init__(self, cache_dir=None, max_bytes=100 * 1024 * 1024, ttl=None):
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, 'gemini')
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls):
+        """環境変数から設定（GEMINI_CACHE=0 で無効、GEMINI_CACHE_MAX_MB、GEMINI_CACHE_TTL 秒）"""
+        if os.environ.get('GEMINI_CACHE') == '0':
+            return None
+        ttl = os.environ.get('GEMINI_CACHE_TTL')
+        return cls(
+            max_bytes=int(float(os.environ.get('GEMINI_CACHE_MAX_MB', 100)) * 1024 * 1024),
+            ttl=float(ttl) if ttl else None
+        )
+    
+    @staticmethod
+    def make_key(endpoint, request_body):
+        """エンドポイント（モデル）とリクエスト内容からキーを生成"""
+        payload = json.dumps({'endpoint': endpoint, 'request': request_body}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key):
+        """キャッシュ済みの応答を取得（なければNone）"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if self.ttl is not None and time.time() - entry.get('created', 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        
+        try:
+            # 最終利用時刻を更新（LRUの判定に使用）
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get('content')
+    
+    def put(self, key, content):
+        """応答を保存し、上限を超えた分を削除"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': time.time(), 'content': content}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as e:
+            print(f"Geminiキャッシュの保存に失敗: {str(e)}")
+    
+    def _evict(self):
+        """合計サイズが上限に収まるまで最終利用が古いものから削除"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except OSError:
+                    pass
 
-【必須の出力フォーマット】
-以下の12セクションを**すべて**含めてください。1つも欠かさないこと：
 
-☀️ 季節の移ろい（二十四節気・七十二候）
+class HttpMetrics:
+    """HTTP通信の計測値（新規接続・ハンドシェイク時間・リクエスト時間・リトライ回数）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.requests = 0
+        self.request_seconds = 0.0
+        self.retries = 0
+    
+    def record_connect(self, seconds):
+        """新規接続（TCP+TLSハンドシェイク）を記録"""
+        with self._lock:
+            self.connections += 1
+            self.connect_seconds += seconds
+    
+    def record_request(self, seconds, retries=0):
+        """リクエスト（接続確立からレスポンス受信まで）を記録"""
+        with self._lock:
+            self.requests += 1
+            self.request_seconds += seconds
+            self.retries += retries
+    
+    def summary(self):
+        """計測値の要約"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'reused_connections': max(self.requests + self.retries - self.connections, 0),
+                'connect_seconds': round(self.connect_seconds, 3),
+                'request_seconds': round(self.request_seconds, 3),
+                'retries': self.retries
+            }
 
-🎌 記念日・祝日
 
-💡 暦にまつわる文化雑学
+class Span:
+    """計測区間（with で囲んだ処理の所要時間と属性）
 
-🚜 農事歴
+    属性は bytes_in / bytes_out（受信・送信バイト数）、http_status、retries などを set() で付ける。
+    """
+    
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        # IDは書き出す場合だけ作る（集計だけなら不要）
+        self.span_id = os.urandom(8).hex() if tracer.exporters else None
+        self.parent_id = None
+        self.error = None
+        self.start_time = None
+        self.duration = None
+    
+    def set(self, **attrs):
+        """属性を追加"""
+        self.attrs.update(attrs)
+        return self
+    
+    def fail(self, message):
+        """例外を送出せずに失敗した処理を記録"""
+        self.error = message
+    
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if stack:
+            self.parent_id = stack[-1].span_id
+        stack.append(self)
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.error = f"{exc_type.__name__}: {exc}"
+        # ジェネレーター内のスパンは他の処理を挟んで閉じられることがあるので、末尾とは限らない
+        stack = self.tracer._stack()
+        if self in stack:
+            stack.remove(self)
+        self.tracer._finish(self)
+        return False
+
+
+class JsonLinesExporter:
+    """スパンを1件1行のJSONで書き出すエクスポーター（ファイルには追記、- なら標準エラー）"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if path == '-':
+            self._file = sys.stderr
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+    
+    def export(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+    
+    def close(self):
+        if self._file is not sys.stderr:
+            self._file.close()
 
-🏡 日本の風習・しきたり
 
-📚 神話・伝説
+class Tracer:
+    """処理段階（スパン）ごとの所要時間を記録し、エクスポーターに1件ずつ渡して段階ごとに集計
 
-🍁 自然・気象
+        with Tracer.current().span('gemini.request', date='2026-01-01') as span:
+            ...
+            span.set(http_status=200, bytes_in=len(body))
 
-🍴 旬の食
+    エクスポーターは export(record) と任意の close() を持つオブジェクト。
+    """
+    
+    _current = None
+    
+    def __init__(self, exporters=()):
+        # 1回の実行（日次・一括生成）を識別するID
+        self.trace_id = os.urandom(8).hex()
+        self.exporters = list(exporters)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 段階名: [件数, 合計秒, 最大秒, エラー件数, 受信バイト, 送信バイト]
+        self._stats = {}
+    
+    @classmethod
+    def from_env(cls):
+        """環境変数から設定
+
+        CALENDAR_TRACE にJSON Linesの出力先（ファイルのパス、- なら標準エラー）、
+        CALENDAR_TRACE_EXPORTER に独自のエクスポーターを作る関数（module:callable）を指定する。
+        """
+        exporters = []
+        path = os.environ.get('CALENDAR_TRACE')
+        if path:
+            exporters.append(JsonLinesExporter(path))
+        factory = os.environ.get('CALENDAR_TRACE_EXPORTER')
+        if factory:
+            import importlib
+            module_name, _, attr = factory.partition(':')
+            if not attr:
+                raise Exception(f"CALENDAR_TRACE_EXPORTER は module:callable の形式で指定してください: {factory}")
+            exporters.append(getattr(importlib.import_module(module_name), attr)())
+        return cls(exporters)
+    
+    @classmethod
+    def current(cls):
+        """プロセス全体で使う計測器（初回に環境変数から作成）"""
+        if cls._current is None:
+            cls._current = cls.from_env()
+        return cls._current
+    
+    def span(self, name, **attrs):
+        """計測区間を作る（with で使う）"""
+        return Span(self, name, attrs)
+    
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _finish(self, span):
+        with self._lock:
+            stats = self._stats.setdefault(span.name, [0, 0.0, 0.0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += span.duration
+            stats[2] = max(stats[2], span.duration)
+            stats[3] += 1 if span.error else 0
+            stats[4] += span.attrs.get('bytes_in') or 0
+            stats[5] += span.attrs.get('bytes_out') or 0
+        
+        if not self.exporters:
+            return
+        record = {
+            'trace_id': self.trace_id,
+            'span_id': span.span_id,
+            'parent_id': span.parent_id,
+            'name': span.name,
+            'start': datetime.fromtimestamp(span.start_time, ZoneInfo('UTC')).isoformat(timespec='milliseconds'),
+            'duration_ms': round(span.duration * 1000, 3),
+            'status': 'error' if span.error else 'ok',
+            'error': span.error,
+            'thread': threading.current_thread().name,
+            'attrs': span.attrs,
+        }
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as e:
+                # 計測の失敗で本処理は止めない
+                print(f"計測データの出力に失敗: {str(e)}")
+    
+    def summary(self):
+        """段階ごとの集計（合計時間の長い順）"""
+        with self._lock:
+            rows = [
+                {
+                    'name': name, 'count': count,
+                    'total_ms': round(total * 1000, 1), 'mean_ms': round(total / count * 1000, 1),
+                    'max_ms': round(maximum * 1000, 1), 'errors': errors,
+                    'bytes_in': bytes_in, 'bytes_out': bytes_out
+                }
+                for name, (count, total, maximum, errors, bytes_in, bytes_out) in self._stats.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+    
+    def print_summary(self):
+        """段階ごとの所要時間の表を表示（記録がなければ何もしない）"""
+        rows = self.summary()
+        if not rows:
+            return
+        print("\n⏱️  処理段階ごとの所要時間")
+        # 全角文字は2桁分の幅で表示されるので、見出しはその分だけ詰める
+        print(f"  {'段階':<20s} {'件数':>4s} {'合計ms':>8s} {'平均ms':>7s} {'最大ms':>7s} {'エラー':>3s} {'受信B':>9s} {'送信B':>9s}")
+        for row in rows:
+            print(f"  {row['name']:<22s} {row['count']:>6d} {row['total_ms']:>10.1f} {row['mean_ms']:>9.1f}"
+                  f" {row['max_ms']:>9.1f} {row['errors']:>6d} {row['bytes_in']:>11,d} {row['bytes_out']:>11,d}")
+    
+    def close(self):
+        """エクスポーターを閉じる"""
+        for exporter in self.exporters:
+            close = getattr(exporter, 'close', None)
+            if close:
+                close()
+
+
+def create_http_session(pool_size=4, retries=3, metrics=None):
+    """接続を使い回すrequests.Sessionを生成（接続プール・リトライ・接続時間の計測付き）"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.util.retry import Retry
+    
+    def timed_pool(pool_cls):
+        # 新規接続の確立時間を計測する接続クラスを使うプール
+        class TimedConnection(pool_cls.ConnectionCls):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()
+                metrics.record_connect(time.perf_counter() - start)
+        
+        return type(f"Timed{pool_cls.__name__}", (pool_cls,), {'ConnectionCls': TimedConnection})
+    
+    class TimedHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            if metrics:
+                self.poolmanager.pool_classes_by_scheme = {
+                    'http': timed_pool(HTTPConnectionPool),
+                    'https': timed_pool(HTTPSConnectionPool)
+                }
+    
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False
+    )
+    adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
-🌸 季節の草木
+
+class GeminiContentGenerator:
+    """Gemini APIを使用したコンテンツ生成"""
+    
+    DEFAULT_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
+    
+    # バッチジョブ1件に含めるリクエスト数の上限（インラインのリクエストは合計20MBまで）
+    BATCH_MAX_REQUESTS = 500
+    # バッチジョブの終了状態（BATCH_STATE_* / JOB_STATE_* のどちらでも返りうる）
+    BATCH_DONE_STATES = ('SUCCEEDED', 'FAILED', 'CANCELLED', 'EXPIRED')
+    
+    def __init__(self, api_key, endpoint=None, rate_limiter=None, cache=None, pool_size=4, retries=3):
+        self.api_key = api_key
+        self.metrics = HttpMetrics()
+        self.session = create_http_session(pool_size=pool_size, retries=retries, metrics=self.metrics)
+        # GEMINI_ENDPOINT でローカルのスタブサーバー等に差し替え可能
+        self.endpoint = endpoint or os.environ.get('GEMINI_ENDPOINT') or self.DEFAULT_ENDPOINT
+        self.rate_limiter = rate_limiter
+        # cache=False でキャッシュを使わない（省略時は環境変数の設定に従う）
+        if cache is None:
+            cache = GeminiResponseCache.from_env()
+        self.cache = cache or None
+    
+    def close(self):
+        """HTTPセッションを閉じる"""
+        self.session.close()
+    
+    def print_metrics(self):
+        """HTTP通信の計測値を表示"""
+        m = self.metrics.summary()
+        print(f"📈 Gemini通信: リクエスト{m['requests']}件 / 新規接続{m['connections']}件"
+              f"（再利用{m['reused_connections']}件、接続時間計{m['connect_seconds']}秒）"
+              f" / リクエスト時間計{m['request_seconds']}秒 / リトライ{m['retries']}回")
+    
+    def generate_many(self, items, max_workers=4, requests_per_minute=None):
+        """複数日分の文章を並列生成し、入力順に (インデックス, 文章) を返す
+
+        Args:
+            items: (date, lunar, sekki, kou) の列
+            max_workers: 同時に送信するリクエスト数の上限
+            requests_per_minute: 1分あたりのリクエスト数の上限（Noneなら制限なし）
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # この呼び出しだけの制限（以後の1件ずつの生成には持ち越さない）
+        rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute else self.rate_limiter
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.generate_content, *item, rate_limiter=rate_limiter) for item in items]
+            # 完了順に関わらず、先頭から完了したものを順次返す
+            for i, future in enumerate(futures):
+                yield i, future.result()
+    
+    def generate_sections(self, date, lunar, sekki, kou, sections, max_workers=None):
+        """セクションごとに1件ずつ並列にリクエストし、{絵文字: 文章（失敗したセクションはNone）} を返す
+
+        全セクションを1回で生成するより出力が短く、全体の待ち時間は最も遅いセクションの分で済む
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=max_workers or len(sections)) as executor:
+            futures = {
+                section: executor.submit(self.generate_content, date, lunar, sekki, kou, section)
+                for section in sections
+            }
+            return {section: future.result() for section, future in futures.items()}
+    
+    def build_request_body(self, date, lunar, sekki, kou, section=None):
+        """Gemini APIへのリクエスト本文（プロンプトと生成設定）を作成（section に絵文字を渡すとそのセクションだけ）"""
+        with Tracer.current().span('gemini.prompt') as span:
+            if section:
+                body = self._build_section_request_body(date, lunar, sekki, kou, section)
+            else:
+                body = self._build_request_body(date, lunar, sekki, kou)
+            span.set(bytes_out=len(body['contents'][0]['parts'][0]['text'].encode('utf-8')))
+        return body
+    
+    def _build_request_body(self, date, lunar, sekki, kou):
+        """build_request_body の本体"""
+        prompt = f"""あなたは日本の暦・季節・伝統文化に精通した親しみやすい案内人です。
+
+【本日の暦情報】
+西暦: {date.year}年{date.month}月{date.day}日
+旧暦: {lunar['month']}月{lunar['day']}日（{lunar['month_name']}）
+六曜: {lunar['rokuyou']}
+月齢: {lunar['age']}（{lunar['phase']}）
+二十四節気: {sekki[0]}（{sekki[1]}）
+七十二候: {kou[0]}（{kou[1]}）
+
+【最重要：書式の絶対ルール】
+1. 各段落は2〜3文で終わらせ、その後に**必ず空白行を1行**入れてください
+2. 箇条書きは**必ず使用**してください（* または - で開始）
+3. 箇条書きの前後にも**必ず空白行**を入れてください
+
+【必須の出力フォーマット】
+以下の12セクションを**すべて**含めてください。1つも欠かさないこと：
+
+☀️ 季節の移ろい（二十四節気・七十二候）
+
+🎌 記念日・祝日
+
+💡 暦にまつわる文化雑学
+
+🚜 農事歴
+
+🏡 日本の風習・しきたり
+
+📚 神話・伝説
+
+🍁 自然・気象
+
+🍴 旬の食
+
+🌸 季節の草木
 
 🌕 月や星の暦・天文情報
 
@@ -455,352 +1484,865 @@ class GeminiContentGenerator:
 
 前置きなしで「☀️ 季節の移ろい」から開始し、🎼 伝統芸能で終了してください。"""
         
-        try:
-            headers = {"Content-Type": "application/json"}
-            data = {
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {
-                    "temperature": 1.0,
-                    "topK": 64,
-                    "topP": 0.95,
-                    "maxOutputTokens": 8192,
-                }
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": 1.0,
+                "topK": 64,
+                "topP": 0.95,
+                "maxOutputTokens": 8192,
             }
-            
-            print("Gemini APIにリクエスト送信中...")
-            response = requests.post(
-                f"{self.endpoint}?key={self.api_key}",
-                headers=headers,
-                json=data,
-                timeout=120
-            )
-            
-            print(f"ステータスコード: {response.status_code}")
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"APIレスポンス取得成功")
-                
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    candidate = result['candidates'][0]
-                    
-                    if 'content' in candidate and 'parts' in candidate['content']:
-                        content = candidate['content']['parts'][0]['text']
-                        print(f"生成されたコンテンツ長: {len(content)}文字")
-                        return content
-            
-            print(f"Gemini APIエラー: {response.status_code}")
-            return None
-                
-        except Exception as e:
-            print(f"Gemini API呼び出し例外: {str(e)}")
-            return None
-
-
-class CalendarPostGenerator:
-    """暦情報投稿生成"""
+        }
     
-    def __init__(self, date=None):
-        self.jst = ZoneInfo("Asia/Tokyo")
-        self.date = date or datetime.now(self.jst)
-        self.gemini_api_key = os.environ.get('GEMINI_API_KEY')
-        
-    def generate_post(self):
-        """投稿を生成"""
-        lunar = AccurateLunarCalendar.calculate_lunar_date(self.date)
-        sekki = AccurateSolarTermCalculator.get_current_sekki(self.date)
-        kou = AccurateSolarTermCalculator.get_current_kou(self.date)
-        sun_times = AccurateSunCalculator.calculate_sunrise_sunset(self.date)
-        
-        weekdays = ["月", "火", "水", "木", "金", "土", "日"]
-        weekday = weekdays[self.date.weekday()]
-        
-        # アイキャッチ画像を生成
-        eyecatch_html = self._generate_eyecatch_image(sekki, kou, lunar)
-        
-        # 基本情報セクション（プログラムで生成）
-        basic_info = f"""<div style="font-family: 'ヒラギノ角ゴ Pro', 'Hiragino Kaku Gothic Pro', 'メイリオ', Meiryo, sans-serif; max-width: 900px; margin: 0 auto; line-height: 1.9; color: #2d3748;">
-
-{eyecatch_html}
+    def _build_section_request_body(self, date, lunar, sekki, kou, section):
+        """1セクション分のリクエスト本文（全セクション版と同じ書式ルールで、出力を短くする）"""
+        title = f"{section} {CalendarPostGenerator.SECTION_CONFIG[section][1]}"
+        prompt = f"""あなたは日本の暦・季節・伝統文化に精通した親しみやすい案内人です。
 
-<h2 style="color: #2c5282; border-bottom: 4px solid #4299e1; padding-bottom: 12px; margin-bottom: 25px; font-size: 28px;">📅 今日の暦情報</h2>
+【本日の暦情報】
+西暦: {date.year}年{date.month}月{date.day}日
+旧暦: {lunar['month']}月{lunar['day']}日（{lunar['month_name']}）
+六曜: {lunar['rokuyou']}
+月齢: {lunar['age']}（{lunar['phase']}）
+二十四節気: {sekki[0]}（{sekki[1]}）
+七十二候: {kou[0]}（{kou[1]}）
 
-<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 15px; margin-bottom: 30px; box-shadow: 0 10px 25px rgba(0,0,0,0.15);">
-<p style="margin: 0; font-size: 24px; font-weight: bold;">西暦: {self.date.year}年{self.date.month}月{self.date.day}日（{weekday}曜日）</p>
-<p style="margin: 15px 0 0 0; font-size: 20px;">旧暦: {lunar['month']}月{lunar['day']}日（{lunar['month_name']}）</p>
-<p style="margin: 10px 0 0 0; font-size: 20px;">六曜: {lunar['rokuyou']}</p>
-<p style="margin: 10px 0 0 0; font-size: 20px;">月齢: {lunar['age']}（{lunar['phase']}）</p>
-<p style="margin: 10px 0 0 0; font-size: 17px; opacity: 0.95; line-height: 1.7;">{lunar['appearance']}</p>
-<p style="margin: 15px 0 0 0; font-size: 18px; border-top: 1px solid rgba(255,255,255,0.3); padding-top: 15px;">
-<strong>岡山の日の出・日の入り</strong><br>
-日の出: {sun_times['sunrise']} / 日の入り: {sun_times['sunset']}
-</p>
-</div>
+【書いてほしいセクション】
+「{title}」の1セクションだけを書いてください。ほかのセクションは書かないこと。
 
-<div style="background: #f7fafc; padding: 25px; border-radius: 12px; border-left: 5px solid #4299e1; margin-bottom: 35px;">
-<div style="margin-bottom: 20px;">
-<p style="margin: 0 0 8px 0; font-size: 18px;"><strong>二十四節気:</strong> {sekki[0]}（{sekki[1]}）</p>
-<p style="margin: 0; font-size: 15px; color: #4A5568; line-height: 1.8;">{sekki[2]}</p>
-</div>
-<div>
-<p style="margin: 0 0 8px 0; font-size: 18px;"><strong>七十二候:</strong> {kou[0]}（{kou[1]}）</p>
-<p style="margin: 0; font-size: 15px; color: #4A5568; line-height: 1.8;">{kou[2]}</p>
-</div>
-</div>
+【最重要：書式の絶対ルール】
+1. 各段落は2〜3文で終わらせ、その後に**必ず空白行を1行**入れてください
+2. 箇条書きは**必ず使用**してください（* または - で開始）
+3. 箇条書きの前後にも**必ず空白行**を入れてください
 
-<hr style="border: none; border-top: 3px solid #e2e8f0; margin: 40px 0;">
-"""
-        
-        # Geminiでコンテンツ生成
-        print("\n" + "="*70)
-        print("Gemini APIでコンテンツを生成中...")
-        print("="*70)
-        
-        if not self.gemini_api_key:
-            print("エラー: GEMINI_API_KEYが設定されていません")
-            gemini_content = None
-        else:
-            generator = GeminiContentGenerator(self.gemini_api_key)
-            gemini_content = generator.generate_content(self.date, lunar, sekki, kou)
-        
-        if not gemini_content:
-            print("\n警告: Geminiコンテンツの生成に失敗しました。")
-            print("フォールバックコンテンツを使用します。")
-            gemini_content = self._generate_rich_fallback_content(lunar, sekki, kou)
-        
-        # HTML整形
-        print("\nHTML整形処理を開始...")
-        gemini_html = self._format_gemini_content_to_html(gemini_content)
-        print(f"整形後のHTML長: {len(gemini_html)}文字")
-        
-        # 締めの挨拶
-        closing = """
-<hr style="border: none; border-top: 3px solid #e2e8f0; margin: 40px 0;">
+【書き方】
+- 最初に2〜3文で導入を書く
+- 空白行を入れる
+- 箇条書きで3〜5個のポイントを列挙
+- 空白行を入れる
+- 最後に1〜2文でまとめる
 
-<div style="background: linear-gradient(135deg, #f0fdf4, #dcfce7); padding: 30px; border-radius: 15px; text-align: center; box-shadow: 0 4px 10px rgba(0,0,0,0.08);">
-<p style="margin: 0; font-size: 18px; color: #14532d; font-weight: 500; line-height: 2;">
-季節を感じながら、今日も良い一日をお過ごしください
-</p>
-</div>
+【文体】
+- 「ですます調」で親しみやすく
+- 「でございます」は絶対に使わない
+- 300文字以上
 
-</div>"""
-        
-        full_content = basic_info + gemini_html + closing
+前置きなしで見出し行「{title}」から開始してください。"""
         
         return {
-            'title': f'{self.date.year}年{self.date.month}月{self.date.day}日({weekday})の暦情報',
-            'content': full_content,
-            'labels': ['暦', '二十四節気', '旧暦', '季節', '七十二候', '農事歴', '風習', '伝統文化', '行事食', '天文', '神話', '伝統芸能']
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": 1.0,
+                "topK": 64,
+                "topP": 0.95,
+                "maxOutputTokens": 2048,
+            }
         }
     
-    def _format_gemini_content_to_html(self, content):
-        """GeminiコンテンツをHTML形式に整形（Markdown対応版）"""
-        if not content:
-            return ""
-        
-        lines = content.split('\n')
-        html_parts = []
-        current_section = None
-        current_content = []
-        
-        section_config = {
-            '☀️': ('#fc8181', '季節の移ろい'),
-            '🎌': ('#f6ad55', '記念日・祝日'),
-            '💡': ('#4299e1', '暦にまつわる文化雑学'),
-            '🚜': ('#68d391', '農事歴'),
-            '🏡': ('#9f7aea', '日本の風習・しきたり'),
-            '📚': ('#ed64a6', '神話・伝説'),
-            '🍁': ('#38b2ac', '自然・気象'),
-            '🍴': ('#f56565', '旬の食'),
-            '🌸': ('#f687b3', '季節の草木'),
-            '🌕': ('#4299e1', '月や星の暦・天文情報'),
-            '🎨': ('#ed8936', '伝統工芸'),
-            '🎼': ('#805ad5', '伝統芸能')
-        }
-        
-        for line in lines:
-            line_stripped = line.strip()
-            
-            # セクション開始を検出
-            is_section_start = False
-            for emoji, (color, name) in section_config.items():
-                if line_stripped.startswith(emoji):
-                    # 前のセクションを保存
-                    if current_section and current_content:
-                        emoji_key, color_val = current_section
-                        section_body = self._convert_markdown_to_html(current_content)
-                        html_parts.append(self._create_section_html(
-                            line_with_emoji=f"{emoji_key} {section_config[emoji_key][1]}",
-                            content=section_body,
-                            color=color_val
-                        ))
+    def generate_content(self, date, lunar, sekki, kou, section=None, rate_limiter=None):
+        """Geminiで文章生成（section に絵文字を渡すとそのセクションだけ、rate_limiter で送信間隔の制限を差し替え）"""
+        attrs = {'date': f"{date:%Y-%m-%d}"}
+        if section:
+            attrs['section'] = section
+        with Tracer.current().span('gemini.request', **attrs) as span:
+            try:
+                headers = {"Content-Type": "application/json"}
+                data = self.build_request_body(date, lunar, sekki, kou, section)
+                
+                cache_key = None
+                if self.cache:
+                    cache_key = self.cache.make_key(self.endpoint, data)
+                    cached = self.cache.get(cache_key)
+                    span.set(cache='hit' if cached else 'miss')
+                    if cached:
+                        print(f"Geminiキャッシュから取得（{date.year}年{date.month}月{date.day}日、{len(cached)}文字）")
+                        return cached
+                
+                rate_limiter = rate_limiter or self.rate_limiter
+                if rate_limiter:
+                    rate_limiter.acquire()
+                
+                print(f"Gemini APIにリクエスト送信中...（{date.year}年{date.month}月{date.day}日{' ' + section if section else ''}）")
+                start = time.perf_counter()
+                response = self.session.post(
+                    f"{self.endpoint}?key={self.api_key}",
+                    headers=headers,
+                    json=data,
+                    timeout=120
+                )
+                retry_state = getattr(response.raw, 'retries', None)
+                retries = len(retry_state.history) if retry_state else 0
+                self.metrics.record_request(time.perf_counter() - start, retries=retries)
+                span.set(
+                    http_status=response.status_code, retries=retries,
+                    bytes_out=len(response.request.body or b''), bytes_in=len(response.content)
+                )
+                
+                print(f"ステータスコード: {response.status_code}")
+                
+                if response.status_code == 200:
+                    print(f"APIレスポンス取得成功")
+                    content = self.extract_text(response.json())
+                    if content:
+                        print(f"生成されたコンテンツ長: {len(content)}文字")
+                        if cache_key:
+                            self.cache.put(cache_key, content)
+                        return content
+                
+                print(f"Gemini APIエラー: {response.status_code}")
+                span.fail(f"HTTP {response.status_code}")
+                return None
                     
-                    # 新しいセクション開始
-                    current_section = (emoji, color)
-                    current_content = []
-                    is_section_start = True
-                    break
+            except Exception as e:
+                print(f"Gemini API呼び出し例外: {str(e)}")
+                span.fail(f"{type(e).__name__}: {e}")
+                return None
+    
+    @staticmethod
+    def extract_text(result):
+        """generateContent のレスポンスから本文を取り出す（なければNone）"""
+        candidates = result.get('candidates') or []
+        if candidates:
+            parts = candidates[0].get('content', {}).get('parts') or []
+            if parts:
+                return parts[0].get('text')
+        return None
+    
+    @property
+    def batch_endpoint(self):
+        """バッチジョブ作成用エンドポイント（batchGenerateContent）"""
+        return self.endpoint.replace(':generateContent', ':batchGenerateContent')
+    
+    def operation_url(self, name):
+        """バッチジョブ（batches/...）の状態を取得するURL"""
+        return f"{self.endpoint.split('/models/')[0]}/{name}"
+    
+    def generate_batch(self, items, poll_interval=None, timeout=None, state_dir=None):
+        """複数日分の文章をバッチAPIでまとめて生成し、入力順の文章のリスト（失敗はNone）を返す
+
+        キャッシュ済みの分は送信しない。作成したジョブと回収した文章は state_dir に記録し、タイムアウトや
+        中断の後に同じ期間で再実行すると、新しいジョブを作らず記録済みのジョブの結果を待って回収する。
+        一部の日が失敗したときも記録を残し、再実行では失敗した日だけを送り直す（応答キャッシュが無効でも同じ）。
+
+        Args:
+            items: (date, lunar, sekki, kou) の列
+            poll_interval: ジョブの状態を確認する間隔（秒、省略時は GEMINI_BATCH_POLL_SECONDS、既定30）
+            timeout: 結果を待つ上限（秒、省略時は GEMINI_BATCH_TIMEOUT、未設定なら無制限）
+        """
+        if poll_interval is None:
+            poll_interval = float(os.environ.get('GEMINI_BATCH_POLL_SECONDS', 30))
+        if timeout is None and os.environ.get('GEMINI_BATCH_TIMEOUT'):
+            timeout = float(os.environ['GEMINI_BATCH_TIMEOUT'])
+        state_dir = state_dir or os.path.join(CACHE_DIR, 'gemini_batch')
+        
+        with Tracer.current().span('gemini.batch', items=len(items)) as span:
+            bodies = [self.build_request_body(*item) for item in items]
+            keys = [GeminiResponseCache.make_key(self.endpoint, body) for body in bodies]
+            results = {}
+            if self.cache:
+                for key in keys:
+                    cached = self.cache.get(key)
+                    if cached:
+                        results[key] = cached
+            span.set(cached=len(results))
             
-            if not is_section_start and line_stripped:
-                current_content.append(line)
-        
-        # 最後のセクションを保存
-        if current_section and current_content:
-            emoji_key, color_val = current_section
-            section_body = self._convert_markdown_to_html(current_content)
-            html_parts.append(self._create_section_html(
-                line_with_emoji=f"{emoji_key} {section_config[emoji_key][1]}",
-                content=section_body,
-                color=color_val
-            ))
-        
-        return ''.join(html_parts)
-    
-    def _convert_markdown_to_html(self, lines):
-        """MarkdownテキストをHTMLに変換"""
-        html = []
-        in_list = False
-        current_paragraph = []
-        
-        for line in lines:
-            stripped = line.strip()
+            # 期間（全リクエスト）ごとのジョブの記録
+            state_path = os.path.join(
+                state_dir, f"batch_{hashlib.sha256(''.join(keys).encode('utf-8')).hexdigest()[:16]}.json"
+            )
+            state = self._load_batch_state(state_path)
+            # 前回までに回収した分
+            for key, content in state['results'].items():
+                results.setdefault(key, content)
+            pending = [key for key in dict.fromkeys(keys) if key not in results]
+            state['jobs'] = [job for job in state['jobs'] if any(key in pending for key in job['keys'])]
+            if state['jobs']:
+                print(f"📦 記録済みのバッチジョブ{len(state['jobs'])}件の結果を待ちます: {', '.join(job['name'] for job in state['jobs'])}")
             
-            # 箇条書きの処理（* または - で始まる行）
-            if stripped.startswith('* ') or stripped.startswith('- '):
-                # 段落を閉じる
-                if current_paragraph:
-                    html.append(f"<p style='margin: 0 0 15px 0; line-height: 2;'>{''.join(current_paragraph)}</p>")
-                    current_paragraph = []
-                
-                # リスト開始
-                if not in_list:
-                    html.append("<ul style='margin: 15px 0; padding-left: 25px;'>")
-                    in_list = True
-                
-                # リスト項目
-                item_text = stripped[2:].strip()  # * または - を除去
-                # 太字処理 **text**
-                item_text = self._process_bold(item_text)
-                html.append(f"<li style='margin-bottom: 12px; line-height: 2;'>{item_text}</li>")
+            # どのジョブにも含まれていない分を新しいジョブで送信（作成のたびに記録）
+            submitted = {key for job in state['jobs'] for key in job['keys']}
+            body_by_key = dict(zip(keys, bodies))
+            unsent = [key for key in pending if key not in submitted]
+            for i in range(0, len(unsent), self.BATCH_MAX_REQUESTS):
+                chunk = unsent[i:i + self.BATCH_MAX_REQUESTS]
+                name = self._create_batch_job(chunk, body_by_key)
+                print(f"📦 バッチジョブを作成しました: {name}（{len(chunk)}件）")
+                state['jobs'].append({'name': name, 'keys': chunk})
+                self._save_batch_state(state_path, state)
+            span.set(jobs=len(state['jobs']), submitted=len(unsent))
             
-            # 空行
-            elif not stripped:
-                # リストを閉じる
-                if in_list:
-                    html.append("</ul>")
-                    in_list = False
+            started = time.monotonic()
+            waiting = list(state['jobs'])
+            polls = 0
+            while waiting:
+                for job in list(waiting):
+                    operation = self._get_batch_job(job['name'])
+                    polls += 1
+                    job_state = operation.get('metadata', {}).get('state', '')
+                    if not (operation.get('done') or job_state.endswith(self.BATCH_DONE_STATES)):
+                        continue
+                    
+                    waiting.remove(job)
+                    collected = self._collect_batch_results(operation)
+                    for key, content in collected.items():
+                        results[key] = content
+                        state['results'][key] = content
+                        if self.cache:
+                            self.cache.put(key, content)
+                    print(f"📦 {job['name']}: {job_state or '完了'}（{len(collected)}/{len(job['keys'])}件取得）")
+                    # 回収済み・失敗したジョブは記録から外す（取得できなかった分は再実行時に送り直す）
+                    state['jobs'].remove(job)
+                    self._save_batch_state(state_path, state)
                 
-                # 段落を閉じる
-                if current_paragraph:
-                    html.append(f"<p style='margin: 0 0 15px 0; line-height: 2;'>{''.join(current_paragraph)}</p>")
-                    current_paragraph = []
+                if not waiting:
+                    break
+                if timeout is not None and time.monotonic() - started > timeout:
+                    span.set(polls=polls)
+                    raise Exception(
+                        f"バッチジョブが{timeout:g}秒以内に終わりませんでした（{len(waiting)}件）。"
+                        f"同じ期間で再実行すると続きから結果を回収します: {state_path}"
+                    )
+                print(f"⏳ バッチジョブ{len(waiting)}件の完了を待っています...")
+                time.sleep(poll_interval)
             
-            # 通常の段落
+            failed = len({key for key in keys if key not in results})
+            span.set(polls=polls, failed=failed)
+            if failed:
+                print(f"⚠️ {failed}件を生成できませんでした。同じ期間で再実行すると失敗した分だけ送り直します: {state_path}")
             else:
-                # リストを閉じる
-                if in_list:
-                    html.append("</ul>")
-                    in_list = False
-                
-                # 段落に追加
-                processed_line = self._process_bold(stripped)
-                if current_paragraph:
-                    current_paragraph.append(' ')
-                current_paragraph.append(processed_line)
-        
-        # 最後のリストを閉じる
-        if in_list:
-            html.append("</ul>")
+                try:
+                    os.remove(state_path)
+                except OSError:
+                    pass
         
-        # 最後の段落を閉じる
-        if current_paragraph:
-            html.append(f"<p style='margin: 0 0 15px 0; line-height: 2;'>{''.join(current_paragraph)}</p>")
-        
-        return ''.join(html)
+        return [results.get(key) for key in keys]
     
-    def _process_bold(self, text):
-        """太字マークダウン（**text**）をHTMLに変換"""
-        import re
-        # **text** を <strong>text</strong> に変換
-        text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
-        return text
+    def _create_batch_job(self, keys, body_by_key):
+        """バッチジョブを作成してジョブ名（batches/...）を返す"""
+        payload = {
+            'batch': {
+                'display_name': f"calendar-post-{len(keys)}",
+                'input_config': {'requests': {'requests': [
+                    {'request': body_by_key[key], 'metadata': {'key': key}} for key in keys
+                ]}}
+            }
+        }
+        response = self.session.post(f"{self.batch_endpoint}?key={self.api_key}", json=payload, timeout=120)
+        if response.status_code != 200:
+            raise Exception(f"バッチジョブの作成に失敗しました: {response.status_code} {response.text[:200]}")
+        return response.json()['name']
     
-    def _create_section_html(self, line_with_emoji, content, color):
-        """セクションのHTMLを生成"""
-        return f"""
-<h3 style="color: #2d3748; font-size: 26px; margin: 35px 0 25px 0; border-left: 6px solid {color}; padding-left: 15px;">{line_with_emoji}</h3>
-<div style="background: #f7fafc; padding: 28px; border-radius: 12px; margin-bottom: 30px; border-left: 4px solid {color};">
-<div style="color: #2d3748; font-size: 16px;">{content}</div>
-</div>
-"""
+    def _get_batch_job(self, name):
+        """バッチジョブ（Operation）の状態を取得"""
+        response = self.session.get(f"{self.operation_url(name)}?key={self.api_key}", timeout=60)
+        if response.status_code != 200:
+            raise Exception(f"バッチジョブの状態の取得に失敗しました: {name} {response.status_code}")
+        return response.json()
     
-    def _generate_eyecatch_image(self, sekki, kou, lunar):
-        """アイキャッチ画像をSVGで生成"""
-        # 季節ごとの配色
-        season_colors = {
-            '立春': ('#FFE4E1', '#FF69B4', '#8B008B'),
-            '雨水': ('#E0F2F7', '#4FC3F7', '#0277BD'),
-            '啓蟄': ('#F1F8E9', '#AED581', '#558B2F'),
-            '春分': ('#FFF9C4', '#FFD54F', '#F57C00'),
-            '清明': ('#F3E5F5', '#BA68C8', '#6A1B9A'),
-            '穀雨': ('#E8F5E9', '#66BB6A', '#2E7D32'),
-            '立夏': ('#FFF3E0', '#FFB74D', '#EF6C00'),
-            '小満': ('#E1F5FE', '#4DD0E1', '#0097A7'),
-            '芒種': ('#F1F8E9', '#9CCC65', '#689F38'),
-            '夏至': ('#FFF9C4', '#FFD54F', '#F57C00'),
-            '小暑': ('#FFEBEE', '#EF5350', '#C62828'),
-            '大暑': ('#FBE9E7', '#FF7043', '#D84315'),
-            '立秋': ('#FFF3E0', '#FFB74D', '#EF6C00'),
-            '処暑': ('#FCE4EC', '#F06292', '#C2185B'),
-            '白露': ('#E3F2FD', '#64B5F6', '#1976D2'),
-            '秋分': ('#FFF9C4', '#FFD54F', '#F57C00'),
-            '寒露': ('#EFEBE9', '#BCAAA4', '#5D4037'),
-            '霜降': ('#F3E5F5', '#BA68C8', '#6A1B9A'),
-            '立冬': ('#E3F2FD', '#64B5F6', '#1976D2'),
-            '小雪': ('#ECEFF1', '#90A4AE', '#455A64'),
-            '大雪': ('#E0F7FA', '#4DD0E1', '#00838F'),
-            '冬至': ('#E8EAF6', '#7986CB', '#3949AB'),
-            '小寒': ('#F3E5F5', '#BA68C8', '#6A1B9A'),
-            '大寒': ('#E1F5FE', '#4FC3F7', '#0277BD')
-        }
+    def _collect_batch_results(self, operation):
+        """完了したバッチジョブの {キー: 本文}（エラーになったリクエストは含めない）"""
+        inlined = operation.get('response', {}).get('inlinedResponses') or []
+        if isinstance(inlined, dict):
+            inlined = inlined.get('inlinedResponses') or []
         
-        bg_color, primary_color, accent_color = season_colors.get(sekki[0], ('#E3F2FD', '#64B5F6', '#1976D2'))
-        
-        # HTMLとして直接レンダリング可能な画像を生成
-        html = f"""
-<div style="margin-bottom: 30px; border-radius: 15px; overflow: hidden; box-shadow: 0 10px 30px rgba(0,0,0,0.15); background: linear-gradient(135deg, {bg_color} 0%, {primary_color} 100%); position: relative; aspect-ratio: 16/9;">
-  <div style="position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); text-align: center; width: 90%;">
-    <div style="font-family: 'Yu Mincho', 'Noto Serif JP', serif; font-size: clamp(40px, 8vw, 120px); font-weight: bold; color: white; text-shadow: 0 4px 10px rgba(0,0,0,0.3); margin-bottom: 15px;">
+        results = {}
+        for item in inlined:
+            key = item.get('metadata', {}).get('key')
+            content = self.extract_text(item.get('response') or {})
+            if key and content:
+                results[key] = content
+        return results
+    
+    @staticmethod
+    def _load_batch_state(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == 1:
+                state.setdefault('results', {})
+                return state
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"バッチジョブの記録の読み込みに失敗: {str(e)}")
+        return {'version': 1, 'jobs': [], 'results': {}}
+    
+    @staticmethod
+    def _save_batch_state(path, state):
+        """ジョブの記録を書き出す（書き出しに失敗すると再開できないので例外はそのまま送出）"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    @property
+    def stream_endpoint(self):
+        """ストリーミング用エンドポイント（streamGenerateContent、SSE形式）"""
+        return self.endpoint.replace(':generateContent', ':streamGenerateContent')
+    
+    def generate_content_stream(self, date, lunar, sekki, kou):
+        """Geminiで文章をストリーミング生成し、受信したテキスト片を順に返す
+
+        エラー時はそれまでに受信した分で終了する（例外は送出しない）
+        """
+        with Tracer.current().span('gemini.stream', date=f"{date:%Y-%m-%d}") as span:
+            data = self.build_request_body(date, lunar, sekki, kou)
+            
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(self.endpoint, data)
+                cached = self.cache.get(cache_key)
+                span.set(cache='hit' if cached else 'miss')
+                if cached:
+                    print(f"Geminiキャッシュから取得（{len(cached)}文字）")
+                    yield cached
+                    return
+            
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            
+            received = []
+            # 受信したSSEの行のバイト数（計測用）
+            received_bytes = 0
+            completed = False
+            start = time.perf_counter()
+            try:
+                print("Gemini APIにストリーミングリクエスト送信中...")
+                with self.session.post(
+                    f"{self.stream_endpoint}?alt=sse&key={self.api_key}",
+                    headers={"Content-Type": "application/json"},
+                    json=data,
+                    timeout=120,
+                    stream=True
+                ) as response:
+                    print(f"ステータスコード: {response.status_code}")
+                    span.set(http_status=response.status_code, bytes_out=len(response.request.body or b''))
+                    if response.status_code != 200:
+                        print(f"Gemini APIエラー: {response.status_code}")
+                        span.fail(f"HTTP {response.status_code}")
+                        return
+                    
+                    # SSEは常にUTF-8（charset のない text/event-stream を requests は ISO-8859-1 として
+                    # 復号してしまうため、バイト列のまま行に分けてから復号する）
+                    for raw_line in response.iter_lines():
+                        received_bytes += len(raw_line) + 1
+                        line = raw_line.decode('utf-8')
+                        if not line or not line.startswith('data:'):
+                            continue
+                        event = json.loads(line[5:].strip())
+                        for candidate in event.get('candidates', [])[:1]:
+                            for part in candidate.get('content', {}).get('parts', []):
+                                text = part.get('text')
+                                if text:
+                                    received.append(text)
+                                    yield text
+                    completed = True
+            
+            except Exception as e:
+                print(f"Gemini APIストリーミング例外: {str(e)}")
+                span.fail(f"{type(e).__name__}: {e}")
+            
+            finally:
+                self.metrics.record_request(time.perf_counter() - start)
+                content = ''.join(received)
+                span.set(bytes_in=received_bytes, completed=completed)
+                print(f"受信したコンテンツ長: {len(content)}文字")
+                # 途中で打ち切った応答はキャッシュしない
+                if completed and content and cache_key:
+                    self.cache.put(cache_key, content)
+
+
+class PostTemplates:
+    """投稿HTMLの雛形（一度コンパイルしてキャッシュ）
+
+    雛形中の @名前@ を、クラス版では class="cp-名前"、インライン版では style="..." に置き換える。
+    クラス版のスタイルシートは投稿ごとに1回だけ先頭に出力する。
+    {color} などの差し込みを含む宣言は、クラス版でも style 属性に残す。
+    """
+    
+    CLASS_PREFIX = 'cp-'
+    
+    # クラス名（接頭辞なし）: CSS宣言
+    STYLES = {
+        'root': "font-family: 'ヒラギノ角ゴ Pro', 'Hiragino Kaku Gothic Pro', 'メイリオ', Meiryo, sans-serif; max-width: 900px; margin: 0 auto; line-height: 1.9; color: #2d3748;",
+        'eyecatch': "margin-bottom: 30px; border-radius: 15px; overflow: hidden; box-shadow: 0 10px 30px rgba(0,0,0,0.15); background: linear-gradient(135deg, {bg_color} 0%, {primary_color} 100%); position: relative; aspect-ratio: 16/9;",
+        'eyecatch-inner': "position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); text-align: center; width: 90%;",
+        'eyecatch-sekki': "font-family: 'Yu Mincho', 'Noto Serif JP', serif; font-size: clamp(40px, 8vw, 120px); font-weight: bold; color: white; text-shadow: 0 4px 10px rgba(0,0,0,0.3); margin-bottom: 15px;",
+        'eyecatch-reading': "font-family: 'Yu Mincho', 'Noto Serif JP', serif; font-size: clamp(20px, 3vw, 48px); color: white; opacity: 0.9; margin-bottom: 30px;",
+        'eyecatch-kou': "font-family: 'Yu Mincho', 'Noto Serif JP', serif; font-size: clamp(30px, 5vw, 72px); color: {accent_color}; text-shadow: 0 4px 10px rgba(0,0,0,0.3); margin-bottom: 20px;",
+        'eyecatch-date': "font-family: 'Yu Gothic', 'Noto Sans JP', sans-serif; font-size: clamp(18px, 3vw, 52px); color: white; opacity: 0.85;",
+        'eyecatch-circle1': "position: absolute; top: 100px; right: 150px; width: 200px; height: 200px; border-radius: 50%; background: white; opacity: 0.15;",
+        'eyecatch-circle2': "position: absolute; bottom: 80px; left: 100px; width: 150px; height: 150px; border-radius: 50%; background: {accent_color}; opacity: 0.1;",
+        'eyecatch-line': "position: absolute; bottom: 30px; left: 0; right: 0; height: 3px; background: white; opacity: 0.5; margin: 0 200px;",
+        'title': "color: #2c5282; border-bottom: 4px solid #4299e1; padding-bottom: 12px; margin-bottom: 25px; font-size: 28px;",
+        'summary': "background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 15px; margin-bottom: 30px; box-shadow: 0 10px 25px rgba(0,0,0,0.15);",
+        'summary-date': "margin: 0; font-size: 24px; font-weight: bold;",
+        'summary-lunar': "margin: 15px 0 0 0; font-size: 20px;",
+        'summary-item': "margin: 10px 0 0 0; font-size: 20px;",
+        'summary-appearance': "margin: 10px 0 0 0; font-size: 17px; opacity: 0.95; line-height: 1.7;",
+        'summary-sun': "margin: 15px 0 0 0; font-size: 18px; border-top: 1px solid rgba(255,255,255,0.3); padding-top: 15px;",
+        'terms': "background: #f7fafc; padding: 25px; border-radius: 12px; border-left: 5px solid #4299e1; margin-bottom: 35px;",
+        'terms-block': "margin-bottom: 20px;",
+        'terms-name': "margin: 0 0 8px 0; font-size: 18px;",
+        'terms-desc': "margin: 0; font-size: 15px; color: #4A5568; line-height: 1.8;",
+        'divider': "border: none; border-top: 3px solid #e2e8f0; margin: 40px 0;",
+        'section-title': "color: #2d3748; font-size: 26px; margin: 35px 0 25px 0; border-left: 6px solid {color}; padding-left: 15px;",
+        'section': "background: #f7fafc; padding: 28px; border-radius: 12px; margin-bottom: 30px; border-left: 4px solid {color};",
+        'section-body': "color: #2d3748; font-size: 16px;",
+        'p': "margin: 0 0 15px 0; line-height: 2;",
+        'ul': "margin: 15px 0; padding-left: 25px;",
+        'li': "margin-bottom: 12px; line-height: 2;",
+        'closing': "background: linear-gradient(135deg, #f0fdf4, #dcfce7); padding: 30px; border-radius: 15px; text-align: center; box-shadow: 0 4px 10px rgba(0,0,0,0.08);",
+        'closing-text': "margin: 0; font-size: 18px; color: #14532d; font-weight: 500; line-height: 2;",
+    }
+    
+    # 雛形（str.format 形式）
+    TEMPLATES = {
+        'eyecatch': """
+<div @eyecatch@>
+  <div @eyecatch-inner@>
+    <div @eyecatch-sekki@>
       {sekki[0]}
     </div>
-    <div style="font-family: 'Yu Mincho', 'Noto Serif JP', serif; font-size: clamp(20px, 3vw, 48px); color: white; opacity: 0.9; margin-bottom: 30px;">
+    <div @eyecatch-reading@>
       {sekki[1]}
     </div>
-    <div style="font-family: 'Yu Mincho', 'Noto Serif JP', serif; font-size: clamp(30px, 5vw, 72px); color: {accent_color}; text-shadow: 0 4px 10px rgba(0,0,0,0.3); margin-bottom: 20px;">
+    <div @eyecatch-kou@>
       {kou[0]}
     </div>
-    <div style="font-family: 'Yu Gothic', 'Noto Sans JP', sans-serif; font-size: clamp(18px, 3vw, 52px); color: white; opacity: 0.85;">
-      {self.date.year}年{self.date.month}月{self.date.day}日 旧暦{lunar['month']}月{lunar['day']}日
+    <div @eyecatch-date@>
+      {date.year}年{date.month}月{date.day}日 旧暦{lunar[month]}月{lunar[day]}日
     </div>
   </div>
-  <div style="position: absolute; top: 100px; right: 150px; width: 200px; height: 200px; border-radius: 50%; background: white; opacity: 0.15;"></div>
-  <div style="position: absolute; bottom: 80px; left: 100px; width: 150px; height: 150px; border-radius: 50%; background: {accent_color}; opacity: 0.1;"></div>
-  <div style="position: absolute; bottom: 30px; left: 0; right: 0; height: 3px; background: white; opacity: 0.5; margin: 0 200px;"></div>
+  <div @eyecatch-circle1@></div>
+  <div @eyecatch-circle2@></div>
+  <div @eyecatch-line@></div>
 </div>
-"""
-        return html
+""",
+        'basic_info': """{stylesheet}<div @root@>
+
+{eyecatch}
+
+<h2 @title@>📅 今日の暦情報</h2>
+
+<div @summary@>
+<p @summary-date@>西暦: {date.year}年{date.month}月{date.day}日（{weekday}曜日）</p>
+<p @summary-lunar@>旧暦: {lunar[month]}月{lunar[day]}日（{lunar[month_name]}）</p>
+<p @summary-item@>六曜: {lunar[rokuyou]}</p>
+<p @summary-item@>月齢: {lunar[age]}（{lunar[phase]}）</p>
+<p @summary-appearance@>{lunar[appearance]}</p>
+<p @summary-sun@>
+<strong>{location}の日の出・日の入り</strong><br>
+日の出: {sun_times[sunrise]} / 日の入り: {sun_times[sunset]}
+</p>
+</div>
+
+<div @terms@>
+<div @terms-block@>
+<p @terms-name@><strong>二十四節気:</strong> {sekki[0]}（{sekki[1]}）</p>
+<p @terms-desc@>{sekki[2]}</p>
+</div>
+<div>
+<p @terms-name@><strong>七十二候:</strong> {kou[0]}（{kou[1]}）</p>
+<p @terms-desc@>{kou[2]}</p>
+</div>
+</div>
+
+<hr @divider@>
+""",
+        'local_note': """
+<div @terms@>
+<p @terms-name@><strong>📍 {location}のこよみ便り</strong></p>
+<div @section-body@>{content}</div>
+</div>
+""",
+        'section': """
+<h3 @section-title@>{title}</h3>
+<div @section@>
+<div @section-body@>{content}</div>
+</div>
+""",
+        'paragraph': "<p @p@>{}</p>",
+        'list_open': "<ul @ul@>",
+        'list_item': "<li @li@>{}</li>",
+        'list_close': "</ul>",
+        'closing': """
+<hr @divider@>
+
+<div @closing@>
+<p @closing-text@>
+季節を感じながら、今日も良い一日をお過ごしください
+</p>
+</div>
+
+</div>""",
+    }
     
-    def _generate_rich_fallback_content(self, lunar, sekki, kou):
-        """充実したフォールバックコンテンツ"""
-        return f"""☀️ 季節の移ろい（二十四節気・七十二候）
+    ATTRIBUTE_PATTERN = re.compile(r'@([a-z0-9-]+)@')
+    
+    _compiled = {}
+    _stylesheet = None
+    
+    @staticmethod
+    def _split_declarations(declarations):
+        """CSS宣言を (固定の宣言, 差し込みを含む宣言) に分ける"""
+        static, dynamic = [], []
+        for declaration in declarations.split(';'):
+            declaration = declaration.strip()
+            if declaration:
+                (dynamic if '{' in declaration else static).append(declaration)
+        return static, dynamic
+    
+    @classmethod
+    def _attribute(cls, name, inline_css):
+        declarations = cls.STYLES[name]
+        if inline_css:
+            return f'style="{declarations}"'
+        
+        _, dynamic = cls._split_declarations(declarations)
+        attribute = f'class="{cls.CLASS_PREFIX}{name}"'
+        if dynamic:
+            attribute += ' style="' + '; '.join(dynamic) + ';"'
+        return attribute
+    
+    @classmethod
+    def compile(cls, inline_css=False):
+        """雛形をコンパイル（CSSの出し方ごとにキャッシュ）"""
+        compiled = cls._compiled.get(inline_css)
+        if compiled is None:
+            replace = lambda match: cls._attribute(match.group(1), inline_css)
+            compiled = {
+                name: cls.ATTRIBUTE_PATTERN.sub(replace, template)
+                for name, template in cls.TEMPLATES.items()
+            }
+            cls._compiled[inline_css] = compiled
+        return compiled
+    
+    @classmethod
+    def stylesheet(cls):
+        """クラス版のスタイルシート（<style>要素、差し込みを含む宣言は除く）"""
+        if cls._stylesheet is None:
+            rules = []
+            for name, declarations in cls.STYLES.items():
+                static, _ = cls._split_declarations(declarations)
+                if static:
+                    body = ';'.join(
+                        prop.strip() + ':' + value.strip()
+                        for prop, value in (declaration.split(':', 1) for declaration in static)
+                    )
+                    rules.append(f'.{cls.CLASS_PREFIX}{name}{{{body}}}')
+            cls._stylesheet = '<style>' + ''.join(rules) + '</style>\n'
+        return cls._stylesheet
+
+
+class BlogEdition:
+    """地域版のブログ（投稿先と、日の出入りを計算する地点・地域の便り）
+
+    節気・候・旧暦・Geminiの本文は全地域で共通で、地域版ごとに変わるのは日の出入りと地域の便りだけ。
+    """
+    
+    def __init__(self, name, blog_id, location='岡山', latitude=AccurateSunCalculator.OKAYAMA[0],
+                 longitude=AccurateSunCalculator.OKAYAMA[1], note=None):
+        self.name = name
+        self.blog_id = blog_id
+        # 投稿に表示する地名
+        self.location = location
+        self.latitude = latitude
+        self.longitude = longitude
+        # 地域の便り（Markdown、投稿の基本情報の後に入れる）
+        self.note = note
+    
+    @classmethod
+    def from_env(cls):
+        """環境変数から地域版の一覧を読み込む
+
+        BLOG_EDITIONS に JSON の配列（またはそのファイルのパス）を指定する。各要素は
+        {"name", "blog_id", "location", "latitude", "longitude", "note"}（name・blog_id 以外は省略可）。
+        未設定なら BLOG_ID の岡山版1つだけ。
+        """
+        value = os.environ.get('BLOG_EDITIONS', '').strip()
+        if not value:
+            blog_id = os.environ.get('BLOG_ID')
+            if not blog_id:
+                raise Exception("BLOG_ID環境変数が設定されていません")
+            return [cls('okayama', blog_id)]
+        
+        if not value.startswith('['):
+            with open(value, encoding='utf-8') as f:
+                value = f.read()
+        try:
+            items = json.loads(value)
+            editions = [cls(**item) for item in items]
+        except (ValueError, TypeError) as e:
+            raise Exception(f"BLOG_EDITIONSの形式が正しくありません: {str(e)}")
+        
+        names = [edition.name for edition in editions]
+        if not editions:
+            raise Exception("BLOG_EDITIONSに地域版がありません")
+        if len(set(names)) != len(names):
+            raise Exception(f"BLOG_EDITIONSの name が重複しています: {', '.join(names)}")
+        missing = [edition.name for edition in editions if not edition.blog_id]
+        if missing:
+            raise Exception(f"blog_id が設定されていない地域版があります: {', '.join(missing)}")
+        return editions
+    
+    @property
+    def coordinates(self):
+        """(緯度, 経度)"""
+        return (self.latitude, self.longitude)
+
+
+class FallbackCorpus:
+    """Geminiの本文が得られないとき（失敗・期限切れ）に使う、七十二候ごとの事前生成の本文
 
-今は二十四節気の「{sekki[0]}」の時期です。この頃は本格的な冬の訪れを感じる季節ですね。
+    候ごとに節気・候の説明と季節の文面を組み合わせたひな形を作っておき、旧暦の部分
+    （{lunar[month]} など）だけを投稿時に埋める。FALLBACK_CORPUS_PATH（既定はキャッシュ
+    ディレクトリの fallback_corpus.json）があれば、その "kou"（候の名称ごと）・"sekki"
+    （節気の名称ごと）の文面を生成したひな形より優先する。--build-fallback-corpus で
+    ひな形を書き出して手直しできる。
+    """
+    
+    # 季節ごとの文面（節気の並び順に6つずつ: 春・夏・秋・冬）
+    SEASONS = (
+        {
+            'name': '春',
+            'mood': 'この頃は寒さが和らぎ、春の訪れを感じる季節ですね。',
+            'creatures': '自然界の生き物たちも目覚め、動き始めています。',
+            'transition': (
+                ('季節の特徴', '日差しが明るくなり、暖かい日が少しずつ増えてきます'),
+                ('自然の変化', '草木が芽吹き、花のつぼみがふくらむ頃です'),
+                ('暮らしの工夫', '寒暖差が大きいので、重ね着で調節したい時期ですね'),
+            ),
+            'farm_intro': 'この時期、農家の方々は田畑の準備や種まきを進めています。',
+            'farm': (
+                ('田起こし', '冬の間に固くなった土を耕し、田植えに備えます'),
+                ('種まき', '夏野菜の苗づくりや稲の種まきが始まります'),
+                ('春野菜の収穫', '菜の花や春キャベツなど、やわらかな野菜が採れます'),
+            ),
+            'customs': (
+                ('春の行事', '節分やひな祭り、お彼岸など、季節の節目の行事が続きます'),
+                ('新しい門出', '入学や就職など、新生活を迎える準備をします'),
+                ('花見', '桜の下に集い、春の訪れを祝います'),
+            ),
+            'nature_intro': '春の自然は日ごとに色づき、やわらかな表情を見せます。',
+            'nature': (
+                ('春の景色', '野山が淡い緑に包まれ、花々が咲き始めます'),
+                ('春の空', '霞や朧月など、春ならではのやわらかな空模様が見られます'),
+                ('動物たちの様子', '鳥のさえずりが増え、虫たちも姿を見せ始めます'),
+            ),
+            'nature_close': '移ろう自然の中に、生命の息吹が感じられます。',
+            'food': (
+                ('春野菜', '菜の花、春キャベツ、新玉ねぎなど、みずみずしい野菜が出回ります'),
+                ('山菜', 'ふきのとう、たらの芽、筍など、ほろ苦い春の味覚を楽しめます'),
+                ('海の幸', '鰆、桜鯛、あさりなど、春の魚介が美味しくなります'),
+            ),
+            'food_close': '旬の食材で、体も春の目覚めを迎えます。',
+            'plants_intro': '春は花々が次々と咲く季節です。',
+            'plants': (
+                ('春の花', '梅、桃、桜と、花の便りが北上していきます'),
+                ('新芽', '木々の新芽が芽吹き、野山が明るい色に変わります'),
+                ('野の花', '菜の花やたんぽぽが道端を彩ります'),
+            ),
+            'plants_close': '芽吹く植物たちから、新しい季節の力を感じられます。',
+            'sky': (
+                ('春の星座', 'しし座やおとめ座が夜空に昇ります'),
+                ('月の満ち欠け', '古くから暦の基準となってきました'),
+                ('朧月夜', '霞にかすむやわらかな月を楽しめる季節です'),
+            ),
+            'craft_intro': '春の訪れを彩る伝統工芸品があります。',
+            'craft': (
+                ('ひな人形', '職人の手で一つひとつ丁寧に作られてきました'),
+                ('職人の技', '丁寧な手仕事が美しい品を生み出します'),
+                ('暮らしの道具', '使うほどに味わいが増す工芸品の魅力があります'),
+            ),
+            'arts': (
+                ('春の舞台', '花の季節に合わせた歌舞伎や能楽の演目が上演されます'),
+                ('地域の芸能', '各地の春祭りで伝統的な舞や音楽が奉納されます'),
+                ('文化の継承', '古くから受け継がれる芸能の美しさを味わえます'),
+            ),
+        },
+        {
+            'name': '夏',
+            'mood': 'この頃は日差しが強まり、夏の盛りへ向かう季節ですね。',
+            'creatures': '自然界の生き物たちも活発に動き回っています。',
+            'transition': (
+                ('季節の特徴', '気温と湿度が上がり、雨の多い時期や猛暑の日が訪れます'),
+                ('自然の変化', '草木が青々と茂り、虫の声がにぎやかになる頃です'),
+                ('暮らしの工夫', 'こまめな水分補給と暑さ対策が大切な時期ですね'),
+            ),
+            'farm_intro': 'この時期、農家の方々は田植えや夏野菜の世話に追われています。',
+            'farm': (
+                ('田植え', '水を張った田に苗を植え、秋の実りを願います'),
+                ('夏野菜の収穫', 'トマトやきゅうり、なすが次々と実ります'),
+                ('草取り', '勢いよく伸びる雑草を取り、作物の育ちを守ります'),
+            ),
+            'customs': (
+                ('衣替え', '夏の装いに改め、涼しく過ごす工夫をします'),
+                ('夏祭り', '各地で祭りや花火大会が開かれます'),
+                ('お盆', 'ご先祖様を迎え、家族で供養する習わしがあります'),
+            ),
+            'nature_intro': '夏の自然は力強く、生命力にあふれた表情を見せます。',
+            'nature': (
+                ('夏の景色', '入道雲が湧き立ち、山々が深い緑に覆われます'),
+                ('夏の空', '夕立や雷など、夏ならではの天気の変化があります'),
+                ('動物たちの様子', '蝉や蛍など、夏の生き物たちの姿が見られます'),
+            ),
+            'nature_close': '厳しい暑さの中にも、生命の輝きがあります。',
+            'food': (
+                ('夏野菜', 'トマト、きゅうり、なす、ゴーヤなど、体を冷やす野菜が豊富です'),
+                ('夏の果物', 'すいか、桃、梅など、みずみずしい果物を楽しめます'),
+                ('涼を呼ぶ料理', '冷やしそうめんや冷奴など、さっぱりした料理が恋しくなります'),
+            ),
+            'food_close': '旬の食材で、夏の暑さを元気に乗り切りましょう。',
+            'plants_intro': '夏は鮮やかな花々が咲き誇る季節です。',
+            'plants': (
+                ('夏の花', '紫陽花、朝顔、向日葵が季節を彩ります'),
+                ('水辺の花', '菖蒲や蓮が水辺に涼しげな花を咲かせます'),
+                ('青葉', '木々が葉を広げ、濃い木陰を作ります'),
+            ),
+            'plants_close': '夏の日差しを受けて育つ植物たちから、生命の勢いを感じられます。',
+            'sky': (
+                ('夏の星座', 'さそり座や夏の大三角が夜空に輝きます'),
+                ('月の満ち欠け', '古くから暦の基準となってきました'),
+                ('七夕', '天の川をはさんで織姫と彦星が輝く季節です'),
+            ),
+            'craft_intro': '夏の暮らしを涼やかにする伝統工芸品があります。',
+            'craft': (
+                ('うちわ・扇子', '竹と和紙で作られ、涼を運んできました'),
+                ('風鈴', 'ガラスや鉄の風鈴が涼しげな音を奏でます'),
+                ('暮らしの道具', '使うほどに味わいが増す工芸品の魅力があります'),
+            ),
+            'arts': (
+                ('夏の舞台', '怪談物の歌舞伎や薪能など、夏ならではの公演があります'),
+                ('盆踊り', '各地で伝統的な踊りや音楽が受け継がれています'),
+                ('文化の継承', '古くから受け継がれる芸能の美しさを味わえます'),
+            ),
+        },
+        {
+            'name': '秋',
+            'mood': 'この頃は暑さが和らぎ、秋の深まりを感じる季節ですね。',
+            'creatures': '自然界の生き物たちも実りの季節を迎えています。',
+            'transition': (
+                ('季節の特徴', '朝夕が涼しくなり、空が高く澄んでいきます'),
+                ('自然の変化', '木々が色づき、虫の音が響く頃です'),
+                ('暮らしの工夫', '寒暖差に備えて体調を整えたい時期ですね'),
+            ),
+            'farm_intro': 'この時期、農家の方々は収穫の最盛期を迎えています。',
+            'farm': (
+                ('稲刈り', '黄金色に実った稲を刈り取り、新米が届きます'),
+                ('秋野菜の収穫', 'さつまいもや里芋など、秋の恵みが採れます'),
+                ('秋まき', '冬から春に収穫する野菜や麦の種をまきます'),
+            ),
+            'customs': (
+                ('お月見', '月見団子やすすきを供え、名月を愛でます'),
+                ('秋祭り', '収穫に感謝する祭りが各地で行われます'),
+                ('お彼岸', 'お墓参りをしてご先祖様を敬います'),
+            ),
+            'nature_intro': '秋の自然は色とりどりの美しい表情を見せます。',
+            'nature': (
+                ('秋の景色', '紅葉が山々を染め、野には秋の草花が揺れます'),
+                ('澄んだ空', '秋晴れの空が高く広がり、鰯雲が浮かびます'),
+                ('動物たちの様子', '渡り鳥が行き交い、虫たちが冬支度を始めます'),
+            ),
+            'nature_close': '深まる秋の中に、しみじみとした美しさがあります。',
+            'food': (
+                ('秋の味覚', '栗、さつまいも、きのこなど、実りの食材が豊富です'),
+                ('海の幸', '秋刀魚、鮭、戻り鰹など、脂ののった魚を楽しめます'),
+                ('新米', '炊きたての新米は、秋ならではのごちそうですね'),
+            ),
+            'food_close': '旬の食材で、実りの秋を味わいましょう。',
+            'plants_intro': '秋は草木が色づき、実を結ぶ季節です。',
+            'plants': (
+                ('秋の花', '萩、桔梗、菊など、秋の七草や菊が咲きます'),
+                ('紅葉', '楓や銀杏が赤や黄に色づきます'),
+                ('木の実', '柿や栗、どんぐりが実り、秋の山を彩ります'),
+            ),
+            'plants_close': '色づく植物たちから、季節の移ろいの美しさを学べます。',
+            'sky': (
+                ('秋の星座', 'ペガスス座やカシオペヤ座が夜空に昇ります'),
+                ('月の満ち欠け', '古くから暦の基準となってきました'),
+                ('名月', '空気が澄み、一年で最も月が美しく見える季節です'),
+            ),
+            'craft_intro': '秋の実りとともに受け継がれてきた伝統工芸品があります。',
+            'craft': (
+                ('漆器', '秋の乾いた空気の中で、丁寧に漆が塗り重ねられます'),
+                ('職人の技', '丁寧な手仕事が美しい品を生み出します'),
+                ('暮らしの道具', '使うほどに味わいが増す工芸品の魅力があります'),
+            ),
+            'arts': (
+                ('秋の舞台', '芸術の秋に歌舞伎や能楽の公演が数多く行われます'),
+                ('地域の芸能', '秋祭りで神楽や獅子舞などが奉納されます'),
+                ('文化の継承', '古くから受け継がれる芸能の美しさを味わえます'),
+            ),
+        },
+        {
+            'name': '冬',
+            'mood': 'この頃は本格的な冬の訪れを感じる季節ですね。',
+            'creatures': '自然界の生き物たちも冬支度を進めています。',
+            'transition': (
+                ('季節の特徴', '寒さが厳しくなり、雪が降る地域も増えてきます'),
+                ('自然の変化', '動物たちが冬眠の準備を始める頃です'),
+                ('暮らしの工夫', '温かく過ごす準備が大切な時期ですね'),
+            ),
+            'farm_intro': 'この時期、農家の方々は冬支度や来年の準備を進めています。',
+            'farm': (
+                ('冬野菜の収穫', '寒さで甘みを増した野菜が美味しい時期です'),
+                ('土作り', '来年の豊作に向けて土壌を整えます'),
+                ('農具の手入れ', '大切な道具を丁寧にメンテナンスします'),
+            ),
+            'customs': (
+                ('冬支度', '家を温かく整える準備をします'),
+                ('年末の準備', '大掃除やお歳暮など、年末に向けた活動が始まります'),
+                ('家族の団らん', '温かい部屋で過ごす時間を大切にします'),
+            ),
+            'nature_intro': '冬の自然は厳しくも美しい表情を見せます。',
+            'nature': (
+                ('冬の景色', '雪化粧をした山々が美しい季節です'),
+                ('澄んだ空気', '遠くまで見渡せる冬晴れの日が増えます'),
+                ('動物たちの様子', '冬を乗り越える生き物たちの姿が見られます'),
+            ),
+            'nature_close': '厳しい自然の中にも、静かな美しさがあります。',
+            'food': (
+                ('冬野菜', '大根、白菜、ネギなど、体を温める野菜が豊富です'),
+                ('海の幸', 'ブリ、カニ、牡蠣など、冬の味覚を楽しめます'),
+                ('鍋料理', '温かい鍋を囲む時間は、冬の楽しみですね'),
+            ),
+            'food_close': '旬の食材で、心も体も温まります。',
+            'plants_intro': '冬でも美しく咲く花々があります。',
+            'plants': (
+                ('冬の花', 'サザンカやツバキが寒さの中で咲きます'),
+                ('常緑樹', '松や杉が緑を保ち、生命力を感じさせます'),
+                ('冬芽', '春への準備を静かに進める植物たちの姿が見られます'),
+            ),
+            'plants_close': '厳しい季節を耐える植物たちから、生命の強さを学べます。',
+            'sky': (
+                ('冬の星座', '空気が澄んで、星が美しく輝きます'),
+                ('月の満ち欠け', '古くから暦の基準となってきました'),
+                ('天体観測', '冬の夜空は観測に最適な季節です'),
+            ),
+            'craft_intro': '冬の間に作られる伝統工芸品があります。',
+            'craft': (
+                ('冬の手仕事', '雪国では室内で工芸品が作られてきました'),
+                ('職人の技', '丁寧な手仕事が美しい品を生み出します'),
+                ('暮らしの道具', '使うほどに味わいが増す工芸品の魅力があります'),
+            ),
+            'arts': (
+                ('年末の興行', '歌舞伎や能楽の特別公演が行われます'),
+                ('地域の芸能', '各地で伝統的な舞や音楽が披露されます'),
+                ('文化の継承', '古くから受け継がれる芸能の美しさを味わえます'),
+            ),
+        },
+    )
+    
+    # 本文のひな形（{{lunar[...]}} は投稿時に埋める）
+    TEMPLATE = """☀️ 季節の移ろい（二十四節気・七十二候）
 
-七十二候では「{kou[0]}」を迎えています。自然界の生き物たちも冬支度を進めています。
+今は二十四節気の「{sekki_name}」の時期です。{sekki_text}
 
-* **季節の特徴**：寒さが厳しくなり、雪が降る地域も増えてきます
-* **自然の変化**：動物たちが冬眠の準備を始める頃です
-* **暮らしの工夫**：温かく過ごす準備が大切な時期ですね
+七十二候では{kou_text}
+
+{transition}
 
 この季節ならではの美しさを感じながら過ごしたいですね。
 
@@ -815,9 +2357,9 @@ class CalendarPostGenerator:
 
 💡 暦にまつわる文化雑学
 
-旧暦{lunar['month']}月は「{lunar['month_name']}」と呼ばれています。この呼び名には深い意味があります。
+旧暦{{lunar[month]}}月は「{{lunar[month_name]}}」と呼ばれています。この呼び名には深い意味があります。
 
-六曜は「{lunar['rokuyou']}」です。古くから日本人の生活に根付いてきた暦の知恵ですね。
+六曜は「{{lunar[rokuyou]}}」です。古くから日本人の生活に根付いてきた暦の知恵ですね。
 
 * **月の呼び名**：季節や自然の様子を表しています
 * **六曜の意味**：日々の吉凶を示す指標として親しまれてきました
@@ -827,11 +2369,9 @@ class CalendarPostGenerator:
 
 🚜 農事歴
 
-この時期、農家の方々は冬支度や来年の準備を進めています。
+{farm_intro}
 
-* **冬野菜の収穫**：寒さで甘みを増した野菜が美味しい時期です
-* **土作り**：来年の豊作に向けて土壌を整えます
-* **農具の手入れ**：大切な道具を丁寧にメンテナンスします
+{farm}
 
 農家の方々の努力が、私たちの食卓を支えています。
 
@@ -839,15 +2379,13 @@ class CalendarPostGenerator:
 
 この季節には、様々な風習やしきたりがあります。
 
-* **冬支度**：家を温かく整える準備をします
-* **年末の準備**：大掃除やお歳暮など、年末に向けた活動が始まります
-* **家族の団らん**：温かい部屋で過ごす時間を大切にします
+{customs}
 
 日本の伝統的な暮らしの知恵が詰まっています。
 
 📚 神話・伝説
 
-旧暦{lunar['month']}月には、興味深い神話や伝説があります。
+旧暦{{lunar[month]}}月には、興味深い神話や伝説があります。
 
 * **神々の物語**：日本各地に伝わる神話が季節と結びついています
 * **自然への畏敬**：自然現象を神秘的に捉えた先人の心が感じられます
@@ -856,278 +2394,1793 @@ class CalendarPostGenerator:
 
 🍁 自然・気象
 
-冬の自然は厳しくも美しい表情を見せます。
+{nature_intro}
 
-* **冬の景色**：雪化粧をした山々が美しい季節です
-* **澄んだ空気**：遠くまで見渡せる冬晴れの日が増えます
-* **動物たちの様子**：冬を乗り越える生き物たちの姿が見られます
+{nature}
 
-厳しい自然の中にも、静かな美しさがあります。
+{nature_close}
 
 🍴 旬の食
 
-冬の食材が美味しい季節です。
+{name}の食材が美味しい季節です。
 
-* **冬野菜**：大根、白菜、ネギなど、体を温める野菜が豊富です
-* **海の幸**：ブリ、カニ、牡蠣など、冬の味覚を楽しめます
-* **鍋料理**：温かい鍋を囲む時間は、冬の楽しみですね
+{food}
 
-旬の食材で、心も体も温まります。
+{food_close}
 
 🌸 季節の草木
 
-冬でも美しく咲く花々があります。
+{plants_intro}
 
-* **冬の花**：サザンカやツバキが寒さの中で咲きます
-* **常緑樹**：松や杉が緑を保ち、生命力を感じさせます
-* **冬芽**：春への準備を静かに進める植物たちの姿が見られます
+{plants}
 
-厳しい季節を耐える植物たちから、生命の強さを学べます。
+{plants_close}
 
 🌕 月や星の暦・天文情報
 
-月齢{lunar['age']}の{lunar['phase']}が見られます。
+月齢{{lunar[age]}}の{{lunar[phase]}}が見られます。
 
-* **冬の星座**：空気が澄んで、星が美しく輝きます
-* **月の満ち欠け**：古くから暦の基準となってきました
-* **天体観測**：冬の夜空は観測に最適な季節です
+{sky}
 
 夜空を見上げて、宇宙の神秘を感じてみましょう。
 
 🎨 伝統工芸
 
-冬の間に作られる伝統工芸品があります。
+{craft_intro}
 
-* **冬の手仕事**：雪国では室内で工芸品が作られてきました
-* **職人の技**：丁寧な手仕事が美しい品を生み出します
-* **暮らしの道具**：使うほどに味わいが増す工芸品の魅力があります
+{craft}
 
 伝統工芸の温もりを感じることができます。
 
 🎼 伝統芸能
 
-冬の季節に楽しめる伝統芸能があります。
+{name}の季節に楽しめる伝統芸能があります。
 
-* **年末の興行**：歌舞伎や能楽の特別公演が行われます
-* **地域の芸能**：各地で伝統的な舞や音楽が披露されます
-* **文化の継承**：古くから受け継がれる芸能の美しさを味わえます
+{arts}
 
 日本の伝統芸能の奥深さに触れる機会ですね。"""
+    
+    _corpus = None
+    
+    @staticmethod
+    def path():
+        """手直しした文面のファイル"""
+        return os.environ.get('FALLBACK_CORPUS_PATH') or os.path.join(CACHE_DIR, 'fallback_corpus.json')
+    
+    @classmethod
+    def render_template(cls, sekki, kou):
+        """節気・候（名称, 読み, 説明）のひな形（七十二候にない節気は冬の文面）"""
+        sekki_names = [data[1] for data in AccurateSolarTermCalculator.SEKKI_DATA]
+        index = sekki_names.index(sekki[0]) if sekki[0] in sekki_names else len(sekki_names) - 1
+        season = cls.SEASONS[index // 6]
+    
+        name, reading, description = kou
+        kou_text = f"「{name}」（{reading}）を迎えています。" if reading else f"「{name}」を迎えています。"
+        kou_text += f"{description}です。" if description else season['creatures']
+        fields = {
+            key: '\n'.join(f"* **{label}**：{text}" for label, text in value) if isinstance(value, tuple) else value
+            for key, value in season.items()
+        }
+        return cls.TEMPLATE.format(
+            sekki_name=sekki[0],
+            sekki_text=f"{sekki[2]}。" if sekki[2] else season['mood'],
+            kou_text=kou_text,
+            **fields
+        )
+    
+    @classmethod
+    def build(cls):
+        """七十二候ごとのひな形 {候の名称: 本文}"""
+        sekki_data = AccurateSolarTermCalculator.SEKKI_DATA
+        return {
+            kou[1]: cls.render_template(sekki_data[i // 3][1:], kou[1:])
+            for i, kou in enumerate(AccurateSolarTermCalculator.KOU_DATA)
+        }
+    
+    @classmethod
+    def load(cls):
+        """生成したひな形と手直しした文面を読み込む（プロセス内で1回だけ）"""
+        if cls._corpus is None:
+            corpus = {'generated': cls.build(), 'kou': {}, 'sekki': {}}
+            path = cls.path()
+            if os.path.exists(path):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        data = json.load(f)
+                    corpus['kou'] = dict(data.get('kou', {}))
+                    corpus['sekki'] = dict(data.get('sekki', {}))
+                except (OSError, ValueError, AttributeError, TypeError) as e:
+                    print(f"⚠️ フォールバックの文面を読み込めませんでした（生成したひな形を使います）: {str(e)}")
+            cls._corpus = corpus
+        return cls._corpus
+    
+    @classmethod
+    def content(cls, lunar, sekki, kou):
+        """その日の本文（手直しした候 → 手直しした節気 → 生成したひな形の順に探す）"""
+        corpus = cls.load()
+        templates = (
+            corpus['kou'].get(kou[0]),
+            corpus['sekki'].get(sekki[0]),
+            corpus['generated'].get(kou[0]) or cls.render_template(sekki, kou)
+        )
+        for template in templates:
+            if not template:
+                continue
+            try:
+                return template.format(lunar=lunar)
+            except (KeyError, IndexError, ValueError, AttributeError) as e:
+                print(f"⚠️ フォールバックの文面の埋め込みに失敗しました（次の候補を使います）: {str(e)}")
+        return ""
+    
+    @classmethod
+    def save(cls, path=None):
+        """生成したひな形を手直し用に書き出す（既存の手直しは残す）"""
+        path = path or cls.path()
+        data = {'kou': {}, 'sekki': {}}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data.update(json.load(f))
+        for name, template in cls.build().items():
+            data['kou'].setdefault(name, template)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        cls._corpus = None
+        return path
 
-        """フォールバックコンテンツ"""
-        return f"""☀️ 季節の移ろい（二十四節気・七十二候）
 
-今は二十四節気の「{sekki[0]}」の時期です。この頃は本格的な冬の訪れを感じる季節ですね。
-
-七十二候では「{kou[0]}」を迎えています。自然界の生き物たちも冬支度を進めています。
-
-* **季節の特徴**：寒さが厳しくなり、雪が降る地域も増えてきます
-* **自然の変化**：動物たちが冬眠の準備を始める頃です
-* **暮らしの工夫**：温かく過ごす準備が大切な時期ですね
-
-この季節ならではの美しさを感じながら過ごしたいですね。
-
-🎌 記念日・祝日
-
-本日は様々な記念日があります。日本の歴史や文化を振り返る良い機会ですね。
-
-* **伝統行事**：各地で季節の行事が行われます
-* **文化的意義**：先人の知恵を学ぶ日でもあります
-
-記念日を通じて、日本の豊かな文化に触れてみましょう。
-
-💡 暦にまつわる文化雑学
-
-旧暦{lunar['month']}月は「{lunar['month_name']}」と呼ばれています。この呼び名には深い意味があります。
-
-六曜は「{lunar['rokuyou']}」です。古くから日本人の生活に根付いてきた暦の知恵ですね。
-
-* **月の呼び名**：季節や自然の様子を表しています
-* **六曜の意味**：日々の吉凶を示す指標として親しまれてきました
-* **暦の知恵**：自然のリズムに合わせた生活の工夫が込められています
-
-暦を通じて、日本の文化の深さを感じることができます。
-
-🚜 農事歴
-
-この時期、農家の方々は冬支度や来年の準備を進めています。
-
-* **冬野菜の収穫**：寒さで甘みを増した野菜が美味しい時期です
-* **土作り**：来年の豊作に向けて土壌を整えます
-* **農具の手入れ**：大切な道具を丁寧にメンテナンスします
-
-農家の方々の努力が、私たちの食卓を支えています。
-
-🏡 日本の風習・しきたり
-
-この季節には、様々な風習やしきたりがあります。
-
-* **冬支度**：家を温かく整える準備をします
-* **年末の準備**：大掃除やお歳暮など、年末に向けた活動が始まります
-* **家族の団らん**：温かい部屋で過ごす時間を大切にします
-
-日本の伝統的な暮らしの知恵が詰まっています。
-
-📚 神話・伝説
-
-旧暦{lunar['month']}月には、興味深い神話や伝説があります。
-
-* **神々の物語**：日本各地に伝わる神話が季節と結びついています
-* **自然への畏敬**：自然現象を神秘的に捉えた先人の心が感じられます
-
-神話を通じて、日本人の自然観を知ることができますね。
-
-🍁 自然・気象
-
-冬の自然は厳しくも美しい表情を見せます。
-
-* **冬の景色**：雪化粧をした山々が美しい季節です
-* **澄んだ空気**：遠くまで見渡せる冬晴れの日が増えます
-* **動物たちの様子**：冬を乗り越える生き物たちの姿が見られます
-
-厳しい自然の中にも、静かな美しさがあります。
-
-🍴 旬の食
-
-冬の食材が美味しい季節です。
-
-* **冬野菜**：大根、白菜、ネギなど、体を温める野菜が豊富です
-* **海の幸**：ブリ、カニ、牡蠣など、冬の味覚を楽しめます
-* **鍋料理**：温かい鍋を囲む時間は、冬の楽しみですね
-
-旬の食材で、心も体も温まります。
-
-🌸 季節の草木
-
-冬でも美しく咲く花々があります。
-
-* **冬の花**：サザンカやツバキが寒さの中で咲きます
-* **常緑樹**：松や杉が緑を保ち、生命力を感じさせます
-* **冬芽**：春への準備を静かに進める植物たちの姿が見られます
-
-厳しい季節を耐える植物たちから、生命の強さを学べます。
-
-🌕 月や星の暦・天文情報
-
-月齢{lunar['age']}の{lunar['phase']}が見られます。
-
-* **冬の星座**：空気が澄んで、星が美しく輝きます
-* **月の満ち欠け**：古くから暦の基準となってきました
-* **天体観測**：冬の夜空は観測に最適な季節です
-
-夜空を見上げて、宇宙の神秘を感じてみましょう。
-
-🎨 伝統工芸
-
-冬の間に作られる伝統工芸品があります。
-
-* **冬の手仕事**：雪国では室内で工芸品が作られてきました
-* **職人の技**：丁寧な手仕事が美しい品を生み出します
-* **暮らしの道具**：使うほどに味わいが増す工芸品の魅力があります
+class CalendarPostGenerator:
+    """暦情報投稿生成"""
+    
+    # 一括生成時の各日の基準時刻（毎日の定期実行と同じ 7:00）
+    POST_HOUR = 7
+    
+    WEEKDAYS = ("月", "火", "水", "木", "金", "土", "日")
+    
+    # Gemini出力のセクション（絵文字: (色, 見出し)）
+    SECTION_CONFIG = {
+        '☀️': ('#fc8181', '季節の移ろい'),
+        '🎌': ('#f6ad55', '記念日・祝日'),
+        '💡': ('#4299e1', '暦にまつわる文化雑学'),
+        '🚜': ('#68d391', '農事歴'),
+        '🏡': ('#9f7aea', '日本の風習・しきたり'),
+        '📚': ('#ed64a6', '神話・伝説'),
+        '🍁': ('#38b2ac', '自然・気象'),
+        '🍴': ('#f56565', '旬の食'),
+        '🌸': ('#f687b3', '季節の草木'),
+        '🌕': ('#4299e1', '月や星の暦・天文情報'),
+        '🎨': ('#ed8936', '伝統工芸'),
+        '🎼': ('#805ad5', '伝統芸能')
+    }
+    
+    # アイキャッチの季節ごとの配色（背景, 主色, アクセント）
+    SEASON_COLORS = {
+        '立春': ('#FFE4E1', '#FF69B4', '#8B008B'),
+        '雨水': ('#E0F2F7', '#4FC3F7', '#0277BD'),
+        '啓蟄': ('#F1F8E9', '#AED581', '#558B2F'),
+        '春分': ('#FFF9C4', '#FFD54F', '#F57C00'),
+        '清明': ('#F3E5F5', '#BA68C8', '#6A1B9A'),
+        '穀雨': ('#E8F5E9', '#66BB6A', '#2E7D32'),
+        '立夏': ('#FFF3E0', '#FFB74D', '#EF6C00'),
+        '小満': ('#E1F5FE', '#4DD0E1', '#0097A7'),
+        '芒種': ('#F1F8E9', '#9CCC65', '#689F38'),
+        '夏至': ('#FFF9C4', '#FFD54F', '#F57C00'),
+        '小暑': ('#FFEBEE', '#EF5350', '#C62828'),
+        '大暑': ('#FBE9E7', '#FF7043', '#D84315'),
+        '立秋': ('#FFF3E0', '#FFB74D', '#EF6C00'),
+        '処暑': ('#FCE4EC', '#F06292', '#C2185B'),
+        '白露': ('#E3F2FD', '#64B5F6', '#1976D2'),
+        '秋分': ('#FFF9C4', '#FFD54F', '#F57C00'),
+        '寒露': ('#EFEBE9', '#BCAAA4', '#5D4037'),
+        '霜降': ('#F3E5F5', '#BA68C8', '#6A1B9A'),
+        '立冬': ('#E3F2FD', '#64B5F6', '#1976D2'),
+        '小雪': ('#ECEFF1', '#90A4AE', '#455A64'),
+        '大雪': ('#E0F7FA', '#4DD0E1', '#00838F'),
+        '冬至': ('#E8EAF6', '#7986CB', '#3949AB'),
+        '小寒': ('#F3E5F5', '#BA68C8', '#6A1B9A'),
+        '大寒': ('#E1F5FE', '#4FC3F7', '#0277BD')
+    }
+    DEFAULT_SEASON_COLORS = ('#E3F2FD', '#64B5F6', '#1976D2')
+    
+    # 太字マークダウン（**text**）
+    BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*')
+    
+    def __init__(self, date=None, astronomy=None, stream=False, inline_css=None, parallel_sections=None, deadline=None):
+        self.jst = ZoneInfo("Asia/Tokyo")
+        self.date = date or datetime.now(self.jst)
+        self.gemini_api_key = os.environ.get('GEMINI_API_KEY')
+        # 事前計算済みの暦情報（一括生成時）
+        self.astronomy = astronomy
+        # Geminiのストリーミング出力を使うか
+        self.stream = stream
+        # CSSを style 属性に展開するか（<style>を使えないフィード向け、既定はクラス＋スタイルシート）
+        if inline_css is None:
+            inline_css = os.environ.get('POST_INLINE_CSS', '0') == '1'
+        self.inline_css = inline_css
+        self.templates = PostTemplates.compile(inline_css)
+        # Geminiへセクションごとに並列にリクエストするか（GEMINI_PARALLEL_SECTIONS=1 でも有効）
+        if parallel_sections is None:
+            parallel_sections = os.environ.get('GEMINI_PARALLEL_SECTIONS', '0') == '1'
+        self.parallel_sections = parallel_sections
+        # Geminiの本文を待つ上限（秒、GEMINI_DEADLINE_SECONDS でも指定可）。過ぎたらフォールバックで投稿する
+        if deadline is None:
+            deadline = float(os.environ.get('GEMINI_DEADLINE_SECONDS', '0')) or None
+        self.deadline = deadline
+        # 期限に間に合わなかったGeminiの本文HTML（Future）と、後から受け取った本文HTML
+        self.late_body = None
+        self.body_html = None
+    
+    @staticmethod
+    def calculate_astronomy(date):
+        """1日分の暦情報を計算"""
+        return {
+            'lunar': AccurateLunarCalendar.calculate_lunar_date(date),
+            'sekki': AccurateSolarTermCalculator.get_current_sekki(date),
+            'kou': AccurateSolarTermCalculator.get_current_kou(date),
+            'sun_times': AccurateSunCalculator.calculate_sunrise_sunset(date)
+        }
+    
+    @staticmethod
+    def calculate_astronomy_range(dates):
+        """複数日の暦情報を一括計算（節気・候・日の出入りは期間全体をまとめて計算）"""
+        sekki_list = AccurateSolarTermCalculator.get_sekki_array(dates)
+        kou_list = AccurateSolarTermCalculator.get_kou_array(dates)
+        sun = AccurateSunCalculator.calculate_sunrise_sunset_batch(dates, [AccurateSunCalculator.OKAYAMA])
+        to_time_string = AccurateSunCalculator.to_time_string
+        
+        return [
+            {
+                'lunar': AccurateLunarCalendar.calculate_lunar_date(date),
+                'sekki': sekki_list[i],
+                'kou': kou_list[i],
+                'sun_times': {
+                    'sunrise': to_time_string(sun['sunrise'][0, i]),
+                    'sunset': to_time_string(sun['sunset'][0, i])
+                }
+            }
+            for i, date in enumerate(dates)
+        ]
+    
+    @classmethod
+    def iter_astronomy_range(cls, start, end, chunk_days=366):
+        """start日からend日まで（両端を含む）の各日の (日時, 暦情報) を順に返す
 
-伝統工芸の温もりを感じることができます。
+        chunk_days 日ずつまとめて計算するため、期間が長くても使うメモリは一定
+        """
+        jst = ZoneInfo("Asia/Tokyo")
+        first = datetime(start.year, start.month, start.day, cls.POST_HOUR, tzinfo=jst)
+        total = (end - start).days + 1
+        
+        for offset in range(0, total, chunk_days):
+            dates = [first + timedelta(days=i) for i in range(offset, min(offset + chunk_days, total))]
+            yield from zip(dates, cls.calculate_astronomy_range(dates))
+    
+    @classmethod
+    def generate_posts(cls, start, end, max_workers=4, requests_per_minute=None, inline_css=None, gemini_batch=False):
+        """start日からend日まで（両端を含む）の投稿を生成し、日付順にできたものから (日時, 投稿) を返す
 
-🎼 伝統芸能
+        Gemini APIへのリクエストは max_workers 件まで並列に送信する。
+        gemini_batch=True ならバッチAPIのジョブでまとめて生成し、全件そろってから返す。
+        """
+        jst = ZoneInfo("Asia/Tokyo")
+        dates = [
+            datetime(start.year, start.month, start.day, cls.POST_HOUR, tzinfo=jst) + timedelta(days=i)
+            for i in range((end - start).days + 1)
+        ]
+        
+        with Tracer.current().span('astronomy', days=len(dates)) as span:
+            if YearlyAlmanac.enabled():
+                print(f"📖 {len(dates)}日分の暦情報を事前計算データから読み込み中...")
+                span.set(source='almanac')
+                astronomy_list = [YearlyAlmanac.lookup(date, hour=cls.POST_HOUR) for date in dates]
+            else:
+                print(f"🔭 {len(dates)}日分の暦情報を一括計算中...")
+                span.set(source='calculate')
+                astronomy_list = cls.calculate_astronomy_range(dates)
+        generators = [cls(date, astronomy, inline_css=inline_css) for date, astronomy in zip(dates, astronomy_list)]
+        
+        api_key = os.environ.get('GEMINI_API_KEY')
+        items = [(date, a['lunar'], a['sekki'], a['kou']) for date, a in zip(dates, astronomy_list)]
+        if api_key and gemini_batch:
+            print(f"🤖 Gemini バッチAPIで{len(dates)}日分を生成中...")
+            gemini = GeminiContentGenerator(api_key, pool_size=1)
+            contents = enumerate(gemini.generate_batch(items))
+        elif api_key:
+            print(f"🤖 Gemini APIで{len(dates)}日分を並列生成中（同時{max_workers}件）...")
+            gemini = GeminiContentGenerator(api_key, pool_size=max_workers)
+            contents = gemini.generate_many(
+                items,
+                max_workers=max_workers,
+                requests_per_minute=requests_per_minute
+            )
+        else:
+            print("エラー: GEMINI_API_KEYが設定されていません")
+            gemini = None
+            contents = enumerate([None] * len(dates))
+        
+        try:
+            for i, content in contents:
+                # 生成失敗は空文字にして再リクエストせずフォールバックさせる
+                yield dates[i], generators[i].generate_post(gemini_content=content or "")
+        finally:
+            if gemini:
+                gemini.print_metrics()
+                gemini.close()
+        
+    def generate_post(self, gemini_content=None):
+        """投稿を生成（gemini_contentを渡した場合はGeminiの呼び出しを省略）"""
+        with Tracer.current().span('post.generate', date=f"{self.date:%Y-%m-%d}") as span:
+            if self.stream and gemini_content is None:
+                full_content = ''.join(self.generate_post_stream())
+            else:
+                full_content = self._generate_content_html(gemini_content)
+            span.set(bytes_out=len(full_content.encode('utf-8')))
+        
+        print(f"投稿HTML: {len(full_content.encode('utf-8')):,}バイト（{'インラインCSS' if self.inline_css else 'CSSクラス'}）")
+        
+        return self._post_data(full_content)
+    
+    def generate_editions(self, editions, gemini_content=None):
+        """地域版ごとの投稿を生成し、editions と同じ順のリストで返す
+
+        暦情報とGeminiの本文は1回だけ生成して全地域版で共有し、
+        地域版ごとには日の出入り（全地点をまとめて計算）と地域の便りだけを差し替える。
+        """
+        with Tracer.current().span('post.editions', date=f"{self.date:%Y-%m-%d}", editions=len(editions)) as span:
+            astronomy = self._get_astronomy()
+            body_html = self._generate_body_html(gemini_content)
+            
+            sun = AccurateSunCalculator.calculate_sunrise_sunset_batch([self.date], [edition.coordinates for edition in editions])
+            to_time_string = AccurateSunCalculator.to_time_string
+            
+            posts = []
+            for i, edition in enumerate(editions):
+                local_astronomy = dict(astronomy, sun_times={
+                    'sunrise': to_time_string(sun['sunrise'][i, 0]),
+                    'sunset': to_time_string(sun['sunset'][i, 0])
+                })
+                content = (
+                    self._render_basic_info(local_astronomy, edition.location)
+                    + self._render_local_note(edition)
+                    + body_html
+                    + self.templates['closing']
+                )
+                print(f"投稿HTML（{edition.name}）: {len(content.encode('utf-8')):,}バイト")
+                posts.append(self._post_data(content))
+            span.set(bytes_out=sum(len(post['content'].encode('utf-8')) for post in posts))
+        return posts
+    
+    def _post_data(self, content):
+        """タイトル・ラベルを付けた投稿データ"""
+        weekday = self.WEEKDAYS[self.date.weekday()]
+        return {
+            'title': f'{self.date.year}年{self.date.month}月{self.date.day}日({weekday})の暦情報',
+            'content': content,
+            'labels': ['暦', '二十四節気', '旧暦', '季節', '七十二候', '農事歴', '風習', '伝統文化', '行事食', '天文', '神話', '伝統芸能']
+        }
+    
+    def _get_astronomy(self):
+        """暦情報（渡されていなければ年ごとの事前計算データから引き、無効なら計算）"""
+        if self.astronomy is None:
+            with Tracer.current().span('astronomy', days=1) as span:
+                if YearlyAlmanac.enabled():
+                    span.set(source='almanac')
+                    self.astronomy = YearlyAlmanac.lookup(self.date, hour=self.POST_HOUR)
+                else:
+                    span.set(source='calculate')
+                    self.astronomy = self.calculate_astronomy(self.date)
+        return self.astronomy
+    
+    def _generate_content_html(self, gemini_content=None):
+        """本文HTMLを生成（Geminiの出力をまとめて受け取ってから整形）"""
+        basic_info = self._render_basic_info(self._get_astronomy())
+        return basic_info + self._generate_body_html(gemini_content) + self.templates['closing']
+    
+    def _generate_body_html(self, gemini_content=None):
+        """Geminiの本文（地点によらない部分）を生成してHTMLに整形"""
+        astronomy = self._get_astronomy()
+        lunar = astronomy['lunar']
+        sekki = astronomy['sekki']
+        kou = astronomy['kou']
+        
+        if gemini_content is None and self.body_html is not None:
+            return self.body_html
+        
+        if gemini_content is None and self.deadline and self.gemini_api_key:
+            gemini_html = self._generate_with_deadline(lunar, sekki, kou)
+            if gemini_html:
+                return gemini_html
+            # 期限切れ・失敗はGeminiを呼び直さずフォールバック
+            gemini_content = ""
+        
+        if gemini_content is None and self.parallel_sections and self.gemini_api_key:
+            return self._generate_sections_html(lunar, sekki, kou)
+        
+        # Geminiでコンテンツ生成
+        if gemini_content is None:
+            print("\n" + "="*70)
+            print("Gemini APIでコンテンツを生成中...")
+            print("="*70)
+            
+            if not self.gemini_api_key:
+                print("エラー: GEMINI_API_KEYが設定されていません")
+            else:
+                generator = GeminiContentGenerator(self.gemini_api_key, pool_size=1)
+                gemini_content = generator.generate_content(self.date, lunar, sekki, kou)
+                generator.print_metrics()
+                generator.close()
+        
+        if not gemini_content:
+            print("\n警告: Geminiコンテンツの生成に失敗しました。")
+            print("フォールバックコンテンツを使用します。")
+            gemini_content = self._generate_rich_fallback_content(lunar, sekki, kou)
+        
+        # HTML整形
+        print("\nHTML整形処理を開始...")
+        gemini_html = self._format_gemini_content_to_html(gemini_content)
+        print(f"整形後のHTML長: {len(gemini_html)}文字")
+        
+        return gemini_html
+    
+    def _generate_gemini_html(self, lunar, sekki, kou):
+        """Geminiの本文を生成して整形（失敗したらNone）"""
+        if self.parallel_sections:
+            return self._generate_sections_html(lunar, sekki, kou)
+        
+        generator = GeminiContentGenerator(self.gemini_api_key, pool_size=1)
+        try:
+            gemini_content = generator.generate_content(self.date, lunar, sekki, kou)
+        finally:
+            generator.print_metrics()
+            generator.close()
+        return self._format_gemini_content_to_html(gemini_content) or None
+    
+    def _generate_with_deadline(self, lunar, sekki, kou):
+        """Geminiの本文を self.deadline 秒まで待つ（間に合わなければNoneを返し、生成は裏で続けて late_body で受け取る）"""
+        from concurrent.futures import Future, TimeoutError
+        
+        print("\n" + "="*70)
+        print(f"Gemini APIでコンテンツを生成中...（{self.deadline:g}秒まで待ちます）")
+        print("="*70)
+        
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(self._generate_gemini_html(lunar, sekki, kou))
+            except Exception as e:
+                future.set_exception(e)
+        
+        # 期限後も投稿・終了を妨げないようデーモンスレッドで生成する
+        threading.Thread(target=run, name='gemini-deadline', daemon=True).start()
+        with Tracer.current().span('gemini.deadline', seconds=self.deadline) as span:
+            try:
+                gemini_html = future.result(timeout=self.deadline)
+            except TimeoutError:
+                span.set(missed=True)
+                print(f"\n⏰ {self.deadline:g}秒以内にGeminiの本文が届かないため、フォールバックコンテンツで投稿します")
+                self.late_body = future
+                return None
+            except Exception as e:
+                span.fail(str(e))
+                print(f"\nGemini APIエラー: {str(e)}")
+                return None
+            span.set(missed=False)
+        return gemini_html
+    
+    def wait_late_body(self, timeout=None):
+        """期限に間に合わなかったGeminiの本文を待って受け取る（以後の生成で使う。得られなければFalse）"""
+        from concurrent.futures import TimeoutError
+        
+        if self.late_body is None:
+            return False
+        with Tracer.current().span('gemini.late') as span:
+            try:
+                gemini_html = self.late_body.result(timeout=timeout)
+            except TimeoutError:
+                span.fail("timeout")
+                return False
+            except Exception as e:
+                span.fail(str(e))
+                print(f"\nGemini APIエラー: {str(e)}")
+                return False
+            if not gemini_html:
+                span.fail("empty")
+                return False
+        self.body_html = gemini_html
+        self.late_body = None
+        return True
+    
+    def _generate_sections_html(self, lunar, sekki, kou):
+        """セクションごとにGeminiへ並列にリクエストして整形（失敗したセクションだけフォールバック）"""
+        print("\n" + "="*70)
+        print(f"Gemini APIで{len(self.SECTION_CONFIG)}セクションを並列生成中...")
+        print("="*70)
+        
+        with Tracer.current().span('gemini.sections', sections=len(self.SECTION_CONFIG)) as span:
+            generator = GeminiContentGenerator(self.gemini_api_key, pool_size=len(self.SECTION_CONFIG))
+            try:
+                texts = generator.generate_sections(self.date, lunar, sekki, kou, list(self.SECTION_CONFIG))
+            finally:
+                generator.print_metrics()
+                generator.close()
+            
+            parts = {}
+            for emoji, text in texts.items():
+                if not text:
+                    continue
+                html = self._parse_section(emoji, text)
+                if html is None:
+                    # 見出し行がなければ補う
+                    html = self._parse_section(emoji, f"{emoji} {self.SECTION_CONFIG[emoji][1]}\n\n{text}")
+                if html:
+                    parts[emoji] = html
+            
+            failed = [emoji for emoji in self.SECTION_CONFIG if emoji not in parts]
+            span.set(failed=len(failed))
+            if failed:
+                print(f"\n警告: {len(failed)}セクション（{' '.join(failed)}）の生成に失敗しました。フォールバックコンテンツで補います。")
+                fallback = SectionStreamParser(self)
+                fallback_content = self._generate_rich_fallback_content(lunar, sekki, kou)
+                for emoji, html in fallback.feed(fallback_content) + fallback.close():
+                    if emoji in failed:
+                        parts.setdefault(emoji, html)
+        
+        gemini_html = ''.join(parts.get(emoji, '') for emoji in self.SECTION_CONFIG)
+        print(f"整形後のHTML長: {len(gemini_html)}文字")
+        return gemini_html
+    
+    def _parse_section(self, emoji, text):
+        """1セクション分の出力を整形（ほかのセクションが混ざっていれば捨てる、見出しがなければNone）"""
+        parser = SectionStreamParser(self)
+        for found, html in parser.feed(text) + parser.close():
+            if found == emoji:
+                return html
+        return None
+    
+    def generate_post_stream(self):
+        """本文HTMLを完成した部分から順に返す（Geminiのストリーミング出力をセクション単位で整形）"""
+        astronomy = self._get_astronomy()
+        lunar = astronomy['lunar']
+        sekki = astronomy['sekki']
+        kou = astronomy['kou']
+        
+        yield self._render_basic_info(astronomy)
+        
+        print("\n" + "="*70)
+        print("Gemini APIでコンテンツをストリーミング生成中...")
+        print("="*70)
+        
+        parser = SectionStreamParser(self, stop_when_complete=True)
+        if not self.gemini_api_key:
+            print("エラー: GEMINI_API_KEYが設定されていません")
+        else:
+            generator = GeminiContentGenerator(self.gemini_api_key, pool_size=1)
+            try:
+                for chunk in generator.generate_content_stream(self.date, lunar, sekki, kou):
+                    for emoji, html in parser.feed(chunk):
+                        print(f"  {emoji} {self.SECTION_CONFIG[emoji][1]} を整形しました")
+                        yield html
+                    if parser.finished:
+                        print("全セクションを受信したためストリームを終了します")
+                        break
+                for emoji, html in parser.close():
+                    print(f"  {emoji} {self.SECTION_CONFIG[emoji][1]} を整形しました")
+                    yield html
+            finally:
+                generator.print_metrics()
+                generator.close()
+        
+        # 受信できなかったセクションはフォールバックで補う
+        if len(set(parser.emitted)) < len(self.SECTION_CONFIG):
+            print("\n警告: 一部のセクションを受信できませんでした。フォールバックコンテンツで補います。")
+            fallback = SectionStreamParser(self)
+            fallback_content = self._generate_rich_fallback_content(lunar, sekki, kou)
+            for emoji, html in fallback.feed(fallback_content) + fallback.close():
+                if emoji not in parser.emitted:
+                    yield html
+        
+        yield self.templates['closing']
+    
+    def _render_basic_info(self, astronomy, location='岡山'):
+        """基本情報セクション（プログラムで生成、日の出入りは location の地名で表示）"""
+        lunar = astronomy['lunar']
+        sekki = astronomy['sekki']
+        kou = astronomy['kou']
+        sun_times = astronomy['sun_times']
+        weekday = self.WEEKDAYS[self.date.weekday()]
+        
+        # アイキャッチ画像を生成
+        eyecatch_html = self._generate_eyecatch_image(sekki, kou, lunar)
+        
+        return self.templates['basic_info'].format(
+            stylesheet='' if self.inline_css else PostTemplates.stylesheet(),
+            eyecatch=eyecatch_html,
+            date=self.date,
+            weekday=weekday,
+            lunar=lunar,
+            location=location,
+            sun_times=sun_times,
+            sekki=sekki,
+            kou=kou
+        )
+    
+    def _render_local_note(self, edition):
+        """地域の便り（空行区切りの段落、**太字** に対応。なければ空文字）"""
+        if not edition.note:
+            return ""
+        paragraphs = [
+            self.templates['paragraph'].format(self._process_bold(' '.join(line.strip() for line in block.splitlines())))
+            for block in re.split(r'\n\s*\n', edition.note.strip())
+        ]
+        return self.templates['local_note'].format(location=edition.location, content=''.join(paragraphs))
+    
+    def _format_gemini_content_to_html(self, content):
+        """GeminiコンテンツをHTML形式に整形（Markdown対応版）"""
+        if not content:
+            return ""
+        
+        with Tracer.current().span('format', bytes_in=len(content.encode('utf-8'))) as span:
+            parser = SectionStreamParser(self)
+            parts = parser.feed(content) + parser.close()
+            html = ''.join(html for _, html in parts)
+            span.set(bytes_out=len(html.encode('utf-8')))
+        return html
+    
+    def _process_bold(self, text):
+        """太字マークダウン（**text**）をHTMLに変換"""
+        return self.BOLD_PATTERN.sub(r'<strong>\1</strong>', text)
+    
+    def _create_section_html(self, line_with_emoji, content, color):
+        """セクションのHTMLを生成"""
+        return self.templates['section'].format(title=line_with_emoji, content=content, color=color)
+    
+    def _generate_eyecatch_image(self, sekki, kou, lunar):
+        """アイキャッチ画像をSVGで生成"""
+        bg_color, primary_color, accent_color = self.SEASON_COLORS.get(sekki[0], self.DEFAULT_SEASON_COLORS)
+        
+        # HTMLとして直接レンダリング可能な画像を生成
+        return self.templates['eyecatch'].format(
+            bg_color=bg_color,
+            primary_color=primary_color,
+            accent_color=accent_color,
+            sekki=sekki,
+            kou=kou,
+            lunar=lunar,
+            date=self.date
+        )
+    
+    def _generate_rich_fallback_content(self, lunar, sekki, kou):
+        """充実したフォールバックコンテンツ（七十二候ごとの事前生成の本文）"""
+        return FallbackCorpus.content(lunar, sekki, kou)
 
-冬の季節に楽しめる伝統芸能があります。
 
-* **年末の興行**：歌舞伎や能楽の特別公演が行われます
-* **地域の芸能**：各地で伝統的な舞や音楽が披露されます
-* **文化の継承**：古くから受け継がれる芸能の美しさを味わえます
+class SectionStreamParser:
+    """Geminiの出力を1回の走査で解析し、セクションが閉じた時点でHTMLを返す
 
-日本の伝統芸能の奥深さに触れる機会ですね。"""
+    各行をコンパイル済みの正規表現1つで見出し・箇条書き・段落に分類し、そのままHTMLを組み立てる。
+    次のセクションの絵文字見出しが届いた時点で、直前のセクションを確定する。
+    stop_when_complete=True なら、全セクションの出力後に再び見出しが現れた時点で以降を読み捨てる（finished）。
+    """
+    
+    # 1行を 見出し（header）/ 箇条書き（item）/ 段落（text）のいずれかとして読む
+    LINE_PATTERN = re.compile(
+        r'[^\S\n]*(?:'
+        r'(?P<header>' + '|'.join(re.escape(emoji) for emoji in CalendarPostGenerator.SECTION_CONFIG) + r')[^\n]*'
+        r'|[*-] (?=[^\n]*\S)(?P<item>[^\n]*)'
+        r'|(?P<text>[^\n]*)'
+        r')\n?'
+    )
+    
+    def __init__(self, formatter, stop_when_complete=False):
+        # HTMLの雛形と _process_bold / _create_section_html を持つ CalendarPostGenerator
+        self.formatter = formatter
+        self.stop_when_complete = stop_when_complete
+        self.emitted = []
+        self.finished = False
+        self._buffer = ''
+        self._current = None
+        self._reset_body()
+    
+    def feed(self, text):
+        """テキスト片を追加し、確定したセクションの (絵文字, HTML) のリストを返す"""
+        self._buffer += text
+        end = self._buffer.rfind('\n') + 1
+        if not end:
+            return []
+        chunk, self._buffer = self._buffer[:end], self._buffer[end:]
+        return self._scan(chunk)
+    
+    def close(self):
+        """残りを処理して最後のセクションを確定する"""
+        parts = []
+        if self._buffer:
+            parts = self._scan(self._buffer)
+            self._buffer = ''
+        if not self.finished:
+            parts.extend(self._flush())
+        self.finished = True
+        return parts
+    
+    def _scan(self, text):
+        parts = []
+        sections = CalendarPostGenerator.SECTION_CONFIG
+        
+        # 太字は行をまたがないため、まとめて1回で変換する
+        if '**' in text:
+            text = self.formatter._process_bold(text)
+        
+        for match in self.LINE_PATTERN.finditer(text):
+            if self.finished:
+                break
+            kind = match.lastgroup
+            
+            if kind == 'header':
+                # 前のセクションを確定
+                parts.extend(self._flush())
+                if self.stop_when_complete and len(self.emitted) == len(sections):
+                    self.finished = True
+                    break
+                
+                # 新しいセクション開始
+                self._current = match.group('header')
+                self._reset_body()
+            
+            elif kind == 'item':
+                self._add_item(match.group('item').strip())
+            
+            else:
+                line = match.group('text').strip()
+                if line:
+                    self._add_text(line)
+        
+        return parts
+    
+    def _reset_body(self):
+        self._body = []
+        self._paragraph = []
+        self._in_list = False
+    
+    def _close_paragraph(self):
+        if self._paragraph:
+            self._body.append(self.formatter.templates['paragraph'].format(''.join(self._paragraph)))
+            self._paragraph = []
+    
+    def _close_list(self):
+        if self._in_list:
+            self._body.append(self.formatter.templates['list_close'])
+            self._in_list = False
+    
+    def _add_item(self, text):
+        # 段落を閉じてリスト項目を追加
+        self._close_paragraph()
+        if not self._in_list:
+            self._body.append(self.formatter.templates['list_open'])
+            self._in_list = True
+        self._body.append(self.formatter.templates['list_item'].format(text))
+    
+    def _add_text(self, text):
+        # リストを閉じて段落に追加
+        self._close_list()
+        if self._paragraph:
+            self._paragraph.append(' ')
+        self._paragraph.append(text)
+    
+    def _flush(self):
+        if not self._current or not (self._body or self._paragraph):
+            return []
+        
+        self._close_list()
+        self._close_paragraph()
+        
+        emoji = self._current
+        color, name = CalendarPostGenerator.SECTION_CONFIG[emoji]
+        html = self.formatter._create_section_html(
+            line_with_emoji=f"{emoji} {name}",
+            content=''.join(self._body),
+            color=color
+        )
+        self.emitted.append(emoji)
+        self._current = None
+        self._reset_body()
+        return [(emoji, html)]
+
+
+class PostIndex:
+    """投稿済み記事のローカル索引（ブログ・日付ごとの投稿ID・内容ハッシュをJSONで保存）
+
+    再実行時に、内容が同じ投稿は送信せず、変わった投稿は更新、未投稿のものだけを新規作成するために使う。
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'post_index.json')
+        self._entries = None
+        # 地域版を並列に投稿するスレッドから同時に読み書きされる
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def from_env(cls):
+        """環境変数から設定（POST_INDEX=0 で無効、POST_INDEX_PATH で保存先を指定）"""
+        if os.environ.get('POST_INDEX') == '0':
+            return None
+        return cls(os.environ.get('POST_INDEX_PATH'))
+    
+    @staticmethod
+    def content_hash(title, content, labels):
+        """投稿内容のハッシュ"""
+        payload = json.dumps({'title': title, 'content': content, 'labels': labels}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _load(self):
+        with self._lock:
+            if self._entries is None:
+                self._entries = {}
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        data = json.load(f)
+                    if data.get('version') == self.VERSION:
+                        self._entries = data['blogs']
+                except FileNotFoundError:
+                    pass
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"投稿索引の読み込みに失敗: {str(e)}")
+            return self._entries
+    
+    def get(self, blog_id, date):
+        """指定日の投稿の {'post_id', 'hash', 'url', 'published'}（なければNone）"""
+        return self._load().get(blog_id, {}).get(f"{date:%Y-%m-%d}")
+    
+    def put(self, blog_id, date, post_id, content_hash, url=None, published=True):
+        """指定日の投稿を記録（save() で書き出す）"""
+        with self._lock:
+            self._load().setdefault(blog_id, {})[f"{date:%Y-%m-%d}"] = {
+                'post_id': post_id, 'hash': content_hash, 'url': url, 'published': published
+            }
+    
+    def save(self):
+        """索引をファイルに書き出す"""
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.VERSION, 'blogs': self._load()}, f, ensure_ascii=False, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"投稿索引の保存に失敗: {str(e)}")
 
 
 class BloggerPoster:
     """Blogger投稿クラス"""
     
-    def __init__(self):
+    # バッチ1回に含めるリクエスト数
+    BATCH_SIZE = 50
+    # バッチで失敗した項目だけを再送する回数と、最初の再送までの待ち時間（秒、以後は倍に延ばす）
+    BATCH_RETRIES = 3
+    BATCH_RETRY_SECONDS = 2
+    # 再送する一時的なエラー
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    # リフレッシュ済みアクセストークンのキャッシュ（リフレッシュトークン等の秘密情報は保存しない）。
+    # アクセストークンの有効期限は1時間なので、効くのは同じホストで繰り返し実行する場合だけ。
+    # 毎回新しいランナーで1日1回動く GitHub Actions では次の実行まで残らず、残しても期限切れになる
+    TOKEN_CACHE_PATH = os.path.join(CACHE_DIR, 'google_token.json')
+    
+    def __init__(self, index=None):
         self.credentials = None
         self.service = None
+        # 投稿済み記事の索引（PostIndex、Noneなら毎回新規投稿）
+        self.index = index
         
     def authenticate(self):
         """Google APIの認証"""
-        creds = None
-        
-        if os.environ.get('GOOGLE_TOKEN'):
-            token_data = json.loads(os.environ['GOOGLE_TOKEN'])
-            creds = Credentials.from_authorized_user_info(token_data, SCOPES)
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
         
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
+        with Tracer.current().span('blogger.auth') as span:
+            creds = None
+            
+            token_data = None
+            
+            if os.environ.get('GOOGLE_TOKEN'):
+                token_data = json.loads(os.environ['GOOGLE_TOKEN'])
+                creds = Credentials.from_authorized_user_info(self._load_cached_token(token_data), SCOPES)
+            
+            if creds and creds.valid:
+                print("🔑 キャッシュ済みのアクセストークンを使用します")
+                span.set(token='cached')
             else:
-                if os.environ.get('GOOGLE_CREDENTIALS'):
-                    creds_data = json.loads(os.environ['GOOGLE_CREDENTIALS'])
-                    flow = InstalledAppFlow.from_client_config(creds_data, SCOPES)
-                    creds = flow.run_local_server(port=0)
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                    span.set(token='refreshed')
+                    self._save_cached_token(token_data, creds)
                 else:
-                    raise Exception("認証情報が見つかりません")
-        
-        self.credentials = creds
-        self.service = build('blogger', 'v3', credentials=creds)
+                    if os.environ.get('GOOGLE_CREDENTIALS'):
+                        creds_data = json.loads(os.environ['GOOGLE_CREDENTIALS'])
+                        from google_auth_oauthlib.flow import InstalledAppFlow
+                        flow = InstalledAppFlow.from_client_config(creds_data, SCOPES)
+                        creds = flow.run_local_server(port=0)
+                        span.set(token='oauth_flow')
+                    else:
+                        raise Exception("認証情報が見つかりません")
+            
+            self.credentials = creds
+            # ディスカバリードキュメントはライブラリ同梱のものを使う（ネットワークから取得しない）
+            self.service = build('blogger', 'v3', credentials=creds, static_discovery=True, cache_discovery=False)
+    
+    @staticmethod
+    def _token_fingerprint(token_data):
+        """認証情報（クライアントID・リフレッシュトークン）の識別用ハッシュ"""
+        key = f"{token_data.get('client_id')}:{token_data.get('refresh_token')}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def _load_cached_token(self, token_data):
+        """同じ認証情報でリフレッシュ済みのアクセストークンがあれば token_data に反映"""
+        if os.environ.get('GOOGLE_TOKEN_CACHE') == '0':
+            return token_data
+        try:
+            with open(self.TOKEN_CACHE_PATH, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return token_data
         
-    def post_to_blog(self, blog_id, title, content, labels):
-        """Bloggerに投稿"""
+        # GOOGLE_TOKEN が差し替えられていれば使わない
+        if cached.get('fingerprint') != self._token_fingerprint(token_data):
+            return token_data
+        return dict(token_data, token=cached.get('token'), expiry=cached.get('expiry'))
+    
+    def _save_cached_token(self, token_data, creds):
+        """リフレッシュしたアクセストークンを有効期限とともに保存（所有者のみ読み書き可）"""
+        if os.environ.get('GOOGLE_TOKEN_CACHE') == '0' or not token_data or not creds.expiry:
+            return
         try:
-            post = {
-                'kind': 'blogger#post',
-                'title': title,
-                'content': content,
-                'labels': labels
-            }
+            directory = os.path.dirname(self.TOKEN_CACHE_PATH)
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            tmp_path = f"{self.TOKEN_CACHE_PATH}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'fingerprint': self._token_fingerprint(token_data),
+                    'token': creds.token,
+                    'expiry': creds.expiry.strftime('%Y-%m-%dT%H:%M:%SZ')
+                }, f)
+            os.replace(tmp_path, self.TOKEN_CACHE_PATH)
+        except OSError as e:
+            print(f"アクセストークンの保存に失敗: {str(e)}")
+        
+    def post_to_blog(self, blog_id, title, content, labels, date=None, post_id=None):
+        """Bloggerに投稿（date を渡すと索引を使い、同じ内容なら送信せず、変わっていれば既存の投稿を更新。
+        post_id を渡すと索引によらずその投稿を更新）"""
+        from googleapiclient.errors import HttpError
+        
+        with Tracer.current().span('blogger.post', blog_id=blog_id, bytes_out=len(content.encode('utf-8'))) as span:
+            try:
+                post = {
+                    'kind': 'blogger#post',
+                    'title': title,
+                    'content': content,
+                    'labels': labels
+                }
+                
+                use_index = self.index is not None and date is not None
+                entry = self.index.get(blog_id, date) if use_index else None
+                if post_id and (entry is None or entry['post_id'] != post_id):
+                    entry = {'post_id': post_id, 'hash': None, 'url': None, 'published': True}
+                content_hash = PostIndex.content_hash(title, content, labels)
+                
+                if entry and entry['hash'] == content_hash and entry['published']:
+                    span.set(action='skip')
+                    print(f"\n⏭️  変更なしのためスキップ: {entry['url']}")
+                    return {'id': entry['post_id'], 'url': entry['url']}
+                
+                response = None
+                if entry:
+                    span.set(action='patch')
+                    try:
+                        response = self.service.posts().patch(blogId=blog_id, postId=entry['post_id'], body=post).execute()
+                        if not entry['published']:
+                            response = self.service.posts().publish(blogId=blog_id, postId=entry['post_id']).execute()
+                        print(f"\n✅ 更新成功: {response.get('url')}")
+                    except HttpError as e:
+                        if e.resp.status != 404:
+                            raise
+                        print("\n⚠️  索引にある投稿が見つからないため新規に投稿します")
+                
+                if response is None:
+                    span.set(action='insert')
+                    request = self.service.posts().insert(blogId=blog_id, body=post)
+                    response = request.execute()
+                    print(f"\n✅ 投稿成功: {response.get('url')}")
+                
+                if use_index:
+                    self.index.put(blog_id, date, response['id'], content_hash, response.get('url'))
+                    self.index.save()
+                return response
+                
+            except Exception as e:
+                print(f"\n❌ 投稿エラー: {str(e)}")
+                if isinstance(e, HttpError):
+                    span.set(http_status=e.resp.status)
+                raise
+    
+    def clone(self):
+        """同じ認証情報・索引を使う別のクライアント（APIクライアントはスレッド間で共有できないため）"""
+        from googleapiclient.discovery import build
+        
+        poster = BloggerPoster(index=self.index)
+        poster.credentials = self.credentials
+        poster.service = build('blogger', 'v3', credentials=self.credentials, static_discovery=True, cache_discovery=False)
+        return poster
+    
+    def post_editions(self, editions, posts, date=None, max_workers=4, post_ids=None):
+        """地域版ごとの投稿をそれぞれのブログに並列に投稿（1件の失敗で他の地域版は止めない）
+
+        Args:
+            editions: BlogEdition のリスト
+            posts: editions と同じ順の投稿データ（'title', 'content', 'labels'）
+            date: 投稿日（索引の照合に使う）
+            max_workers: 同時に投稿するブログ数の上限
+            post_ids: editions と同じ順の更新する投稿のID（新規に投稿する地域版は None）
+        Returns:
+            各地域版の {'edition', 'post_id', 'url', 'error'} のリスト
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        local = threading.local()
+        
+        def post(edition, post_data, post_id):
+            # スレッドごとにクライアントを作って使い回す
+            if getattr(local, 'poster', None) is None:
+                local.poster = self.clone()
+            return local.poster.post_to_blog(
+                edition.blog_id, post_data['title'], post_data['content'], post_data['labels'], date=date, post_id=post_id
+            )
+        
+        print(f"\n📤 {len(editions)}件の地域版を投稿中（同時{max_workers}件）...")
+        results = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(post, edition, post_data, post_id)
+                for edition, post_data, post_id in zip(editions, posts, post_ids or [None] * len(editions))
+            ]
+            for edition, future in zip(editions, futures):
+                try:
+                    response = future.result()
+                    results.append({'edition': edition.name, 'post_id': response.get('id'), 'url': response.get('url'), 'error': None})
+                except Exception as e:
+                    results.append({'edition': edition.name, 'post_id': None, 'url': None, 'error': str(e)})
+        
+        for result in results:
+            if result['error']:
+                print(f"  ❌ {result['edition']}: {result['error']}")
+            else:
+                print(f"  ✅ {result['edition']}: {result['url']}")
+        return results
+    
+    def _is_retryable(self, exception):
+        """再送すれば成功しうるエラーか"""
+        from googleapiclient.errors import HttpError
+        
+        if isinstance(exception, HttpError):
+            return exception.resp.status in self.RETRY_STATUSES
+        return True
+    
+    def _execute_batch(self, make_requests, label):
+        """{ID: リクエストを作る関数} をバッチで送信し、一時的なエラーの項目だけを再送
+
+        Returns:
+            (成功した項目の {ID: レスポンス}, 失敗した項目の {ID: 例外})
+        """
+        with Tracer.current().span('blogger.batch', label=label, items=len(make_requests)) as span:
+            responses = {}
+            errors = {}
+            pending = list(make_requests)
             
-            request = self.service.posts().insert(blogId=blog_id, body=post)
-            response = request.execute()
+            def callback(request_id, response, exception):
+                if exception is None:
+                    responses[request_id] = response
+                else:
+                    errors[request_id] = exception
             
-            print(f"\n✅ 投稿成功: {response.get('url')}")
-            return response
+            for attempt in range(self.BATCH_RETRIES + 1):
+                if attempt:
+                    wait = self.BATCH_RETRY_SECONDS * 2 ** (attempt - 1)
+                    print(f"  🔁 {label}: 失敗した{len(pending)}件を{wait}秒後に再送します（{attempt}/{self.BATCH_RETRIES}回目）")
+                    time.sleep(wait)
+                
+                for request_id in pending:
+                    errors.pop(request_id, None)
+                
+                for i in range(0, len(pending), self.BATCH_SIZE):
+                    chunk = pending[i:i + self.BATCH_SIZE]
+                    batch = self.service.new_batch_http_request(callback=callback)
+                    for request_id in chunk:
+                        batch.add(make_requests[request_id](), request_id=request_id)
+                    try:
+                        batch.execute()
+                    except Exception as e:
+                        # バッチ自体の送信失敗はチャンク内の全項目の失敗として扱う
+                        for request_id in chunk:
+                            if request_id not in responses:
+                                errors[request_id] = e
+                
+                pending = [
+                    request_id for request_id in pending
+                    if request_id in errors and self._is_retryable(errors[request_id])
+                ]
+                if not pending:
+                    break
             
-        except Exception as e:
-            print(f"\n❌ 投稿エラー: {str(e)}")
-            raise
+            span.set(retries=attempt)
+            if errors:
+                span.fail(f"{len(errors)}件失敗")
+        
+        return responses, errors
+    
+    def publish_batch(self, blog_id, posts):
+        """複数の投稿をバッチAPIでまとめて送信（下書きとして作成し、publish_at の日時で公開予約）
+
+        索引があれば publish_at の日付で照合し、同じ内容の投稿は送信せず、変わった投稿は更新する。
+
+        Args:
+            posts: 'title', 'content', 'labels' と任意の 'publish_at'（datetime）を持つ辞書の列。
+                   publish_at が未来なら予約投稿、過去ならその日時で公開、未指定なら即時公開。
+        Returns:
+            各投稿の {'title', 'status'（'scheduled' / 'published' / 'updated' / 'unchanged' / 'failed'）,
+            'url', 'error'} のリスト
+        """
+        from googleapiclient.errors import HttpError
+        
+        results = [{'title': post['title'], 'status': 'failed', 'url': None, 'error': None} for post in posts]
+        hashes = [PostIndex.content_hash(post['title'], post['content'], post['labels']) for post in posts]
+        entries = [
+            self.index.get(blog_id, post['publish_at']) if self.index is not None and post.get('publish_at') else None
+            for post in posts
+        ]
+        
+        def body(post):
+            return {'kind': 'blogger#post', 'title': post['title'], 'content': post['content'], 'labels': post['labels']}
+        
+        def record(i, post_id, url, published):
+            entries[i] = {'post_id': post_id, 'hash': hashes[i], 'url': url, 'published': published}
+            if self.index is not None and posts[i].get('publish_at'):
+                self.index.put(blog_id, posts[i]['publish_at'], post_id, hashes[i], url, published)
+        
+        # 索引と照合（同じ内容で公開済みならスキップ、内容が変わっていれば更新）
+        patches = {}
+        inserts = {}
+        for i, (post, entry) in enumerate(zip(posts, entries)):
+            if entry is None:
+                inserts[str(i)] = post
+            elif entry['hash'] != hashes[i]:
+                patches[str(i)] = (entry['post_id'], post)
+            elif entry['published']:
+                results[i].update(status='unchanged', url=entry['url'])
+        
+        insert_errors = {}
+        patch_errors = {}
+        if patches:
+            print(f"\n📦 内容が変わった{len(patches)}件をバッチで更新中...")
+            updated, patch_errors = self._execute_batch(
+                {
+                    request_id: (lambda post_id=post_id, post=post:
+                        self.service.posts().patch(blogId=blog_id, postId=post_id, body=body(post)))
+                    for request_id, (post_id, post) in patches.items()
+                },
+                "更新"
+            )
+            for request_id, response in updated.items():
+                i = int(request_id)
+                record(i, response['id'], response.get('url'), entries[i]['published'])
+                if entries[i]['published']:
+                    results[i].update(status='updated', url=response.get('url'))
+            # 索引にあってもBlogger側で削除されていた投稿は新規に作成する
+            for request_id, e in list(patch_errors.items()):
+                if isinstance(e, HttpError) and e.resp.status == 404:
+                    del patch_errors[request_id]
+                    entries[int(request_id)] = None
+                    inserts[request_id] = posts[int(request_id)]
+        
+        # 未投稿の分を下書きとして作成
+        unchanged = sum(1 for result in results if result['status'] == 'unchanged')
+        print(f"\n📦 {len(inserts)}件の投稿を下書きとしてバッチ作成中...（変更なし {unchanged}件）")
+        if inserts:
+            drafts, insert_errors = self._execute_batch(
+                {
+                    request_id: (lambda post=post:
+                        self.service.posts().insert(blogId=blog_id, body=body(post), isDraft=True))
+                    for request_id, post in inserts.items()
+                },
+                "下書き作成"
+            )
+            for request_id, draft in drafts.items():
+                record(int(request_id), draft['id'], draft.get('url'), False)
+        if self.index is not None:
+            self.index.save()
+        
+        # 未公開の下書きを公開（日時指定は予約投稿）
+        now = datetime.now(ZoneInfo("Asia/Tokyo"))
+        publishes = {}
+        for i, entry in enumerate(entries):
+            if entry is None or entry['published'] or str(i) in patch_errors:
+                continue
+            publish_at = posts[i].get('publish_at')
+            kwargs = {'publishDate': publish_at.isoformat()} if publish_at else {}
+            publishes[str(i)] = (
+                lambda post_id=entry['post_id'], kwargs=kwargs:
+                    self.service.posts().publish(blogId=blog_id, postId=post_id, **kwargs)
+            )
+        
+        print(f"📦 {len(publishes)}件の下書きをバッチで公開・予約中...")
+        published, publish_errors = self._execute_batch(publishes, "公開・予約")
+        
+        for request_id, response in published.items():
+            i = int(request_id)
+            publish_at = posts[i].get('publish_at')
+            results[i]['status'] = 'scheduled' if publish_at and publish_at > now else 'published'
+            results[i]['url'] = response.get('url')
+            record(i, response['id'], response.get('url'), True)
+        if self.index is not None:
+            self.index.save()
+        for errors in (patch_errors, insert_errors, publish_errors):
+            for request_id, e in errors.items():
+                results[int(request_id)]['error'] = str(e)
+        
+        # 項目ごとの結果
+        marks = {'scheduled': "⏰ 予約", 'published': "✅ 公開", 'updated': "✏️  更新", 'unchanged': "⏭️  変更なし"}
+        for result in results:
+            if result['status'] == 'failed':
+                print(f"  ❌ {result['title']}: {result['error']}")
+            else:
+                print(f"  {marks[result['status']]} {result['title']}: {result['url']}")
+        
+        failed = sum(1 for result in results if result['status'] == 'failed')
+        print(f"\n📊 バッチ投稿: 成功 {len(results) - failed}件 / 失敗 {failed}件")
+        if publish_errors:
+            print(f"⚠️  公開できなかった{len(publish_errors)}件は下書きとして残っています")
+        return results
+
+
+class AlmanacServer:
+    """暦を返すHTTP APIサーバー（asyncio、1スレッド）
+
+    GET /almanac?date=YYYY-MM-DD             1日分の暦（--query と同じ項目）
+    GET /almanac/range?from=...&to=...      期間の暦（最大 MAX_RANGE_DAYS 日）
+    GET /almanac/next?kind=sekki|kou&at=... 次の二十四節気・七十二候の切り替わり（at 省略時は現在、
+                                            at は切り替わり時刻表の期間内）
+    GET /stats                               リクエスト数と応答キャッシュのヒット率
+
+    応答はURLごとにLRUキャッシュする（現在時刻に依存する応答は除く）。期間の応答は最大
+    MAX_RANGE_DAYS 行と大きいので、1日分とは別の小さいキャッシュ（range_cache_size 件）に置く。
+    各日の値は投稿時刻（7:00）時点のもので、年ごとの事前計算データから引く。
+    """
+    
+    MAX_RANGE_DAYS = 366
+    MIN_YEAR = 1900
+    MAX_YEAR = 2199
+    
+    def __init__(self, host='127.0.0.1', port=8080, cache_size=4096, range_cache_size=32):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+        self._respond_cached = lru_cache(maxsize=cache_size)(self._respond)
+        self._range_cached = lru_cache(maxsize=range_cache_size)(self._respond)
+    
+    def preload(self, years):
+        """指定年の暦データ・旧暦の月表・節気の切り替わり時刻表を読み込んでおく"""
+        AccurateSolarTermCalculator.get_transition_table()
+        for year in years:
+            AccurateLunarCalendar.get_year_table(year)
+            if YearlyAlmanac.enabled():
+                YearlyAlmanac.for_year(year, hour=CalendarPostGenerator.POST_HOUR)
+    
+    def stats(self):
+        """リクエスト数とキャッシュのヒット率（cache は1日分と期間の合計）"""
+        infos = [self._respond_cached.cache_info(), self._range_cached.cache_info()]
+        hits = sum(info.hits for info in infos)
+        lookups = hits + sum(info.misses for info in infos)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'cache': {
+                'hits': hits,
+                'misses': lookups - hits,
+                'hit_ratio': round(hits / lookups, 4) if lookups else None,
+                'size': infos[0].currsize,
+                'max_size': infos[0].maxsize,
+                'range_size': infos[1].currsize,
+                'range_max_size': infos[1].maxsize
+            }
+        }
+    
+    def _parse_day(self, value, name):
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} は YYYY-MM-DD 形式で指定してください")
+        if not self.MIN_YEAR <= day.year <= self.MAX_YEAR:
+            raise ValueError(f"{name} は{self.MIN_YEAR}年から{self.MAX_YEAR}年の範囲で指定してください")
+        return day
+    
+    def _day(self, day):
+        """1日分の暦（QUERY_FIELDSをキーとする辞書）"""
+        date = datetime(day.year, day.month, day.day, CalendarPostGenerator.POST_HOUR, tzinfo=ZoneInfo("Asia/Tokyo"))
+        if YearlyAlmanac.enabled():
+            astronomy = YearlyAlmanac.lookup(date, hour=CalendarPostGenerator.POST_HOUR)
+        else:
+            astronomy = CalendarPostGenerator.calculate_astronomy(date)
+        return dict(zip(QUERY_FIELDS, query_row(date, astronomy)))
+    
+    def _next_transition(self, kind, at):
+        """次の節気・候の切り替わり"""
+        calc = AccurateSolarTermCalculator
+        get_period = calc.get_sekki_period if kind == 'sekki' else calc.get_kou_period
+        current = get_period(at)
+        if current['end'] is None:
+            raise ValueError("切り替わり時刻表の範囲外です")
+        following = get_period(current['end'] + timedelta(seconds=1))
+        return {
+            'kind': kind,
+            'at': at.isoformat(timespec='seconds'),
+            'current': {'name': current['name'], 'reading': current['reading'], 'start': current['start'].isoformat(timespec='seconds')},
+            'next': {'name': following['name'], 'reading': following['reading'], 'start': current['end'].isoformat(timespec='seconds')}
+        }
+    
+    def _respond(self, path, query):
+        """(ステータス, JSON本文) を返す"""
+        from urllib.parse import parse_qs
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        
+        try:
+            if path == '/almanac':
+                result = self._day(self._parse_day(params.get('date'), 'date'))
+            elif path == '/almanac/range':
+                start = self._parse_day(params.get('from'), 'from')
+                end = self._parse_day(params.get('to', params.get('from')), 'to')
+                days = (end - start).days + 1
+                if not 1 <= days <= self.MAX_RANGE_DAYS:
+                    raise ValueError(f"期間は1日から{self.MAX_RANGE_DAYS}日で指定してください")
+                result = [self._day(start + timedelta(days=i)) for i in range(days)]
+            elif path == '/almanac/next':
+                kind = params.get('kind', 'sekki')
+                if kind not in ('sekki', 'kou'):
+                    raise ValueError("kind は sekki か kou を指定してください")
+                jst = ZoneInfo("Asia/Tokyo")
+                if 'at' in params:
+                    try:
+                        at = datetime.fromisoformat(params['at'])
+                    except ValueError:
+                        raise ValueError("at は ISO 8601 形式（例: 2026-10-17T07:00）で指定してください")
+                    at = at.replace(tzinfo=jst) if at.tzinfo is None else at.astimezone(jst)
+                    # 切り替わり時刻は時刻表から引くので、日付の範囲（MIN_YEAR〜MAX_YEAR）より狭い
+                    table = AccurateSolarTermCalculator.get_transition_table()
+                    if not table.start_year <= at.year <= table.end_year:
+                        raise ValueError(f"at は{table.start_year}年から{table.end_year}年の範囲で指定してください")
+                else:
+                    at = datetime.now(jst)
+                result = self._next_transition(kind, at)
+            elif path == '/stats':
+                result = self.stats()
+            else:
+                return 404, json.dumps({'error': "not found"}).encode('utf-8')
+        except ValueError as e:
+            return 400, json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8')
+        
+        return 200, json.dumps(result, ensure_ascii=False).encode('utf-8')
+    
+    def handle(self, target):
+        """リクエストのパス（クエリ付き）に対する (ステータス, JSON本文)"""
+        path, _, query = target.partition('?')
+        # 統計と現在時刻に依存する応答はキャッシュしない
+        if path == '/stats' or (path == '/almanac/next' and 'at=' not in query):
+            return self._respond(path, query)
+        if path == '/almanac/range':
+            return self._range_cached(path, query)
+        return self._respond_cached(path, query)
+    
+    async def _handle_connection(self, reader, writer):
+        """1接続分のリクエストを処理（HTTP/1.1 の keep-alive に対応）"""
+        import asyncio
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+        
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip().lower()
+                
+                parts = request_line.split(' ')
+                self.requests += 1
+                if len(parts) != 3:
+                    status, body, keep_alive = 400, b'{"error": "bad request"}', False
+                else:
+                    method, target, version = parts
+                    connection = headers.get('connection', '')
+                    keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                    if method != 'GET':
+                        # 本文は読まないので接続を閉じる
+                        status, body, keep_alive = 405, b'{"error": "method not allowed"}', False
+                    else:
+                        try:
+                            status, body = self.handle(target)
+                        except Exception as e:
+                            # 想定外のエラーでも接続を切らずに 500 を返す（エラーの応答はキャッシュされない）
+                            self.errors += 1
+                            print(f"⚠️ 暦APIのエラー（{target}）: {type(e).__name__}: {e}")
+                            status, body = 500, b'{"error": "internal server error"}'
+                
+                writer.write(
+                    f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+    
+    async def serve(self):
+        """サーバーを起動して待ち受ける"""
+        import asyncio
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"🌐 暦APIサーバーを起動しました: http://{self.host}:{self.port}/almanac?date=YYYY-MM-DD")
+        async with server:
+            await server.serve_forever()
+    
+    def run(self):
+        """サーバーを起動し、終了時（Ctrl+C）にキャッシュのヒット率を表示"""
+        import asyncio
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stats = self.stats()
+            print(f"\n📊 リクエスト {stats['requests']}件 / キャッシュのヒット率 {stats['cache']['hit_ratio']}")
 
 
-def main():
-    """メイン処理"""
+def _parse_date(value):
+    """YYYY-MM-DD 形式の日付を解析"""
     try:
-        blog_id = os.environ.get('BLOG_ID')
-        gemini_api_key = os.environ.get('GEMINI_API_KEY')
-        
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日付は YYYY-MM-DD 形式で指定してください: {value}")
+
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="暦情報自動投稿システム")
+    parser.add_argument('--from', dest='date_from', type=_parse_date,
+                        help="一括生成の開始日（YYYY-MM-DD）")
+    parser.add_argument('--to', dest='date_to', type=_parse_date,
+                        help="一括生成の終了日（YYYY-MM-DD、この日を含む。省略時は開始日のみ）")
+    parser.add_argument('--output-dir', default='posts',
+                        help="一括生成した投稿（JSON）の保存先（既定: posts）")
+    parser.add_argument('--publish', action='store_true',
+                        help="一括生成した投稿をBloggerにも投稿する")
+    parser.add_argument('--batch-publish', action='store_true',
+                        help="一括生成した投稿をバッチAPIでまとめて送信し、各日の投稿時刻（7:00）で予約投稿する")
+    parser.add_argument('--stream', action='store_true',
+                        help="Geminiのストリーミング出力を受信しながらセクションごとに整形する")
+    parser.add_argument('--parallel-sections', action='store_true', default=None,
+                        help="Geminiへセクションごとに並列にリクエストする（失敗したセクションだけフォールバック）")
+    parser.add_argument('--deadline', type=float, default=None, metavar='SECONDS',
+                        help="Geminiの本文を待つ上限（秒）。過ぎたら季節のフォールバック本文で投稿する（GEMINI_DEADLINE_SECONDS でも指定可）")
+    parser.add_argument('--patch-late', action='store_true', default=None,
+                        help="--deadline に間に合わなかったGeminiの本文を投稿後も待ち、届いたら投稿を差し替える（GEMINI_LATE_PATCH=1 でも有効）")
+    parser.add_argument('--inline-css', action='store_true', default=None,
+                        help="CSSをクラスではなく各要素のstyle属性に展開する（<style>を使えないフィード向け）")
+    parser.add_argument('--gemini-batch', action='store_true',
+                        help="一括生成の文章をGeminiのバッチAPIでまとめて生成する（中断しても再実行で続きから回収）")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="一括生成時にGemini APIへ同時に送信するリクエスト数・地域版を同時に投稿するブログ数（既定: 4）")
+    parser.add_argument('--rate-limit', type=int, default=None,
+                        help="一括生成時のGemini APIへの1分あたりのリクエスト数の上限")
+    parser.add_argument('--query', action='store_true',
+                        help="--from/--to の期間の暦（節気・候・旧暦・六曜・月相・日の出入り）を標準出力に書き出す")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl',
+                        help="--query の出力形式（既定: jsonl）")
+    parser.add_argument('--serve', action='store_true',
+                        help="暦を返すHTTP APIサーバーを起動する（/almanac, /almanac/range, /almanac/next, /stats）")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="--serve の待ち受けアドレス（既定: 127.0.0.1）")
+    parser.add_argument('--port', type=int, default=8080,
+                        help="--serve の待ち受けポート（既定: 8080）")
+    parser.add_argument('--build-almanac', type=int, nargs='+', metavar='YEAR',
+                        help="指定年の暦データ（節気・候・旧暦・六曜・月齢・日の出入り）を事前計算して保存する")
+    parser.add_argument('--build-fallback-corpus', nargs='?', const='', default=None, metavar='PATH',
+                        help="七十二候ごとのフォールバック本文のひな形を手直し用に書き出す（既定: FALLBACK_CORPUS_PATH）")
+    args = parser.parse_args(argv)
+    
+    if args.date_to and not args.date_from:
+        parser.error("--to を指定する場合は --from も指定してください")
+    if args.date_from and args.date_to and args.date_to < args.date_from:
+        parser.error("--to は --from 以降の日付を指定してください")
+    if args.concurrency < 1:
+        parser.error("--concurrency は1以上を指定してください")
+    if args.gemini_batch and not args.date_from:
+        parser.error("--gemini-batch は --from と一緒に指定してください")
+    if args.query and not args.date_from:
+        parser.error("--query には --from を指定してください")
+    # ストリーミングでは使えない設定（環境変数で有効にした場合も黙って無視せずエラーにする）
+    if args.stream and (args.parallel_sections or os.environ.get('GEMINI_PARALLEL_SECTIONS', '0') == '1'):
+        parser.error("--stream と --parallel-sections（GEMINI_PARALLEL_SECTIONS=1）は同時に指定できません")
+    if args.deadline is not None and args.deadline <= 0:
+        parser.error("--deadline は0より大きい秒数を指定してください")
+    if args.stream and (args.deadline or float(os.environ.get('GEMINI_DEADLINE_SECONDS', '0'))):
+        parser.error("--stream と --deadline（GEMINI_DEADLINE_SECONDS）は同時に指定できません")
+    if args.stream and os.environ.get('BLOG_EDITIONS') and not args.date_from:
+        # 地域版では本文を1回だけ生成して使い回すため、ストリーミングでは受け取らない
+        parser.error("--stream は地域版（BLOG_EDITIONS）の投稿では使えません")
+    if args.patch_late and not (args.deadline or float(os.environ.get('GEMINI_DEADLINE_SECONDS', '0'))):
+        parser.error("--patch-late は --deadline（または GEMINI_DEADLINE_SECONDS）と一緒に指定してください")
+    if args.patch_late is None:
+        args.patch_late = os.environ.get('GEMINI_LATE_PATCH', '0') == '1'
+    if args.publish and args.batch_publish:
+        parser.error("--publish と --batch-publish は同時に指定できません")
+    return args
+
+
+def run_backfill(args):
+    """期間指定の一括生成（できた投稿から順に保存・投稿）"""
+    start = args.date_from
+    end = args.date_to or args.date_from
+    
+    print("=" * 70)
+    print(f"🗂️  一括生成モード: {start:%Y-%m-%d} 〜 {end:%Y-%m-%d}")
+    print("=" * 70)
+    
+    poster = None
+    blog_id = os.environ.get('BLOG_ID')
+    if args.publish or args.batch_publish:
         if not blog_id:
             raise Exception("BLOG_ID環境変数が設定されていません")
-        if not gemini_api_key:
-            raise Exception("GEMINI_API_KEY環境変数が設定されていません")
-        
-        print("=" * 70)
-        print("🌸 暦情報自動投稿システム Gemini 2.5 Flash統合版 起動")
-        print("=" * 70)
-        print(f"📅 投稿日時: {datetime.now(ZoneInfo('Asia/Tokyo')).strftime('%Y年%m月%d日 %H:%M:%S')}")
-        
-        # 暦情報生成
-        print("\n🔄 今日の暦情報を生成中...")
-        print("  - 正確な天文計算による二十四節気・七十二候")
-        print("  - 高精度な日の出・日の入り計算（岡山）")
-        print("  - Gemini 2.5 Flash AIによる豊かな文章生成")
-        print("  - 12セクション完全対応")
-        
-        generator = CalendarPostGenerator()
-        post_data = generator.generate_post()
-        
-        print(f"\n📝 タイトル: {post_data['title']}")
-        print(f"📊 推定文字数: 約{len(post_data['content'])}文字")
-        print(f"🏷️  ラベル: {', '.join(post_data['labels'])}")
-        
-        # Blogger投稿
-        print("\n📤 Bloggerに投稿中...")
-        poster = BloggerPoster()
+        poster = BloggerPoster(index=PostIndex.from_env())
         poster.authenticate()
-        poster.post_to_blog(blog_id, post_data['title'], post_data['content'], post_data['labels'])
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    count = 0
+    # バッチ投稿する投稿（生成がすべて終わってからまとめて送信）
+    scheduled = []
+    
+    posts = CalendarPostGenerator.generate_posts(
+        start, end,
+        max_workers=args.concurrency,
+        requests_per_minute=args.rate_limit,
+        inline_css=args.inline_css,
+        gemini_batch=args.gemini_batch
+    )
+    for date, post_data in posts:
+        path = os.path.join(args.output_dir, f"{date:%Y-%m-%d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(post_data, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 保存: {path}（{post_data['title']}）")
+        
+        if args.batch_publish:
+            scheduled.append(dict(post_data, publish_at=date))
+        elif poster:
+            poster.post_to_blog(blog_id, post_data['title'], post_data['content'], post_data['labels'], date=date)
+        count += 1
+    
+    if scheduled:
+        results = poster.publish_batch(blog_id, scheduled)
+        failed = [result['title'] for result in results if result['status'] == 'failed']
+        if failed:
+            raise Exception(f"{len(failed)}件の投稿に失敗しました: {', '.join(failed)}")
+    
+    print("\n" + "=" * 70)
+    print(f"✨ {count}件の投稿を生成しました")
+    print("=" * 70)
+
+
+def run_daily(args):
+    """毎日の定期実行（今日の投稿を生成して BLOG_ID のブログに投稿）"""
+    blog_id = os.environ.get('BLOG_ID')
+    gemini_api_key = os.environ.get('GEMINI_API_KEY')
+    
+    if not blog_id:
+        raise Exception("BLOG_ID環境変数が設定されていません")
+    if not gemini_api_key:
+        raise Exception("GEMINI_API_KEY環境変数が設定されていません")
+    
+    print("=" * 70)
+    print("🌸 暦情報自動投稿システム Gemini 2.5 Flash統合版 起動")
+    print("=" * 70)
+    print(f"📅 投稿日時: {datetime.now(ZoneInfo('Asia/Tokyo')).strftime('%Y年%m月%d日 %H:%M:%S')}")
+    
+    # 暦情報生成
+    print("\n🔄 今日の暦情報を生成中...")
+    print("  - 正確な天文計算による二十四節気・七十二候")
+    print("  - 高精度な日の出・日の入り計算（岡山）")
+    print("  - Gemini 2.5 Flash AIによる豊かな文章生成")
+    print("  - 12セクション完全対応")
+    
+    generator = CalendarPostGenerator(
+        stream=args.stream, inline_css=args.inline_css, parallel_sections=args.parallel_sections, deadline=args.deadline
+    )
+    post_data = generator.generate_post()
+    
+    print(f"\n📝 タイトル: {post_data['title']}")
+    print(f"📊 推定文字数: 約{len(post_data['content'])}文字")
+    print(f"🏷️  ラベル: {', '.join(post_data['labels'])}")
+    
+    # Blogger投稿
+    print("\n📤 Bloggerに投稿中...")
+    poster = BloggerPoster(index=PostIndex.from_env())
+    poster.authenticate()
+    response = poster.post_to_blog(blog_id, post_data['title'], post_data['content'], post_data['labels'], date=generator.date)
+    
+    # 期限に間に合わなかったGeminiの本文が届いたら差し替える
+    if generator.late_body is not None and args.patch_late:
+        print("\n⏳ Geminiの本文を待っています（届いたら投稿を差し替えます）...")
+        if generator.wait_late_body():
+            post_data = generator.generate_post()
+            poster.post_to_blog(
+                blog_id, post_data['title'], post_data['content'], post_data['labels'],
+                date=generator.date, post_id=response.get('id')
+            )
+        else:
+            print("⚠️ Geminiの本文を受け取れなかったため、フォールバックの本文のままにします")
+    
+    print("\n" + "=" * 70)
+    print("✨ すべての処理が完了しました！")
+    print("📚 正確な暦情報とGemini生成の豊かな文章が投稿されました")
+    print("=" * 70)
+
+
+def run_editions(args):
+    """地域版（BLOG_EDITIONS）の投稿: 暦情報とGeminiの本文は1回だけ生成し、地域版ごとに仕上げて並列に投稿"""
+    editions = BlogEdition.from_env()
+    if not os.environ.get('GEMINI_API_KEY'):
+        raise Exception("GEMINI_API_KEY環境変数が設定されていません")
+    
+    print("=" * 70)
+    print(f"🗾 地域版モード: {len(editions)}件（{', '.join(edition.name for edition in editions)}）")
+    print("=" * 70)
+    
+    generator = CalendarPostGenerator(
+        inline_css=args.inline_css, parallel_sections=args.parallel_sections, deadline=args.deadline
+    )
+    posts = generator.generate_editions(editions)
+    
+    poster = BloggerPoster(index=PostIndex.from_env())
+    poster.authenticate()
+    results = poster.post_editions(editions, posts, date=generator.date, max_workers=args.concurrency)
+    
+    # 期限に間に合わなかったGeminiの本文が届いたら、投稿できた地域版を差し替える
+    if generator.late_body is not None and args.patch_late:
+        print("\n⏳ Geminiの本文を待っています（届いたら各地域版を差し替えます）...")
+        if generator.wait_late_body():
+            posted = [(edition, result['post_id']) for edition, result in zip(editions, results) if not result['error']]
+            late_editions = [edition for edition, _ in posted]
+            poster.post_editions(
+                late_editions, generator.generate_editions(late_editions), date=generator.date,
+                max_workers=args.concurrency, post_ids=[post_id for _, post_id in posted]
+            )
+        else:
+            print("⚠️ Geminiの本文を受け取れなかったため、フォールバックの本文のままにします")
+    
+    failed = [result['edition'] for result in results if result['error']]
+    if failed:
+        raise Exception(f"{len(failed)}件の地域版の投稿に失敗しました: {', '.join(failed)}")
+    
+    print("\n" + "=" * 70)
+    print(f"✨ {len(editions)}件の地域版を投稿しました")
+    print("=" * 70)
+
+
+# --query の出力列
+QUERY_FIELDS = (
+    'date', 'sekki', 'sekki_reading', 'kou', 'kou_reading',
+    'lunar_year', 'lunar_month', 'lunar_day', 'leap', 'month_name', 'rokuyou',
+    'moon_age', 'moon_phase', 'sunrise', 'sunset'
+)
+
+
+def query_row(date, astronomy):
+    """1日分の暦情報を QUERY_FIELDS の順の値のタプルにする"""
+    lunar = astronomy['lunar']
+    sekki = astronomy['sekki']
+    kou = astronomy['kou']
+    return (
+        f"{date:%Y-%m-%d}", sekki[0], sekki[1], kou[0], kou[1],
+        lunar['year'], lunar['month'], lunar['day'], lunar['leap'], lunar['month_name'], lunar['rokuyou'],
+        lunar['age'], lunar['phase'], astronomy['sun_times']['sunrise'], astronomy['sun_times']['sunset']
+    )
+
+
+def iter_query_rows(start, end):
+    """期間の各日の暦を1行ずつ返す（QUERY_FIELDSの順の値のタプル）"""
+    for date, astronomy in CalendarPostGenerator.iter_astronomy_range(start, end):
+        yield query_row(date, astronomy)
+
+
+def run_query(args, out=None):
+    """期間の暦を JSON Lines / CSV で1行ずつ書き出す（期間全体をメモリに溜めない）"""
+    out = out or sys.stdout
+    start = args.date_from
+    end = args.date_to or args.date_from
+    rows = iter_query_rows(start, end)
+    
+    try:
+        if args.format == 'csv':
+            import csv
+            writer = csv.writer(out, lineterminator='\n')
+            writer.writerow(QUERY_FIELDS)
+            for row in rows:
+                writer.writerow(row)
+        else:
+            for row in rows:
+                out.write(json.dumps(dict(zip(QUERY_FIELDS, row)), ensure_ascii=False) + '\n')
+        out.flush()
+    except BrokenPipeError:
+        # head などで出力先が閉じられた場合は、終了時の flush で再び失敗しないよう
+        # 標準出力を /dev/null に向けてから静かに終了
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+def run_build_almanac(years):
+    """年ごとの暦データを計算し直して保存"""
+    for year in years:
+        start = time.perf_counter()
+        almanac = YearlyAlmanac.load_or_build(year, hour=CalendarPostGenerator.POST_HOUR, rebuild=True)
+        path = YearlyAlmanac.cache_path(year, AccurateSunCalculator.OKAYAMA, CalendarPostGenerator.POST_HOUR, CACHE_DIR)
+        print(f"📖 {year}年の暦データ（{len(almanac.records)}日分）を保存しました: {path}（{time.perf_counter() - start:.2f}秒）")
+
+
+def main(argv=None):
+    """メイン処理"""
+    try:
+        args = parse_args(argv)
+        if args.build_almanac:
+            run_build_almanac(args.build_almanac)
+            return
+        if args.build_fallback_corpus is not None:
+            path = FallbackCorpus.save(args.build_fallback_corpus or None)
+            print(f"📝 七十二候ごとのフォールバック本文のひな形を書き出しました: {path}")
+            return
+        if args.query:
+            run_query(args)
+            return
+        if args.serve:
+            server = AlmanacServer(args.host, args.port)
+            this_year = datetime.now(ZoneInfo('Asia/Tokyo')).year
+            server.preload(range(this_year - 1, this_year + 2))
+            server.run()
+            return
+        if args.date_from:
+            mode, run = 'backfill', run_backfill
+        elif os.environ.get('BLOG_EDITIONS'):
+            mode, run = 'editions', run_editions
+        else:
+            mode, run = 'daily', run_daily
         
-        print("\n" + "=" * 70)
-        print("✨ すべての処理が完了しました！")
-        print("📚 正確な暦情報とGemini生成の豊かな文章が投稿されました")
-        print("=" * 70)
+        # 処理段階ごとの所要時間を記録し、終了時に表にする
+        tracer = Tracer.current()
+        try:
+            with tracer.span('run', mode=mode):
+                run(args)
+        finally:
+            tracer.print_summary()
+            tracer.close()
         
     except Exception as e:
         print(f"\n❌ エラーが発生しました: {str(e)}")
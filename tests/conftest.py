@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+テスト共通の設定（ローカルのスタブHTTPサーバー）
+
+calendar_post は import 時にキャッシュの保存先を決めるので、先に一時ディレクトリへ向ける。
+"""
+
+import os
+import sys
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ['CALENDAR_CACHE_DIR'] = tempfile.mkdtemp(prefix='calendar_test_')
+for name in ('GEMINI_API_KEY', 'GEMINI_ENDPOINT', 'GEMINI_CACHE', 'GEMINI_DEADLINE_SECONDS', 'GEMINI_LATE_PATCH',
+             'GEMINI_PARALLEL_SECTIONS', 'BLOG_ID', 'BLOG_EDITIONS', 'CALENDAR_TRACE'):
+    os.environ.pop(name, None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+class StubServer:
+    """別スレッドで動くHTTPサーバー
+
+    handler(method, path, body) は (ステータス, JSON) か (ステータス, バイト列, Content-Type) を返す。
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        # 受け取ったリクエスト（method, path, body）
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                body = json.loads(raw) if raw and self.headers.get('Content-Type', '').startswith('application/json') else raw
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, body))
+                status, payload, *content_type = stub.handler(self.command, self.path, body)
+                if content_type:
+                    data, content_type = payload, content_type[0]
+                else:
+                    data, content_type = json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json; charset=UTF-8'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """stub_server(handler) でスタブサーバーを起動（テスト終了時に停止）"""
+    servers = []
+
+    def start(handler):
+        server = StubServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+class FakeBlogger:
+    """Blogger API v3 の posts()（insert / patch / publish）とバッチリクエストの代わり
+
+    呼び出しは calls に (メソッド, 投稿ID または タイトル) で記録する。
+    fail(method, status, match) で、match（タイトル・投稿ID・ブログID）に一致する次の呼び出しを HttpError にする。
+    """
+
+    def __init__(self):
+        # 投稿ID → {'blog_id', 'title', 'content', 'labels', 'status', 'publish_date'}
+        self.posts_by_id = {}
+        self.calls = []
+        # バッチ1回ごとのリクエストID（送信順）
+        self.batches = []
+        self._failures = []
+        self._lock = threading.Lock()
+
+    def fail(self, method, status, match=None, times=1):
+        self._failures.append({'method': method, 'status': status, 'match': match, 'times': times})
+
+    def _check_failure(self, method, keys):
+        from googleapiclient.errors import HttpError
+        import httplib2
+
+        for failure in self._failures:
+            if failure['method'] == method and failure['times'] and (failure['match'] is None or failure['match'] in keys):
+                failure['times'] -= 1
+                raise HttpError(httplib2.Response({'status': failure['status']}), b'{"error": {"message": "fake error"}}')
+
+    def _post(self, post_id):
+        return {'id': post_id, 'url': f"https://example.blogspot.com/{post_id}.html", **self.posts_by_id[post_id]}
+
+    def _insert(self, blogId, body, isDraft=False):
+        with self._lock:
+            self.calls.append(('insert', body['title']))
+            self._check_failure('insert', (body['title'], blogId))
+            post_id = f"post-{len(self.posts_by_id) + 1}"
+            self.posts_by_id[post_id] = dict(
+                blog_id=blogId, title=body['title'], content=body['content'], labels=body['labels'],
+                status='DRAFT' if isDraft else 'LIVE', publish_date=None
+            )
+            return self._post(post_id)
+
+    def _patch(self, blogId, postId, body):
+        from googleapiclient.errors import HttpError
+        import httplib2
+
+        with self._lock:
+            self.calls.append(('patch', postId))
+            title = self.posts_by_id.get(postId, {}).get('title')
+            self._check_failure('patch', (postId, title, blogId))
+            if postId not in self.posts_by_id:
+                raise HttpError(httplib2.Response({'status': 404}), b'{"error": {"message": "Not Found"}}')
+            self.posts_by_id[postId].update(title=body['title'], content=body['content'], labels=body['labels'])
+            return self._post(postId)
+
+    def _publish(self, blogId, postId, publishDate=None):
+        with self._lock:
+            self.calls.append(('publish', postId))
+            self._check_failure('publish', (postId, self.posts_by_id[postId]['title'], blogId))
+            self.posts_by_id[postId].update(status='SCHEDULED' if publishDate else 'LIVE', publish_date=publishDate)
+            return self._post(postId)
+
+    def posts(self):
+        fake = self
+
+        def request(method):
+            def make(**kwargs):
+                return FakeRequest(lambda: method(**kwargs))
+            return make
+
+        class Posts:
+            insert = staticmethod(request(fake._insert))
+            patch = staticmethod(request(fake._patch))
+            publish = staticmethod(request(fake._publish))
+
+        return Posts()
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def count(self, method):
+        return sum(1 for call in self.calls if call[0] == method)
+
+
+class FakeRequest:
+    def __init__(self, run):
+        self._run = run
+
+    def execute(self):
+        return self._run()
+
+
+class FakeBatch:
+    def __init__(self, fake, callback):
+        self.fake = fake
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.fake.batches.append([request_id for request_id, _ in self.requests])
+        for request_id, request in self.requests:
+            try:
+                response, exception = request.execute(), None
+            except Exception as e:
+                response, exception = None, e
+            self.callback(request_id, response, exception)
+
+
+@pytest.fixture
+def fake_blogger(monkeypatch):
+    """FakeBlogger（バッチの再送は待たずに行う）
+
+    fake.make_poster(index=None) で作った投稿クラス、認証（authenticate）した投稿クラスとその複製（clone）は、
+    どれも同じ FakeBlogger に送信する。
+    """
+    from calendar_post import BloggerPoster
+
+    fake = FakeBlogger()
+    monkeypatch.setattr(BloggerPoster, 'BATCH_RETRY_SECONDS', 0)
+    monkeypatch.setattr(BloggerPoster, 'authenticate', lambda self: setattr(self, 'service', fake))
+
+    def make_poster(index=None):
+        poster = BloggerPoster(index=index)
+        poster.service = fake
+        return poster
+
+    monkeypatch.setattr(BloggerPoster, 'clone', lambda self: make_poster(self.index))
+    fake.make_poster = make_poster
+    return fake
+
+
+@pytest.fixture
+def gemini_api(stub_server, monkeypatch):
+    """gemini_api(handler) でスタブを起動し、GEMINI_API_KEY・GEMINI_ENDPOINT をそこへ向ける（応答キャッシュは無効）"""
+    def start(handler):
+        server = stub_server(handler)
+        monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+        monkeypatch.setenv('GEMINI_ENDPOINT', server.url + '/v1beta/models/m:generateContent')
+        monkeypatch.setenv('GEMINI_CACHE', '0')
+        return server
+
+    return start
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""AlmanacServer（暦APIサーバー）のテスト"""
+
+import json
+import socket
+import asyncio
+import threading
+
+import pytest
+
+from calendar_post import AlmanacServer
+
+
+@pytest.fixture
+def running_server():
+    """空いているポートで別スレッドのイベントループに起動したサーバー"""
+    server = AlmanacServer(port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        server.listener = loop.run_until_complete(asyncio.start_server(server._handle_connection, '127.0.0.1', 0))
+        server.port = server.listener.sockets[0].getsockname()[1]
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    yield server
+    loop.call_soon_threadsafe(server.listener.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def get(server, target):
+    """GET して (ステータス, JSON) を返す"""
+    with socket.create_connection(('127.0.0.1', server.port), timeout=5) as conn:
+        conn.sendall(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode('latin-1'))
+        data = b''
+        while chunk := conn.recv(65536):
+            data += chunk
+    head, _, body = data.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(body)
+
+
+@pytest.mark.parametrize('at', ['0001-01-01T00:00', '1950-01-01T00:00', '1999-12-31T23:59', '2101-01-01T00:00', '2150-06-01T00:00'])
+def test_next_rejects_at_outside_transition_table(running_server, at):
+    # 日付の範囲（1900〜2199年）内でも、切り替わり時刻表の期間外は同じ400にする
+    status, body = get(running_server, f'/almanac/next?kind=sekki&at={at}')
+    assert status == 400
+    assert body == {'error': "at は2000年から2100年の範囲で指定してください"}
+
+
+@pytest.mark.parametrize('kind', ['sekki', 'kou'])
+@pytest.mark.parametrize('at', ['2000-01-01T00:00', '2100-12-31T23:59'])
+def test_next_at_transition_table_edges(running_server, kind, at):
+    status, body = get(running_server, f'/almanac/next?kind={kind}&at={at}')
+    assert status == 200
+    assert body['current']['start'] <= body['at'] < body['next']['start']
+
+
+def test_next_in_range(running_server):
+    status, body = get(running_server, '/almanac/next?kind=kou&at=2026-10-17T07:00')
+    assert status == 200
+    assert body['current']['start'] <= body['at'] < body['next']['start']
+
+
+def test_unexpected_error_returns_500(running_server, monkeypatch):
+    def broken(date):
+        raise OverflowError("date value out of range")
+
+    monkeypatch.setattr(running_server, '_day', broken)
+    status, body = get(running_server, '/almanac?date=2026-10-17')
+    assert status == 500
+    assert body == {'error': 'internal server error'}
+    assert running_server.stats()['errors'] == 1
+
+    # エラーはキャッシュされず、直れば同じURLで応答できる
+    monkeypatch.undo()
+    status, body = get(running_server, '/almanac?date=2026-10-17')
+    assert status == 200
+    assert body['date'] == '2026-10-17'
+
+
+def test_range_responses_use_a_separate_smaller_cache():
+    server = AlmanacServer(cache_size=8, range_cache_size=2)
+    for month in range(1, 5):
+        assert server.handle(f'/almanac/range?from=2026-{month:02d}-01&to=2026-{month:02d}-03')[0] == 200
+    assert server.handle('/almanac?date=2026-10-17')[0] == 200
+
+    cache = server.stats()['cache']
+    assert (cache['range_size'], cache['range_max_size']) == (2, 2)
+    assert cache['size'] == 1
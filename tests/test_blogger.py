@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""BloggerPoster の認証（アクセストークンのキャッシュ）をスタブのトークンエンドポイントで試すテスト"""
+
+import os
+import json
+import stat
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from calendar_post import BloggerPoster, Tracer
+
+
+@pytest.fixture
+def token_endpoint(stub_server, monkeypatch, tmp_path):
+    """リフレッシュのたびに新しいアクセストークンを返すトークンエンドポイント"""
+    issued = []
+
+    def handler(method, path, body):
+        issued.append(f"access-{len(issued) + 1}")
+        return 200, {'access_token': issued[-1], 'expires_in': 3600, 'token_type': 'Bearer'}
+
+    server = stub_server(handler)
+    # from_authorized_user_info は token_uri を無視して常にこのエンドポイントを使う
+    monkeypatch.setattr('google.oauth2.credentials._GOOGLE_OAUTH2_TOKEN_ENDPOINT', server.url + '/token')
+    monkeypatch.setattr(BloggerPoster, 'TOKEN_CACHE_PATH', str(tmp_path / 'google_token.json'))
+    monkeypatch.delenv('GOOGLE_TOKEN_CACHE', raising=False)
+    monkeypatch.delenv('GOOGLE_CREDENTIALS', raising=False)
+    set_token(monkeypatch, 'refresh-1')
+    server.issued = issued
+    return server
+
+
+def set_token(monkeypatch, refresh_token):
+    """Secrets に保存されている形の GOOGLE_TOKEN（アクセストークンは期限切れ）"""
+    monkeypatch.setenv('GOOGLE_TOKEN', json.dumps({
+        'token': 'stale',
+        'refresh_token': refresh_token,
+        'client_id': 'client',
+        'client_secret': 'secret',
+        'expiry': '2020-01-01T00:00:00Z'
+    }))
+
+
+class Recorder:
+    """スパンの記録を溜めるエクスポーター"""
+
+    def __init__(self):
+        self.records = []
+
+    def export(self, record):
+        self.records.append(record)
+
+
+def authenticate():
+    """認証して (アクセストークン, blogger.auth の token 属性) を返す"""
+    recorder = Recorder()
+    Tracer._current = Tracer([recorder])
+    try:
+        poster = BloggerPoster()
+        poster.authenticate()
+    finally:
+        Tracer._current = None
+    auth = next(record for record in recorder.records if record['name'] == 'blogger.auth')
+    return poster.credentials.token, auth['attrs']['token']
+
+
+def test_refreshed_token_is_cached_and_reused(token_endpoint):
+    assert authenticate() == ('access-1', 'refreshed')
+
+    # 所有者だけが読み書きできる
+    mode = stat.S_IMODE(os.stat(BloggerPoster.TOKEN_CACHE_PATH).st_mode)
+    assert mode == 0o600
+    with open(BloggerPoster.TOKEN_CACHE_PATH, encoding='utf-8') as f:
+        cached = json.load(f)
+    assert cached['token'] == 'access-1'
+    assert 'refresh-1' not in json.dumps(cached)
+
+    # 2回目はトークンエンドポイントを呼ばない
+    assert authenticate() == ('access-1', 'cached')
+    assert token_endpoint.issued == ['access-1']
+
+
+def test_expired_cached_token_is_refreshed(token_endpoint):
+    authenticate()
+    with open(BloggerPoster.TOKEN_CACHE_PATH, encoding='utf-8') as f:
+        cached = json.load(f)
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    cached['expiry'] = expired.strftime('%Y-%m-%dT%H:%M:%SZ')
+    with open(BloggerPoster.TOKEN_CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cached, f)
+
+    assert authenticate() == ('access-2', 'refreshed')
+    with open(BloggerPoster.TOKEN_CACHE_PATH, encoding='utf-8') as f:
+        assert json.load(f)['token'] == 'access-2'
+
+
+def test_cached_token_is_ignored_for_other_credentials(token_endpoint, monkeypatch):
+    authenticate()
+    # GOOGLE_TOKEN が差し替えられたら、前の認証情報のトークンは使わない
+    set_token(monkeypatch, 'refresh-2')
+    assert authenticate() == ('access-2', 'refreshed')
+
+
+def test_token_cache_can_be_disabled(token_endpoint, monkeypatch):
+    monkeypatch.setenv('GOOGLE_TOKEN_CACHE', '0')
+    assert authenticate() == ('access-1', 'refreshed')
+    assert not os.path.exists(BloggerPoster.TOKEN_CACHE_PATH)
+    assert authenticate() == ('access-2', 'refreshed')
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""BloggerPoster.publish_batch（バッチ送信と失敗した項目だけの再送）を FakeBlogger で試すテスト"""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import BloggerPoster
+
+JST = ZoneInfo("Asia/Tokyo")
+TOMORROW = datetime.now(JST).replace(hour=7, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def make_posts(titles):
+    return [
+        {'title': title, 'content': f"<p>{title}</p>", 'labels': ['暦'], 'publish_at': TOMORROW + timedelta(days=i)}
+        for i, title in enumerate(titles)
+    ]
+
+
+def publish(fake, titles):
+    return fake.make_poster().publish_batch('blog-1', make_posts(titles))
+
+
+def assert_results_match_posts(fake, results, titles):
+    """結果が入力順で、それぞれ同じタイトルの投稿を指している"""
+    assert [result['title'] for result in results] == titles
+    for result in results:
+        if result['url']:
+            post_id = result['url'].rsplit('/', 1)[1].removesuffix('.html')
+            assert fake.posts_by_id[post_id]['title'] == result['title']
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_transient_failures_are_resubmitted(fake_blogger, status):
+    fake_blogger.fail('insert', status, match='B')
+    results = publish(fake_blogger, ['A', 'B', 'C'])
+
+    assert [result['status'] for result in results] == ['scheduled'] * 3
+    assert [result['error'] for result in results] == [None] * 3
+    # 作成のバッチは全件、再送は失敗した1件だけ。その後に公開・予約のバッチ
+    assert fake_blogger.batches == [['0', '1', '2'], ['1'], ['0', '1', '2']]
+    assert len(fake_blogger.posts_by_id) == 3
+    assert all(post['status'] == 'SCHEDULED' for post in fake_blogger.posts_by_id.values())
+
+
+@pytest.mark.parametrize('status', [400, 403, 404])
+def test_permanent_failures_are_reported_and_not_retried(fake_blogger, status):
+    fake_blogger.fail('insert', status, match='B', times=10)
+    results = publish(fake_blogger, ['A', 'B', 'C'])
+
+    assert [result['status'] for result in results] == ['scheduled', 'failed', 'scheduled']
+    assert str(status) in results[1]['error']
+    assert results[1]['url'] is None
+    # 再送せず、公開・予約も作成できた分だけ
+    assert fake_blogger.batches == [['0', '1', '2'], ['0', '2']]
+    assert fake_blogger.count('insert') == 3
+
+
+def test_transient_failures_give_up_after_retries(fake_blogger):
+    fake_blogger.fail('insert', 503, match='B', times=10)
+    results = publish(fake_blogger, ['A', 'B'])
+
+    assert [result['status'] for result in results] == ['scheduled', 'failed']
+    assert '503' in results[1]['error']
+    assert [call for call in fake_blogger.calls if call == ('insert', 'B')] == [('insert', 'B')] * (BloggerPoster.BATCH_RETRIES + 1)
+
+
+def test_failed_publish_leaves_draft(fake_blogger):
+    fake_blogger.fail('publish', 403, match='B')
+    results = publish(fake_blogger, ['A', 'B'])
+
+    assert [result['status'] for result in results] == ['scheduled', 'failed']
+    assert '403' in results[1]['error']
+    assert sorted(post['status'] for post in fake_blogger.posts_by_id.values()) == ['DRAFT', 'SCHEDULED']
+
+
+def test_results_keep_input_order_across_partial_retry(fake_blogger, monkeypatch):
+    monkeypatch.setattr(BloggerPoster, 'BATCH_SIZE', 2)
+    titles = ['A', 'B', 'C', 'D', 'E']
+    fake_blogger.fail('insert', 503, match='A', times=2)
+    fake_blogger.fail('insert', 500, match='D')
+    fake_blogger.fail('publish', 429, match='C')
+
+    results = publish(fake_blogger, titles)
+
+    assert [result['status'] for result in results] == ['scheduled'] * 5
+    assert_results_match_posts(fake_blogger, results, titles)
+    # 失敗した項目だけを、元の順で再送する
+    assert fake_blogger.batches == [
+        ['0', '1'], ['2', '3'], ['4'], ['0', '3'], ['0'],
+        ['0', '1'], ['2', '3'], ['4'], ['2']
+    ]
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""コマンドライン引数の検証のテスト"""
+
+import pytest
+
+from calendar_post import parse_args
+
+
+def test_stream_is_rejected_for_editions(monkeypatch, capsys):
+    monkeypatch.setenv('BLOG_EDITIONS', '[{"name": "okayama", "blog_id": "1"}]')
+    with pytest.raises(SystemExit) as excinfo:
+        parse_args(['--stream'])
+    assert excinfo.value.code == 2
+    assert 'BLOG_EDITIONS' in capsys.readouterr().err
+
+    # 一括生成（--from）では地域版の設定を使わない
+    assert parse_args(['--stream', '--from', '2026-10-17']).stream
+
+
+def test_stream_is_accepted_without_editions(monkeypatch):
+    monkeypatch.delenv('BLOG_EDITIONS', raising=False)
+    assert parse_args(['--stream']).stream
+
+
+def test_patch_late_requires_deadline(monkeypatch, capsys):
+    monkeypatch.delenv('GEMINI_DEADLINE_SECONDS', raising=False)
+    with pytest.raises(SystemExit):
+        parse_args(['--patch-late'])
+    assert '--deadline' in capsys.readouterr().err
+
+    assert parse_args(['--patch-late', '--deadline', '30']).patch_late
+    monkeypatch.setenv('GEMINI_DEADLINE_SECONDS', '30')
+    assert parse_args(['--patch-late']).patch_late
+
+
+@pytest.mark.parametrize('name, value, option', [
+    ('GEMINI_DEADLINE_SECONDS', '30', '--deadline'),
+    ('GEMINI_PARALLEL_SECTIONS', '1', '--parallel-sections'),
+])
+def test_stream_is_rejected_with_settings_from_environment(monkeypatch, capsys, name, value, option):
+    # 環境変数で有効にした設定もストリーミングでは使えない
+    monkeypatch.setenv(name, value)
+    with pytest.raises(SystemExit):
+        parse_args(['--stream'])
+    err = capsys.readouterr().err
+    assert option in err and name in err
+
+    monkeypatch.setenv(name, '0')
+    assert parse_args(['--stream']).stream
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Geminiの本文の待ち時間の期限（--deadline）と、差し替え（--patch-late）・フォールバックの文面のテスト"""
+
+import json
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import BloggerPoster, CalendarPostGenerator, FallbackCorpus, parse_args, run_daily
+
+JST = ZoneInfo("Asia/Tokyo")
+DATE = datetime(2026, 10, 17, 7, tzinfo=JST)
+CONTENT = "☀️ 季節の移ろい\nGeminiが書いた本文です。\n"
+DEADLINE = 0.3
+DELAY = 1.0
+
+
+def generated(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}]}, 'finishReason': 'STOP'}]}
+
+
+@pytest.fixture
+def slow_gemini(gemini_api):
+    """slow_gemini(delay, status=200) で、delay 秒後に応答するスタブを起動する（応答した時刻は server.replied）"""
+    def start(delay=DELAY, status=200):
+        def handler(method, path, body):
+            time.sleep(delay)
+            server.replied.append(time.perf_counter())
+            return status, generated(CONTENT) if status == 200 else {'error': {'message': 'bad request'}}
+
+        server = gemini_api(handler)
+        server.replied = []
+        return server
+
+    return start
+
+
+@pytest.fixture
+def posted(fake_blogger, monkeypatch):
+    """投稿した時刻と本文 [(時刻, post_id, content)] を記録する"""
+    records = []
+    post_to_blog = BloggerPoster.post_to_blog
+
+    def recording(self, blog_id, title, content, labels, date=None, post_id=None):
+        records.append((time.perf_counter(), post_id, content))
+        return post_to_blog(self, blog_id, title, content, labels, date=date, post_id=post_id)
+
+    monkeypatch.setattr(BloggerPoster, 'post_to_blog', recording)
+    monkeypatch.setenv('BLOG_ID', 'blog-1')
+    monkeypatch.setenv('POST_INDEX', '0')
+    return records
+
+
+def fallback_text():
+    astronomy = CalendarPostGenerator.calculate_astronomy(DATE)
+    return FallbackCorpus.content(astronomy['lunar'], astronomy['sekki'], astronomy['kou'])
+
+
+def test_fast_reply_is_used_without_late_body(slow_gemini):
+    slow_gemini(delay=0)
+    generator = CalendarPostGenerator(DATE, deadline=DELAY)
+    content = generator.generate_post()['content']
+
+    assert 'Geminiが書いた本文です。' in content
+    assert generator.late_body is None
+
+
+def test_late_body_replaces_fallback(slow_gemini):
+    slow_gemini()
+    generator = CalendarPostGenerator(DATE, deadline=DEADLINE)
+    start = time.perf_counter()
+    content = generator.generate_post()['content']
+
+    assert time.perf_counter() - start < DELAY
+    assert 'Geminiが書いた本文です。' not in content
+    assert generator.late_body is not None
+
+    assert generator.wait_late_body(timeout=5)
+    assert generator.late_body is None
+    assert 'Geminiが書いた本文です。' in generator.generate_post()['content']
+
+
+def test_fallback_is_posted_within_deadline_and_patched_later(slow_gemini, posted, fake_blogger):
+    server = slow_gemini()
+    start = time.perf_counter()
+    run_daily(parse_args(['--deadline', str(DEADLINE), '--patch-late']))
+
+    assert len(server.requests) == 1
+    [(first_at, _, first), (_, patched_id, second)] = posted
+    # 最初の投稿はGeminiの応答より前、期限の直後
+    assert first_at - start < DELAY
+    assert first_at < server.replied[0]
+    assert 'Geminiが書いた本文です。' not in first
+    # run_daily は今日の投稿を作る
+    kou = CalendarPostGenerator.calculate_astronomy(datetime.now(JST))['kou']
+    assert f"「{kou[0]}」" in first
+    assert 'Geminiが書いた本文です。' in second
+
+    [post_id] = fake_blogger.posts_by_id
+    assert patched_id == post_id
+    assert [method for method, _ in fake_blogger.calls] == ['insert', 'patch']
+    assert 'Geminiが書いた本文です。' in fake_blogger.posts_by_id[post_id]['content']
+
+
+def test_failed_late_body_keeps_fallback(slow_gemini, posted, fake_blogger):
+    slow_gemini(status=400)
+    run_daily(parse_args(['--deadline', str(DEADLINE), '--patch-late']))
+
+    assert [method for method, _ in fake_blogger.calls] == ['insert']
+    assert len(posted) == 1
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """corpus(data) で手直しした文面のファイルを書き、読み込み直させる"""
+    path = tmp_path / 'fallback_corpus.json'
+    monkeypatch.setenv('FALLBACK_CORPUS_PATH', str(path))
+
+    def write(data):
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        monkeypatch.setattr(FallbackCorpus, '_corpus', None)
+
+    write({})
+    return write
+
+
+def test_corpus_prefers_curated_kou_then_sekki_then_generated(corpus):
+    astronomy = CalendarPostGenerator.calculate_astronomy(DATE)
+    lunar, sekki, kou = astronomy['lunar'], astronomy['sekki'], astronomy['kou']
+    generated_text = FallbackCorpus.render_template(sekki, kou).format(lunar=lunar)
+
+    corpus({'kou': {kou[0]: "候の文面 {lunar[month]}月"}, 'sekki': {sekki[0]: "節気の文面"}})
+    assert fallback_text() == f"候の文面 {lunar['month']}月"
+
+    corpus({'kou': {'ほかの候': "別の候の文面"}, 'sekki': {sekki[0]: "節気の文面"}})
+    assert fallback_text() == "節気の文面"
+
+    corpus({'sekki': {'ほかの節気': "別の節気の文面"}})
+    assert fallback_text() == generated_text
+    assert kou[0] in generated_text and sekki[0] in generated_text
+
+
+def test_corpus_skips_template_that_fails_to_format(corpus):
+    astronomy = CalendarPostGenerator.calculate_astronomy(DATE)
+    corpus({'kou': {astronomy['kou'][0]: "{lunar[no_such_key]}"}, 'sekki': {astronomy['sekki'][0]: "節気の文面"}})
+    assert fallback_text() == "節気の文面"
+
+
+def test_unreadable_corpus_uses_generated(corpus, tmp_path):
+    (tmp_path / 'fallback_corpus.json').write_text('{broken', encoding='utf-8')
+    astronomy = CalendarPostGenerator.calculate_astronomy(DATE)
+    assert fallback_text() == FallbackCorpus.render_template(astronomy['sekki'], astronomy['kou']).format(lunar=astronomy['lunar'])
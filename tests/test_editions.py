@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""地域版（BLOG_EDITIONS）の生成・投稿をスタブのGemini APIと FakeBlogger で試すテスト"""
+
+import json
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import AccurateSunCalculator, BlogEdition, CalendarPostGenerator, parse_args, run_editions
+
+DATE = datetime(2026, 10, 17, 7, tzinfo=ZoneInfo("Asia/Tokyo"))
+CONTENT = "☀️ 季節の移ろい\n寒露の頃です。\n\n🍴 旬の食\n新米が美味しい季節です。\n"
+EDITIONS = [
+    {'name': 'okayama', 'blog_id': 'blog-okayama'},
+    {'name': 'sapporo', 'blog_id': 'blog-sapporo', 'location': '札幌', 'latitude': 43.06, 'longitude': 141.35,
+     'note': '**雪虫**が飛び始めました。'},
+    {'name': 'naha', 'blog_id': 'blog-naha', 'location': '那覇', 'latitude': 26.21, 'longitude': 127.68},
+]
+
+
+@pytest.fixture
+def gemini(gemini_api):
+    def handler(method, path, body):
+        return 200, {'candidates': [{'content': {'parts': [{'text': CONTENT}]}, 'finishReason': 'STOP'}]}
+
+    return gemini_api(handler)
+
+
+def sun_times(edition):
+    times = AccurateSunCalculator.calculate_sunrise_sunset(DATE, edition.latitude, edition.longitude)
+    return f"日の出: {times['sunrise']} / 日の入り: {times['sunset']}"
+
+
+def test_editions_share_one_gemini_body_with_their_own_sun_times(gemini):
+    editions = [BlogEdition(**item) for item in EDITIONS]
+    posts = CalendarPostGenerator(DATE).generate_editions(editions)
+
+    # Geminiへのリクエストは全地域版で1回
+    assert len(gemini.requests) == 1
+    assert len(posts) == 3
+    assert len({post['title'] for post in posts}) == 1
+
+    bodies = set()
+    for edition, post in zip(editions, posts):
+        content = post['content']
+        assert f"{edition.location}の日の出・日の入り" in content
+        assert sun_times(edition) in content
+        # 基本情報・地域の便りの後は共通
+        bodies.add(content[content.index('☀️ 季節の移ろい'):])
+    assert len(bodies) == 1
+    assert len({sun_times(edition) for edition in editions}) == 3
+
+    assert '<strong>雪虫</strong>が飛び始めました。' in posts[1]['content']
+    assert '雪虫' not in posts[0]['content'] + posts[2]['content']
+
+
+def test_failed_edition_does_not_stop_the_others(gemini, fake_blogger, monkeypatch):
+    monkeypatch.setenv('BLOG_EDITIONS', json.dumps(EDITIONS))
+    monkeypatch.setenv('POST_INDEX', '0')
+    fake_blogger.fail('insert', 403, match='blog-sapporo')
+
+    with pytest.raises(Exception, match='1件の地域版の投稿に失敗しました: sapporo'):
+        run_editions(parse_args([]))
+
+    assert len(gemini.requests) == 1
+    posted = {post['blog_id']: post for post in fake_blogger.posts_by_id.values()}
+    assert sorted(posted) == ['blog-naha', 'blog-okayama']
+    assert '那覇の日の出・日の入り' in posted['blog-naha']['content']
+    assert '岡山の日の出・日の入り' in posted['blog-okayama']['content']
+    assert fake_blogger.count('insert') == 3
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""GeminiContentGenerator をローカルのスタブサーバーに向けたテスト"""
+
+import re
+import json
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from calendar_post import CalendarPostGenerator, GeminiContentGenerator
+
+JST = ZoneInfo("Asia/Tokyo")
+DATES = [datetime(2026, 1, 1, 7, tzinfo=JST) + timedelta(days=i) for i in range(6)]
+DATE_PATTERN = re.compile(r'西暦: (\d+)年(\d+)月(\d+)日')
+
+
+def items(dates):
+    """generate_many に渡す (date, lunar, sekki, kou) の列"""
+    result = []
+    for date in dates:
+        astronomy = CalendarPostGenerator.calculate_astronomy(date)
+        result.append((date, astronomy['lunar'], astronomy['sekki'], astronomy['kou']))
+    return result
+
+
+def prompt_day(body):
+    """リクエスト本文のプロンプトから日付（日）を取り出す"""
+    return int(DATE_PATTERN.search(body['contents'][0]['parts'][0]['text']).group(3))
+
+
+def generated(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}]}, 'finishReason': 'STOP'}]}
+
+
+def make_generator(server, **kwargs):
+    return GeminiContentGenerator(
+        'test-key', endpoint=server.url + '/v1beta/models/m:generateContent', cache=False, retries=0, **kwargs
+    )
+
+
+def test_generate_many_keeps_input_order(stub_server):
+    # 先の日ほど応答を遅らせ、完了順を入力順と逆にする
+    def handler(method, path, body):
+        day = prompt_day(body)
+        time.sleep(0.05 * (len(DATES) - day))
+        return 200, generated(f"{day}日の本文")
+
+    server = stub_server(handler)
+    generator = make_generator(server)
+    try:
+        results = list(generator.generate_many(items(DATES), max_workers=len(DATES)))
+    finally:
+        generator.close()
+
+    assert [i for i, _ in results] == list(range(len(DATES)))
+    assert [text for _, text in results] == [f"{date.day}日の本文" for date in DATES]
+
+
+def test_generate_many_isolates_failed_items(stub_server):
+    def handler(method, path, body):
+        day = prompt_day(body)
+        if day == 3:
+            return 400, {'error': {'message': 'bad request'}}
+        return 200, generated(f"{day}日の本文")
+
+    server = stub_server(handler)
+    generator = make_generator(server)
+    try:
+        results = dict(generator.generate_many(items(DATES), max_workers=3))
+    finally:
+        generator.close()
+
+    assert results[2] is None
+    assert [results[i] for i in (0, 1, 3, 4, 5)] == [f"{d}日の本文" for d in (1, 2, 4, 5, 6)]
+
+
+def test_generate_many_caps_request_rate(stub_server):
+    sent = []
+
+    def handler(method, path, body):
+        sent.append(time.monotonic())
+        return 200, generated("本文")
+
+    server = stub_server(handler)
+    generator = make_generator(server)
+    try:
+        # 600件/分 = 0.1秒間隔（並列数が多くても間隔は詰まらない）
+        list(generator.generate_many(items(DATES), max_workers=len(DATES), requests_per_minute=600))
+    finally:
+        generator.close()
+
+    sent.sort()
+    gaps = [b - a for a, b in zip(sent, sent[1:])]
+    assert len(sent) == len(DATES)
+    assert min(gaps) >= 0.08
+    assert sent[-1] - sent[0] >= 0.1 * (len(DATES) - 1) * 0.9
+    # 制限はこの呼び出しだけで、生成器の設定は変わらない
+    assert generator.rate_limiter is None
+
+
+def test_generate_content_stream_decodes_utf8_without_charset(stub_server):
+    # charset のない text/event-stream（requests の既定では ISO-8859-1 として復号される）
+    chunks = ["☀️ 季節の移ろい\n\n", "寒露の頃です。…菊の花が咲きます。\n"]
+    stream = b''.join(
+        b'data: ' + json.dumps(generated(chunk), ensure_ascii=False).encode('utf-8') + b'\r\n\r\n'
+        for chunk in chunks
+    )
+
+    server = stub_server(lambda method, path, body: (200, stream, 'text/event-stream'))
+    generator = make_generator(server)
+    date, lunar, sekki, kou = items(DATES[:1])[0]
+    try:
+        received = list(generator.generate_content_stream(date, lunar, sekki, kou))
+    finally:
+        generator.close()
+
+    assert ''.join(received) == ''.join(chunks)
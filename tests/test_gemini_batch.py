@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""GeminiContentGenerator.generate_batch をバッチAPIのスタブで試すテスト"""
+
+import os
+import re
+import json
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import CalendarPostGenerator, GeminiContentGenerator
+
+JST = ZoneInfo("Asia/Tokyo")
+DATES = [datetime(2026, 1, 1, 7, tzinfo=JST) + timedelta(days=i) for i in range(4)]
+DATE_PATTERN = re.compile(r'西暦: (\d+)年(\d+)月(\d+)日')
+
+
+def items(dates):
+    result = []
+    for date in dates:
+        astronomy = CalendarPostGenerator.calculate_astronomy(date)
+        result.append((date, astronomy['lunar'], astronomy['sekki'], astronomy['kou']))
+    return result
+
+
+class BatchApi:
+    """batchGenerateContent（ジョブ作成）と batches/...（状態の取得）のスタブ
+
+    failing の日は個別のエラーになり、running が真の間はジョブが終わらない。
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.running = False
+        # ジョブ名 → そのジョブで送られた日の一覧
+        self.jobs = {}
+
+    def __call__(self, method, path, body):
+        if method == 'POST' and ':batchGenerateContent' in path:
+            requests = body['batch']['input_config']['requests']['requests']
+            name = f"batches/job-{len(self.jobs) + 1}"
+            self.jobs[name] = [(request['metadata']['key'], self.day(request['request'])) for request in requests]
+            return 200, {'name': name}
+        name = path.split('?')[0].split('/v1beta/')[1]
+        if method == 'GET' and name in self.jobs:
+            if self.running:
+                return 200, {'name': name, 'metadata': {'state': 'BATCH_STATE_RUNNING'}}
+            responses = []
+            for key, day in self.jobs[name]:
+                if day in self.failing:
+                    responses.append({'metadata': {'key': key}, 'error': {'code': 500, 'message': 'internal'}})
+                else:
+                    responses.append({'metadata': {'key': key}, 'response': {
+                        'candidates': [{'content': {'parts': [{'text': f"{day}日の本文"}]}, 'finishReason': 'STOP'}]
+                    }})
+            return 200, {
+                'name': name,
+                'done': True,
+                'metadata': {'state': 'BATCH_STATE_SUCCEEDED'},
+                'response': {'inlinedResponses': {'inlinedResponses': responses}}
+            }
+        return 404, {'error': {'message': 'not found'}}
+
+    @staticmethod
+    def day(body):
+        return int(DATE_PATTERN.search(body['contents'][0]['parts'][0]['text']).group(3))
+
+    def submitted_days(self, name):
+        return [day for _, day in self.jobs[name]]
+
+
+def generate_batch(server, state_dir, **kwargs):
+    # 応答キャッシュなし（再開はジョブの記録だけに頼る）
+    generator = GeminiContentGenerator(
+        'test-key', endpoint=server.url + '/v1beta/models/m:generateContent', cache=False, retries=0
+    )
+    try:
+        return generator.generate_batch(items(DATES), poll_interval=0.01, state_dir=str(state_dir), **kwargs)
+    finally:
+        generator.close()
+
+
+def state_files(state_dir):
+    return [name for name in os.listdir(state_dir) if name.endswith('.json')] if os.path.isdir(state_dir) else []
+
+
+def test_batch_collects_results_in_input_order(stub_server, tmp_path):
+    api = BatchApi()
+    server = stub_server(api)
+
+    assert generate_batch(server, tmp_path) == [f"{date.day}日の本文" for date in DATES]
+    assert list(api.jobs) == ['batches/job-1']
+    assert api.submitted_days('batches/job-1') == [1, 2, 3, 4]
+    # すべてそろったらジョブの記録は消す
+    assert state_files(tmp_path) == []
+
+
+def test_batch_resubmits_only_failed_days(stub_server, tmp_path):
+    api = BatchApi(failing={2, 4})
+    server = stub_server(api)
+
+    assert generate_batch(server, tmp_path) == ["1日の本文", None, "3日の本文", None]
+    # 失敗した日があるので、回収した文章とともに記録を残す
+    [state_name] = state_files(tmp_path)
+    with open(tmp_path / state_name, encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['jobs'] == []
+    assert sorted(state['results'].values()) == ["1日の本文", "3日の本文"]
+
+    api.failing.clear()
+    assert generate_batch(server, tmp_path) == [f"{date.day}日の本文" for date in DATES]
+    assert list(api.jobs) == ['batches/job-1', 'batches/job-2']
+    assert api.submitted_days('batches/job-2') == [2, 4]
+    assert state_files(tmp_path) == []
+
+
+def test_batch_resumes_recorded_job_after_timeout(stub_server, tmp_path):
+    api = BatchApi()
+    api.running = True
+    server = stub_server(api)
+
+    with pytest.raises(Exception, match='再実行'):
+        generate_batch(server, tmp_path, timeout=0)
+    assert len(state_files(tmp_path)) == 1
+
+    # 再実行では新しいジョブを作らず、記録済みのジョブの結果を回収する
+    api.running = False
+    assert generate_batch(server, tmp_path) == [f"{date.day}日の本文" for date in DATES]
+    assert list(api.jobs) == ['batches/job-1']
+    assert state_files(tmp_path) == []
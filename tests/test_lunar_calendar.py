@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""旧暦（朔と中気による月の決定・閏月）のテスト"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from calendar_post import AccurateLunarCalendar
+
+
+def lunar(year, month, day):
+    """投稿時刻（7:00）の旧暦の (年, 月, 日, 閏月)"""
+    result = AccurateLunarCalendar.calculate_lunar_date(datetime(year, month, day, 7))
+    return result['year'], result['month'], result['day'], result['leap']
+
+
+@pytest.mark.parametrize('first_day, month', [
+    ((2014, 10, 24), 9),
+    ((2017, 6, 24), 5),
+    ((2020, 5, 23), 4),
+    ((2023, 3, 22), 2),
+    ((2025, 7, 25), 6),
+    # 2033年問題: 閏11月とする
+    ((2033, 12, 22), 11),
+])
+def test_leap_month_starts(first_day, month):
+    year = first_day[0]
+    before = datetime(*first_day) - timedelta(days=1)
+    assert lunar(*first_day) == (year, month, 1, True)
+    # 前日は同じ番号の平月の末日
+    assert lunar(before.year, before.month, before.day)[1:] in ((month, 29, False), (month, 30, False))
+
+
+@pytest.mark.parametrize('new_year', [(2023, 1, 22), (2024, 2, 10), (2025, 1, 29), (2026, 2, 17)])
+def test_lunar_new_year(new_year):
+    assert lunar(*new_year) == (new_year[0], 1, 1, False)
+    before = datetime(*new_year) - timedelta(days=1)
+    assert lunar(before.year, before.month, before.day)[:2] == (new_year[0] - 1, 12)
+
+
+def test_known_date():
+    assert lunar(2025, 12, 10) == (2025, 10, 21, False)
+
+
+def test_year_without_leap_month_has_twelve_months():
+    table = AccurateLunarCalendar.get_year_table(2026)
+    assert len(table['months']) == 12
+    assert not any(table['leaps'])
+
+
+def test_year_tables_are_bounded():
+    get_year_table = AccurateLunarCalendar.get_year_table
+    for year in range(1901, 2101):
+        get_year_table(year)
+    info = get_year_table.cache_info()
+    assert info.currsize <= info.maxsize < 200
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""投稿の索引（PostIndex）による再実行時のスキップ・更新・新規投稿を FakeBlogger で試すテスト"""
+
+import json
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import PostIndex
+
+JST = ZoneInfo("Asia/Tokyo")
+DATE = datetime(2025, 10, 17, 7, tzinfo=JST)
+LABELS = ['暦']
+
+
+@pytest.fixture
+def index(tmp_path):
+    return PostIndex(str(tmp_path / 'post_index.json'))
+
+
+def post(fake, index, content, date=DATE, title='10月17日の暦情報'):
+    return fake.make_poster(index).post_to_blog('blog-1', title, content, LABELS, date=date)
+
+
+def reloaded(index):
+    """保存されたファイルから読み直した索引の DATE の記録"""
+    return PostIndex(index.path).get('blog-1', DATE)
+
+
+def test_new_post_is_inserted_and_recorded(fake_blogger, index):
+    response = post(fake_blogger, index, '<p>本文</p>')
+
+    assert fake_blogger.calls == [('insert', '10月17日の暦情報')]
+    assert reloaded(index) == {
+        'post_id': response['id'],
+        'hash': PostIndex.content_hash('10月17日の暦情報', '<p>本文</p>', LABELS),
+        'url': response['url'],
+        'published': True
+    }
+
+
+def test_unchanged_post_is_skipped(fake_blogger, index):
+    first = post(fake_blogger, index, '<p>本文</p>')
+    second = post(fake_blogger, index, '<p>本文</p>')
+
+    assert fake_blogger.calls == [('insert', '10月17日の暦情報')]
+    assert second == {'id': first['id'], 'url': first['url']}
+
+
+def test_changed_post_is_patched(fake_blogger, index):
+    first = post(fake_blogger, index, '<p>本文</p>')
+    post(fake_blogger, index, '<p>書き直した本文</p>')
+
+    assert fake_blogger.calls == [('insert', '10月17日の暦情報'), ('patch', first['id'])]
+    assert len(fake_blogger.posts_by_id) == 1
+    assert fake_blogger.posts_by_id[first['id']]['content'] == '<p>書き直した本文</p>'
+    assert reloaded(index)['hash'] == PostIndex.content_hash('10月17日の暦情報', '<p>書き直した本文</p>', LABELS)
+
+
+def test_stale_entry_is_reinserted_after_404(fake_blogger, index):
+    # Blogger側で削除された投稿の記録
+    index.put('blog-1', DATE, 'deleted-post', 'old-hash', 'https://example.blogspot.com/deleted-post.html')
+    index.save()
+
+    response = post(fake_blogger, index, '<p>本文</p>')
+
+    assert fake_blogger.calls == [('patch', 'deleted-post'), ('insert', '10月17日の暦情報')]
+    assert reloaded(index)['post_id'] == response['id'] != 'deleted-post'
+
+
+def test_other_dates_and_blogs_are_separate(fake_blogger, index):
+    post(fake_blogger, index, '<p>本文</p>')
+    post(fake_blogger, index, '<p>本文</p>', date=DATE + timedelta(days=1))
+    fake_blogger.make_poster(index).post_to_blog('blog-2', '10月17日の暦情報', '<p>本文</p>', LABELS, date=DATE)
+
+    assert fake_blogger.count('insert') == 3
+    assert PostIndex(index.path).get('blog-2', DATE)['post_id'] != reloaded(index)['post_id']
+
+
+def test_without_index_every_run_inserts(fake_blogger):
+    post(fake_blogger, None, '<p>本文</p>')
+    post(fake_blogger, None, '<p>本文</p>')
+    assert fake_blogger.count('insert') == 2
+
+
+def test_unreadable_index_starts_empty(fake_blogger, index):
+    with open(index.path, 'w', encoding='utf-8') as f:
+        f.write('{broken')
+    post(fake_blogger, index, '<p>本文</p>')
+
+    assert fake_blogger.count('insert') == 1
+    with open(index.path, encoding='utf-8') as f:
+        assert json.load(f)['version'] == PostIndex.VERSION
+
+
+def batch_posts(contents):
+    return [
+        {'title': f"{i + 1}日目", 'content': content, 'labels': LABELS, 'publish_at': DATE + timedelta(days=i)}
+        for i, content in enumerate(contents)
+    ]
+
+
+def test_batch_rerun_skips_patches_and_inserts(fake_blogger, index):
+    poster = fake_blogger.make_poster(index)
+    first = poster.publish_batch('blog-1', batch_posts(['<p>1</p>', '<p>2</p>']))
+    assert [result['status'] for result in first] == ['published', 'published']
+    fake_blogger.calls.clear()
+
+    # 1日目は同じ、2日目は変更、3日目は新規
+    results = fake_blogger.make_poster(PostIndex(index.path)).publish_batch(
+        'blog-1', batch_posts(['<p>1</p>', '<p>2（修正）</p>', '<p>3</p>'])
+    )
+
+    assert [result['status'] for result in results] == ['unchanged', 'updated', 'published']
+    post_ids = [PostIndex(index.path).get('blog-1', DATE + timedelta(days=i))['post_id'] for i in range(3)]
+    assert fake_blogger.calls == [('patch', post_ids[1]), ('insert', '3日目'), ('publish', post_ids[2])]
+    assert len(fake_blogger.posts_by_id) == 3
+
+
+def test_batch_rerun_publishes_drafts_left_by_partial_run(fake_blogger, index):
+    # 前回は下書きの作成後、2日目の公開に失敗した
+    fake_blogger.fail('publish', 403, match='2日目')
+    first = fake_blogger.make_poster(index).publish_batch('blog-1', batch_posts(['<p>1</p>', '<p>2</p>']))
+    assert [result['status'] for result in first] == ['published', 'failed']
+    draft = PostIndex(index.path).get('blog-1', DATE + timedelta(days=1))
+    assert draft['published'] is False
+    fake_blogger.calls.clear()
+
+    results = fake_blogger.make_poster(PostIndex(index.path)).publish_batch(
+        'blog-1', batch_posts(['<p>1</p>', '<p>2</p>'])
+    )
+
+    # 下書きを作り直さずに公開だけ行う
+    assert [result['status'] for result in results] == ['unchanged', 'published']
+    assert fake_blogger.calls == [('publish', draft['post_id'])]
+    assert PostIndex(index.path).get('blog-1', DATE + timedelta(days=1))['published'] is True
+    assert len(fake_blogger.posts_by_id) == 2
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""SectionStreamParser（Geminiの出力のセクション分割・HTML化）のテスト"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import CalendarPostGenerator, SectionStreamParser
+
+CONTENT = """☀️ 季節の移ろい
+寒露を過ぎ、**朝晩の冷え込み**が
+深まる頃です。
+- 菊の花
+* 渡り鳥
+
+🍴 旬の食
+新米と秋刀魚が美味しい季節です。
+"""
+
+
+@pytest.fixture(scope='module')
+def formatter():
+    return CalendarPostGenerator(datetime(2026, 10, 17, 7, tzinfo=ZoneInfo("Asia/Tokyo")), inline_css=False)
+
+
+def parse(formatter, chunks, **kwargs):
+    """テキスト片を順に渡し、確定した (絵文字, HTML) をすべて返す"""
+    parser = SectionStreamParser(formatter, **kwargs)
+    parts = []
+    for chunk in chunks:
+        parts.extend(parser.feed(chunk))
+    return parts + parser.close()
+
+
+def split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_sections_are_formatted(formatter):
+    parts = parse(formatter, [CONTENT])
+    assert [emoji for emoji, _ in parts] == ['☀️', '🍴']
+
+    html = parts[0][1]
+    assert '☀️ 季節の移ろい' in html
+    # 続けて書かれた行は1つの段落に、箇条書きは1つのリストにまとめる
+    assert '<strong>朝晩の冷え込み</strong>が 深まる頃です。' in html
+    assert html.count('<ul ') == 1 and html.count('<li ') == 2
+    assert '#fc8181' in html
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 16])
+def test_chunk_boundaries_do_not_change_output(formatter, size):
+    # 見出しの絵文字（異体字セレクタ付き）や太字の途中で区切られても同じ結果になる
+    assert parse(formatter, split(CONTENT, size)) == parse(formatter, [CONTENT])
+
+
+def test_heading_split_across_chunks(formatter):
+    parser = SectionStreamParser(formatter)
+    assert parser.feed("☀️ 季節の移ろい\n本文です。\n") == []
+    assert parser.feed("☀") == []
+    # 見出しの行が届いた時点で前のセクションが確定する
+    parts = parser.feed("️ 季節") + parser.feed("の移ろい（続き）\n")
+    assert [emoji for emoji, _ in parts] == ['☀️']
+    assert parser.feed("続きの本文") == []
+    assert [emoji for emoji, _ in parser.close()] == ['☀️']
+
+
+def test_unterminated_section_is_emitted_on_close(formatter):
+    parser = SectionStreamParser(formatter)
+    assert parser.feed("🍴 旬の食\n最後の行に改行がない") == []
+    [(emoji, html)] = parser.close()
+    assert emoji == '🍴'
+    assert '最後の行に改行がない' in html
+    assert parser.finished
+    assert parser.close() == []
+
+
+def test_empty_sections_and_preamble_are_dropped(formatter):
+    parts = parse(formatter, ["はじめに（見出しの前の文）\n🎌 記念日・祝日\n\n🍴 旬の食\n本文\n"])
+    assert [emoji for emoji, _ in parts] == ['🍴']
+    assert 'はじめに' not in parts[0][1]
+
+
+def test_stop_when_complete_ignores_repeated_sections(formatter):
+    body = ''.join(f"{emoji} 見出し\n本文{i}\n" for i, emoji in enumerate(CalendarPostGenerator.SECTION_CONFIG))
+    parts = parse(formatter, [body + "☀️ 二周目\n繰り返し\n"], stop_when_complete=True)
+    assert [emoji for emoji, _ in parts] == list(CalendarPostGenerator.SECTION_CONFIG)
+    assert '繰り返し' not in ''.join(html for _, html in parts)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""セクションごとの並列生成（parallel_sections）で、各セクションの出力をまとめる規則のテスト"""
+
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import CalendarPostGenerator, SectionStreamParser
+
+DATE = datetime(2026, 10, 17, 7, tzinfo=ZoneInfo("Asia/Tokyo"))
+SECTIONS = list(CalendarPostGenerator.SECTION_CONFIG)
+SECTION_PATTERN = re.compile(r'「(\S+) [^」]+」の1セクションだけ')
+
+
+def generated(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}]}, 'finishReason': 'STOP'}]}
+
+
+def section_text(emoji):
+    return f"{emoji} {CalendarPostGenerator.SECTION_CONFIG[emoji][1]}\n本文（{emoji}）です。\n"
+
+
+@pytest.fixture
+def sections(gemini_api):
+    """sections(overrides) で、overrides にない絵文字には見出し付きの1セクションを返すスタブを起動する
+
+    overrides の値は応答の文章、または (ステータス, JSON) の組
+    """
+    def start(overrides):
+        def handler(method, path, body):
+            emoji = SECTION_PATTERN.search(body['contents'][0]['parts'][0]['text']).group(1)
+            reply = overrides.get(emoji, section_text(emoji))
+            return reply if isinstance(reply, tuple) else (200, generated(reply))
+
+        return gemini_api(handler)
+
+    return start
+
+
+def generate():
+    """並列生成した本文HTMLと、同じ日のフォールバックを {絵文字: HTML} にしたものを返す"""
+    generator = CalendarPostGenerator(DATE, parallel_sections=True)
+    content = generator.generate_post()['content']
+    astronomy = generator.calculate_astronomy(DATE)
+    parser = SectionStreamParser(generator)
+    fallback = generator._generate_rich_fallback_content(astronomy['lunar'], astronomy['sekki'], astronomy['kou'])
+    return content, dict(parser.feed(fallback) + parser.close())
+
+
+def assert_sections_in_order(content):
+    positions = [content.index(f"{emoji} {title}") for emoji, (_, title) in CalendarPostGenerator.SECTION_CONFIG.items()]
+    assert positions == sorted(positions)
+
+
+def test_all_sections_are_requested_and_merged_in_order(sections):
+    server = sections({})
+    content, fallback = generate()
+
+    assert len(server.requests) == len(SECTIONS)
+    assert_sections_in_order(content)
+    for emoji in SECTIONS:
+        assert f"本文（{emoji}）です。" in content
+        assert fallback[emoji] not in content
+
+
+def test_missing_heading_is_added(sections):
+    sections({'🍴': "新米と秋刀魚が美味しい季節です。\n"})
+    content, fallback = generate()
+
+    assert_sections_in_order(content)
+    assert '新米と秋刀魚が美味しい季節です。' in content
+    assert fallback['🍴'] not in content
+
+
+def test_extra_sections_in_a_reply_are_dropped(sections):
+    sections({'🎌': section_text('🎌') + "\n🍴 旬の食\n混ざったセクション\n"})
+    content, fallback = generate()
+
+    assert '本文（🎌）です。' in content
+    assert '混ざったセクション' not in content
+    # 🍴 は自分のリクエストの出力を1回だけ使う
+    assert content.count('本文（🍴）です。') == 1
+    assert content.count('🍴 旬の食') == 1
+
+
+def test_reply_with_only_another_section_falls_back(sections):
+    sections({'🍁': "🍴 旬の食\n別のセクションだけの応答\n"})
+    content, fallback = generate()
+
+    assert '別のセクションだけの応答' not in content
+    assert fallback['🍁'] in content
+    assert content.count('🍴 旬の食') == 1
+    assert_sections_in_order(content)
+
+
+def test_only_failed_section_falls_back(sections):
+    # 💡 はエラー、🎨 は空の応答
+    sections({'💡': (400, {'error': {'message': 'bad request'}}), '🎨': ""})
+    content, fallback = generate()
+
+    for emoji in SECTIONS:
+        if emoji in ('💡', '🎨'):
+            assert fallback[emoji] in content
+            assert f"本文（{emoji}）です。" not in content
+        else:
+            assert f"本文（{emoji}）です。" in content
+            assert fallback[emoji] not in content
+    assert_sections_in_order(content)
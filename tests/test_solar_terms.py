@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""太陽黄経・二十四節気・七十二候の計算のテスト"""
+
+import random
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from calendar_post import AccurateSolarTermCalculator
+
+JST = ZoneInfo("Asia/Tokyo")
+UTC = ZoneInfo("UTC")
+calc = AccurateSolarTermCalculator
+
+
+def sample_dates(count, start=datetime(1900, 1, 1, tzinfo=JST), years=300, seed=1):
+    """start から years 年の間の秒単位の日時（再現できるよう乱数の種を固定）"""
+    rnd = random.Random(seed)
+    return [start + timedelta(seconds=rnd.randrange(years * 365 * 86400)) for _ in range(count)]
+
+
+def test_vectorized_longitude_matches_scalar():
+    dates = sample_dates(8000)
+    vectorized = calc.calculate_solar_longitudes(dates)
+    scalar = np.array([calc.calculate_solar_longitude(date) for date in dates])
+
+    difference = np.abs(np.mod(vectorized - scalar + 180, 360) - 180)
+    assert difference.max() < 1e-6
+    assert np.array_equal(calc.kou_indices(vectorized), calc.kou_indices(scalar))
+    assert np.array_equal(calc.sekki_indices(vectorized), calc.sekki_indices(scalar))
+
+
+def test_scalar_longitude_uses_universal_time():
+    jst = datetime(2026, 10, 17, 7, 0, tzinfo=JST)
+    # 同じ瞬間ならタイムゾーンによらず同じ値（タイムゾーンなしは日本時間）
+    assert calc.calculate_solar_longitude(jst) == calc.calculate_solar_longitude(jst.astimezone(UTC))
+    assert calc.calculate_solar_longitude(jst.replace(tzinfo=None)) == calc.calculate_solar_longitude(jst)
+    # 9時間ずれた表示時刻をUTCとして扱っていれば約0.37度ずれる
+    assert calc.calculate_solar_longitude(jst) != calc.calculate_solar_longitude(jst.replace(tzinfo=UTC))
+
+
+def test_datetime64_is_read_as_japan_wall_time():
+    dates = sample_dates(50, start=datetime(2000, 1, 1, tzinfo=JST), years=100)
+    wall = np.array([date.replace(tzinfo=None) for date in dates], dtype='datetime64[us]')
+    assert np.allclose(calc.calculate_solar_longitudes(wall), calc.calculate_solar_longitudes(dates), rtol=0, atol=1e-9)
+
+
+def test_transition_table_lookup_matches_direct_calculation():
+    dates = sample_dates(3000, start=datetime(2000, 1, 1, tzinfo=JST), years=100, seed=2)
+    expected = calc.get_kou_array(dates)
+    assert [calc.get_current_kou(date) for date in dates] == expected
+    assert [calc.get_current_sekki(date) for date in dates] == calc.get_sekki_array(dates)
+
+
+def test_kou_period_contains_date_and_is_contiguous():
+    date = datetime(2026, 10, 17, 7, tzinfo=JST)
+    period = calc.get_kou_period(date)
+    assert period['start'] <= date < period['end']
+    assert calc.get_current_kou(date)[0] == period['name']
+
+    following = calc.get_kou_period(period['end'] + timedelta(seconds=1))
+    assert following['start'] == period['end']
+    assert following['name'] != period['name']
+
+
+def test_find_solar_term_known_instant():
+    # 2027年の立春
+    assert calc.find_solar_term(2027, 315) == datetime(2027, 2, 4, 10, 43, tzinfo=JST)
+
+
+def test_find_solar_term_agrees_with_transition_table():
+    for degree, name, _, _ in calc.SEKKI_DATA:
+        instant = calc.find_solar_term(2026, degree)
+        assert instant.year == 2026
+        # 開始時刻の直後はその節気で、太陽黄経はほぼ degree 度
+        period = calc.get_sekki_period(instant + timedelta(minutes=1))
+        assert period['name'] == name
+        assert abs(period['start'] - instant) <= timedelta(seconds=30)
+        longitude = calc.calculate_solar_longitude(instant)
+        assert abs((longitude - degree + 180) % 360 - 180) < 0.001
+
+
+def test_sekki_dates_are_in_order_within_the_year():
+    terms = calc.get_sekki_dates(2026)
+    assert len(terms) == 24
+    assert terms[0]['name'] == '小寒'
+    assert terms[-1]['name'] == '冬至'
+    starts = [term['start'] for term in terms]
+    assert starts == sorted(starts)
+    assert all(start.year == 2026 for start in starts)
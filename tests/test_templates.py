@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""PostTemplates（@名前@ のクラス・インラインスタイルへの展開）のテスト"""
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_post import CalendarPostGenerator, PostTemplates
+
+DATE = datetime(2026, 10, 17, 7, tzinfo=ZoneInfo("Asia/Tokyo"))
+CONTENT = "☀️ 季節の移ろい\n寒露の頃です。\n- 菊の花\n"
+
+
+@pytest.mark.parametrize('inline_css', [False, True])
+def test_all_markers_are_replaced(inline_css):
+    for name, template in PostTemplates.compile(inline_css).items():
+        assert PostTemplates.ATTRIBUTE_PATTERN.search(template) is None, name
+
+
+def test_class_mode_uses_classes_and_keeps_substituted_declarations_inline():
+    templates = PostTemplates.compile(False)
+    assert templates['paragraph'] == '<p class="cp-p">{}</p>'
+    # {color} を含む宣言だけ style 属性に残す
+    assert 'class="cp-section-title" style="border-left: 6px solid {color};"' in templates['section']
+    assert templates['section'].format(title='見出し', content='本文', color='#fc8181').count('#fc8181') == 2
+
+
+def test_inline_mode_expands_every_declaration():
+    templates = PostTemplates.compile(True)
+    assert templates['paragraph'] == f'<p style="{PostTemplates.STYLES["p"]}">{{}}</p>'
+    assert 'class=' not in ''.join(templates.values())
+
+
+def test_stylesheet_has_static_declarations_only():
+    stylesheet = PostTemplates.stylesheet()
+    assert stylesheet.startswith('<style>') and stylesheet.endswith('</style>\n')
+    assert '.cp-p{margin:0 0 15px 0;line-height:2}' in stylesheet
+    assert '.cp-section-title{color:#2d3748;font-size:26px;margin:35px 0 25px 0;padding-left:15px}' in stylesheet
+    assert '{color}' not in stylesheet
+
+
+@pytest.mark.parametrize('inline_css', [False, True])
+def test_rendered_post(inline_css):
+    generator = CalendarPostGenerator(DATE, inline_css=inline_css)
+    content = generator.generate_post(gemini_content=CONTENT)['content']
+
+    assert PostTemplates.ATTRIBUTE_PATTERN.search(content) is None
+    assert '寒露の頃です。' in content and '菊の花' in content
+    if inline_css:
+        assert '<style>' not in content and 'class="cp-' not in content
+        assert f'style="{PostTemplates.STYLES["p"]}"' in content
+    else:
+        # スタイルシートは投稿の先頭に1回だけ
+        assert content.startswith(PostTemplates.stylesheet())
+        assert content.count('<style>') == 1
+        assert 'class="cp-p"' in content